@@ -0,0 +1,479 @@
+"""The 'cooccurrence' module contains the utilities to count the
+co-occurrences of the words of a corpus, storing them in a sparse matrix that
+can be memory-mapped and shared between processes.
+"""
+import mmap
+import numpy as np
+from okgraph.dictionary import corpus_statistics, CorpusDictionary, \
+    replacing_file
+from okgraph.sliding_windows import SlidingWindows
+from okgraph.utils import get_word_batches, logger
+from os import path
+from scipy.sparse import csr_matrix
+import shutil
+import tempfile
+from typing import BinaryIO, List, Tuple
+
+COOCCURRENCE_MAGIC: bytes = b"OKGCOOC1"
+"""bytes: signature at the beginning of a co-occurrence matrix file."""
+COOCCURRENCE_RUN_SIZE: int = 2**22
+"""int: number of distinct co-occurrences kept in memory while generating a
+co-occurrence matrix. The co-occurrences counted so far are then saved in a
+temporary file, and all the files are merged at the end."""
+_HEADER = np.dtype([("magic", "S8"), ("words_count", "<i8"),
+                    ("nonzero_count", "<i8"), ("window_size", "<i8"),
+                    ("total_cooccurrences", "<i8"), ("dictionary_size", "<i8"),
+                    ("dictionary_mtime", "<i8"), ("dictionary_inode", "<i8")])
+
+
+def generate_cooccurrence_matrix(corpus: str,
+                                 dictionary_file: str,
+                                 matrix_file: str,
+                                 window_size: int = 14
+                                 ) -> None:
+    """Counts the co-occurrences of the words of the corpus dictionary in a
+    single pass over the corpus, saving them in a co-occurrence matrix file.
+
+    Two words co-occur if their distance in the corpus is at most half the
+    window size, like the words of a window centered on one of them. The words
+    missing from the dictionary are not counted, but they still separate the
+    other words.
+
+    The file is composed by a header followed by:
+        - the sums of the rows of the matrix (int64);
+        - the row pointers of the CSR matrix (int64);
+        - the column indices of the CSR matrix (int32);
+        - the co-occurrences of the CSR matrix (int64).
+    The i-th row and column of the matrix are related to the word with ID i
+    in the dictionary.
+
+    Args:
+        corpus (str): path of the corpus file.
+        dictionary_file (str): path of the corpus dictionary file.
+        matrix_file (str): path of the co-occurrence matrix file.
+        window_size (int): size of the windows of the co-occurring words.
+
+    Returns:
+        None
+
+    """
+    if window_size < 2:
+        raise ValueError(f"window_size must be at least 2")
+
+    logger.info(f"Counting the co-occurrences of the words in {corpus}")
+    statistics = corpus_statistics(dictionary_file)
+    dictionary = statistics.dictionary
+    words_count = len(dictionary)
+    distance = window_size // 2
+
+    with tempfile.TemporaryDirectory(dir=path.dirname(
+            path.abspath(matrix_file))) as runs_dir:
+        runs = []
+        pending = []
+        pending_size = 0
+        # The last words of a batch co-occur with the first words of the
+        # next one
+        previous_ids = np.empty(0, dtype=np.int64)
+        for words in get_word_batches(corpus):
+            word_ids = np.concatenate((previous_ids, np.fromiter(
+                map(dictionary.word_id, words), dtype=np.int64,
+                count=len(words))))
+            pending.append(_cooccurrences(
+                word_ids, len(previous_ids), distance, words_count))
+            pending_size += len(pending[-1][0])
+            previous_ids = word_ids[-distance:]
+            # Save the co-occurrences counted so far, instead of adding them
+            # to a matrix copied at every batch
+            if pending_size >= COOCCURRENCE_RUN_SIZE:
+                runs.append(_save_run(pending, runs_dir))
+                pending = []
+                pending_size = 0
+        runs.append(_save_run(pending, runs_dir))
+
+        logger.info(f"Merging the co-occurrences saved in {len(runs)}"
+                    f" temporary files")
+        # Replace the file at the end, so that it can be safely replaced
+        # while it is memory-mapped
+        with replacing_file(matrix_file) as file:
+            _merge_runs(runs, runs_dir, words_count, window_size,
+                        statistics.fingerprint, file)
+    logger.info(f"Co-occurrence matrix {matrix_file} generated")
+
+
+def _cooccurrences(word_ids: np.ndarray,
+                   start: int,
+                   distance: int,
+                   words_count: int
+                   ) -> Tuple[np.ndarray, np.ndarray]:
+    """Counts the co-occurrences of a sequence of words.
+
+    Args:
+        word_ids (numpy.ndarray): dictionary IDs of the words (-1 for the
+            words missing from the dictionary).
+        start (int): position of the first new word. The co-occurrences
+            between the words preceding it have already been counted.
+        distance (int): maximum distance of the co-occurring words.
+        words_count (int): number of words in the dictionary.
+
+    Returns:
+        Tuple[numpy.ndarray, numpy.ndarray]: the co-occurrences (symmetric) of
+            the words, as sorted keys (row * words_count + column) of the
+            matrix and their counts.
+
+    """
+    keys = []
+    for offset in range(1, distance + 1):
+        first = max(start, offset)
+        if first >= len(word_ids):
+            break
+        left = word_ids[first - offset:len(word_ids) - offset]
+        right = word_ids[first:]
+        found = (left >= 0) & (right >= 0)
+        keys.extend((left[found] * words_count + right[found],
+                     right[found] * words_count + left[found]))
+    keys = np.concatenate(keys + [np.empty(0, dtype=np.int64)])
+    return _sum_duplicates(keys, np.ones(len(keys), dtype=np.int64))
+
+
+def _sum_duplicates(keys: np.ndarray,
+                    counts: np.ndarray
+                    ) -> Tuple[np.ndarray, np.ndarray]:
+    """Sorts the keys of some co-occurrences, summing the counts of the
+    repeated keys.
+
+    Args:
+        keys (numpy.ndarray): keys (row * words_count + column) of the matrix.
+        counts (numpy.ndarray): counts of the keys.
+
+    Returns:
+        Tuple[numpy.ndarray, numpy.ndarray]: the distinct keys, sorted, and
+            their counts.
+
+    """
+    if len(keys) == 0:
+        return keys, counts
+    order = np.argsort(keys, kind="stable")
+    keys = keys[order]
+    starts = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+    return keys[starts], np.add.reduceat(counts[order], starts)
+
+
+def _save_run(cooccurrences: List[Tuple[np.ndarray, np.ndarray]],
+              runs_dir: str
+              ) -> str:
+    """Saves some co-occurrences in a file, sorted by key.
+
+    Args:
+        cooccurrences (List[Tuple[numpy.ndarray, numpy.ndarray]]): keys and
+            counts of the co-occurrences.
+        runs_dir (str): path of the directory of the file.
+
+    Returns:
+        str: the path of the file.
+
+    """
+    (keys, counts) = _sum_duplicates(
+        np.concatenate([keys for keys, _ in cooccurrences] +
+                       [np.empty(0, dtype=np.int64)]),
+        np.concatenate([counts for _, counts in cooccurrences] +
+                       [np.empty(0, dtype=np.int64)]))
+    (handle, run_file) = tempfile.mkstemp(suffix=".npy", dir=runs_dir)
+    with open(handle, "wb") as file:
+        np.save(file, np.stack((keys, counts)))
+    return run_file
+
+
+def _merge_runs(runs: List[str],
+                runs_dir: str,
+                words_count: int,
+                window_size: int,
+                dictionary_fingerprint: Tuple[int, int, int],
+                file: BinaryIO
+                ) -> None:
+    """Merges the co-occurrences saved in some files, writing the
+    co-occurrence matrix file.
+
+    The rows of the matrix are merged by groups, so that at most
+    :data:`COOCCURRENCE_RUN_SIZE` co-occurrences are read at once.
+
+    Args:
+        runs (List[str]): paths of the files storing the co-occurrences.
+        runs_dir (str): path of the directory of the temporary files.
+        words_count (int): number of words in the dictionary.
+        window_size (int): size of the windows of the co-occurring words.
+        dictionary_fingerprint (Tuple[int, int, int]): fingerprint of the
+            dictionary the matrix is generated from.
+        file (BinaryIO): the co-occurrence matrix file.
+
+    Returns:
+        None
+
+    """
+    runs = [np.load(run, mmap_mode="r") for run in runs]
+    # Position of the first co-occurrence of every row in every file
+    row_starts = [np.searchsorted(run[0], np.arange(
+        words_count + 1, dtype=np.int64) * words_count) for run in runs]
+    # Co-occurrences (including the repeated ones) preceding every row
+    merged_starts = sum(row_starts)
+
+    row_sums = np.zeros(words_count, dtype=np.int64)
+    indptr = np.zeros(words_count + 1, dtype=np.int64)
+    first_row = 0
+    with tempfile.TemporaryFile(dir=runs_dir) as indices_file, \
+            tempfile.TemporaryFile(dir=runs_dir) as data_file:
+        while first_row < words_count:
+            last_row = max(first_row + 1, int(np.searchsorted(
+                merged_starts, merged_starts[first_row] +
+                COOCCURRENCE_RUN_SIZE, side="right")) - 1)
+            (keys, counts) = _sum_duplicates(
+                np.concatenate([run[0, starts[first_row]:starts[last_row]]
+                                for run, starts in zip(runs, row_starts)]),
+                np.concatenate([run[1, starts[first_row]:starts[last_row]]
+                                for run, starts in zip(runs, row_starts)]))
+            rows = keys // words_count
+            indptr[first_row + 1:last_row + 1] = np.cumsum(np.bincount(
+                rows - first_row, minlength=last_row - first_row))
+            indptr[first_row + 1:last_row + 1] += indptr[first_row]
+            if len(keys) > 0:
+                row_changes = np.flatnonzero(np.concatenate(
+                    ([True], rows[1:] != rows[:-1])))
+                row_sums[rows[row_changes]] = \
+                    np.add.reduceat(counts, row_changes)
+            indices_file.write((keys % words_count).astype("<i4").tobytes())
+            data_file.write(counts.astype("<i8").tobytes())
+            first_row = last_row
+
+        header = np.array([(COOCCURRENCE_MAGIC, words_count, indptr[-1],
+                            window_size, row_sums.sum()) +
+                           dictionary_fingerprint], dtype=_HEADER)
+        file.write(header.tobytes())
+        file.write(row_sums.astype("<i8").tobytes())
+        file.write(indptr.astype("<i8").tobytes())
+        for temporary_file in (indices_file, data_file):
+            temporary_file.seek(0)
+            shutil.copyfileobj(temporary_file, file)
+
+
+class CooccurrenceMatrix:
+    """A read-only matrix of the co-occurrences of the words of a corpus,
+    backed by a co-occurrence matrix file.
+
+    The file is memory-mapped, so that loading the matrix is immediate and its
+    pages are shared by all the processes using it. The context of some words
+    is described by the positive pointwise mutual information (PPMI) of the
+    words co-occurring with them.
+
+    Attributes:
+        matrix_file (str): path of the co-occurrence matrix file.
+        window_size (int): size of the windows of the co-occurring words.
+        row_sums (numpy.ndarray): co-occurrences of every word, indexed by
+            word ID.
+        total_cooccurrences (int): sum of all the co-occurrences.
+
+    """
+
+    def __init__(self, matrix_file: str):
+        """The constructor creates a CooccurrenceMatrix object.
+
+        Args:
+            matrix_file (str): path of the co-occurrence matrix file.
+
+        """
+        self.matrix_file = matrix_file
+        with open(matrix_file, "rb") as file:
+            self._buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        header = np.frombuffer(self._buffer, dtype=_HEADER, count=1)[0]
+        if header["magic"] != COOCCURRENCE_MAGIC:
+            raise ValueError(
+                f"{matrix_file} is not a valid co-occurrence matrix file")
+        words_count = int(header["words_count"])
+        nonzero_count = int(header["nonzero_count"])
+        position = _HEADER.itemsize
+        self.row_sums = np.frombuffer(self._buffer, dtype="<i8",
+                                      count=words_count, offset=position)
+        position += self.row_sums.nbytes
+        self._indptr = np.frombuffer(self._buffer, dtype="<i8",
+                                     count=words_count + 1, offset=position)
+        position += self._indptr.nbytes
+        self._indices = np.frombuffer(self._buffer, dtype="<i4",
+                                      count=nonzero_count, offset=position)
+        position += self._indices.nbytes
+        self._data = np.frombuffer(self._buffer, dtype="<i8",
+                                   count=nonzero_count, offset=position)
+        self.window_size = int(header["window_size"])
+        self.total_cooccurrences = int(header["total_cooccurrences"])
+        self._dictionary_fingerprint = (int(header["dictionary_size"]),
+                                        int(header["dictionary_mtime"]),
+                                        int(header["dictionary_inode"]))
+
+    def __str__(self) -> str:
+        return self.matrix_file.__str__()
+
+    def __len__(self) -> int:
+        return len(self.row_sums)
+
+    def matches(self, dictionary_file: str) -> bool:
+        """Checks if the matrix has been generated from the current version
+        of a dictionary.
+
+        Args:
+            dictionary_file (str): path of the dictionary.
+
+        Returns:
+            bool: True if the dictionary has not changed since the matrix
+                generation.
+
+        """
+        return corpus_statistics(dictionary_file).fingerprint == \
+            self._dictionary_fingerprint
+
+    def ppmi(self, word_id: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Evaluates the positive pointwise mutual information between a word
+        and the words co-occurring with it.
+
+        Args:
+            word_id (int): dictionary ID of the word.
+
+        Returns:
+            Tuple[numpy.ndarray, numpy.ndarray]: the IDs of the words with a
+                positive PPMI, in increasing order, and their PPMI.
+
+        """
+        (start, end) = self._indptr[word_id:word_id + 2]
+        word_ids = self._indices[start:end]
+        # The products of the counts can exceed the int64 range on large
+        # corpora: they are evaluated as float64
+        pmi = np.log(self._data[start:end].astype(np.float64) *
+                     float(self.total_cooccurrences) /
+                     (float(self.row_sums[word_id]) *
+                      self.row_sums[word_ids].astype(np.float64)))
+        positive = pmi > 0
+        return word_ids[positive].astype(np.int64), pmi[positive]
+
+    def significant_words(self,
+                          word_id: int,
+                          dictionary: CorpusDictionary,
+                          noise_threshold: float
+                          ) -> np.ndarray:
+        """Selects the significant words co-occurring with a word, cleaning
+        them like the results of the windows of the word (see
+        :meth:`okgraph.sliding_windows.SlidingWindows._clean_results`).
+
+        The co-occurrences of the word play the role of the words of its
+        windows: the words whose co-occurrences are higher than the number of
+        co-occurring words, the words shorter than 3 characters, the digits
+        and the words with a noise higher than the threshold are removed.
+
+        Args:
+            word_id (int): dictionary ID of the word.
+            dictionary (CorpusDictionary): the dictionary the matrix has been
+                generated from.
+            noise_threshold (float): maximum 'noise' value to accept a word as
+                significant.
+
+        Returns:
+            numpy.ndarray: the IDs of the significant words, in increasing
+                order.
+
+        """
+        (start, end) = self._indptr[word_id:word_id + 2]
+        word_ids = self._indices[start:end].astype(np.int64)
+        occurrences = self._data[start:end]
+        # The word is not part of its own context
+        other = word_ids != word_id
+        (word_ids, occurrences) = (word_ids[other], occurrences[other])
+
+        words = [dictionary.word(other_id) for other_id in word_ids.tolist()]
+        label_words = np.fromiter(
+            (len(word) >= 3 and not word.isnumeric() for word in words),
+            dtype=bool, count=len(words))
+        noise = SlidingWindows._noise(
+            occurrences / max(occurrences.sum(), 1),
+            dictionary.counts[word_ids], dictionary.total_occurrences)
+        significant = SlidingWindows._clean_results(
+            [dictionary.word(word_id)], words, occurrences, label_words,
+            noise, noise_threshold)
+        return word_ids[significant]
+
+    def contexts(self,
+                 targets: List[Tuple[str, ...]],
+                 dictionary: CorpusDictionary,
+                 noise_threshold: float = None
+                 ) -> csr_matrix:
+        """Describes the context of every target through the PPMI of the words
+        co-occurring with all the target words.
+
+        The PPMI of a word co-occurring with many target words is its lowest
+        PPMI with them. The target words are excluded from their context.
+
+        Args:
+            targets (List[Tuple[str, ...]]): list of tuples of word/words
+                whose context has/have to be described.
+            dictionary (CorpusDictionary): the dictionary the matrix has been
+                generated from.
+            noise_threshold (float): maximum 'noise' value of the words in the
+                context of a target word (see :meth:`significant_words`). If
+                None, all the co-occurring words are accepted.
+
+        Returns:
+            csr_matrix: the context of every target (targets x words).
+
+        """
+        rows = []
+        for target_words in targets:
+            target_ids = [dictionary.word_id(word) for word in target_words]
+            if min(target_ids) < 0:
+                rows.append((np.empty(0, dtype=np.int64), np.empty(0)))
+                continue
+
+            (word_ids, scores) = self._context(target_ids[0], dictionary,
+                                               noise_threshold)
+            for target_id in target_ids[1:]:
+                (other_ids, other_scores) = self._context(
+                    target_id, dictionary, noise_threshold)
+                (word_ids, positions, other_positions) = np.intersect1d(
+                    word_ids, other_ids, assume_unique=True,
+                    return_indices=True)
+                scores = np.minimum(scores[positions],
+                                    other_scores[other_positions])
+            context = ~np.isin(word_ids, target_ids)
+            rows.append((word_ids[context], scores[context]))
+
+        indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum([len(word_ids) for word_ids, _ in rows], out=indptr[1:])
+        indices = np.concatenate(
+            [word_ids for word_ids, _ in rows] + [np.empty(0, np.int64)])
+        data = np.concatenate(
+            [scores for _, scores in rows] + [np.empty(0)])
+        return csr_matrix((data, indices, indptr),
+                          shape=(len(rows), len(self)))
+
+    def _context(self,
+                 word_id: int,
+                 dictionary: CorpusDictionary,
+                 noise_threshold: float
+                 ) -> Tuple[np.ndarray, np.ndarray]:
+        """Describes the context of a word through the PPMI of the significant
+        words co-occurring with it.
+
+        Args:
+            word_id (int): dictionary ID of the word.
+            dictionary (CorpusDictionary): the dictionary the matrix has been
+                generated from.
+            noise_threshold (float): maximum 'noise' value of the words in the
+                context. If None, all the co-occurring words are accepted.
+
+        Returns:
+            Tuple[numpy.ndarray, numpy.ndarray]: the IDs of the words in the
+                context, in increasing order, and their PPMI.
+
+        """
+        (word_ids, scores) = self.ppmi(word_id)
+        if noise_threshold is not None:
+            significant = np.isin(
+                word_ids, self.significant_words(word_id, dictionary,
+                                                 noise_threshold),
+                assume_unique=True)
+            (word_ids, scores) = (word_ids[significant], scores[significant])
+        return word_ids, scores
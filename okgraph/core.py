@@ -1,9 +1,18 @@
 """The core module contains the library main functionalities to performs
 unsupervised natural-language understanding.
 """
+from concurrent.futures import ProcessPoolExecutor
+from okgraph.dictionary import convert_dictionary, CorpusDictionary, \
+    DICTIONARY_EXTENSION, LEGACY_DICTIONARY_EXTENSION
 from okgraph.embeddings import FileConverter, MagnitudeWordEmbeddings
-from okgraph.indexing import DEFAULT_INDEX_FOLDER, Indexing
-from okgraph.utils import check_extension, generate_dictionary, logger
+from okgraph.indexing import DEFAULT_INDEX_FOLDER, Indexing, \
+    INDEX_POSITIONS, searcher_executor, SearcherPool
+from okgraph.label_table import LABEL_TABLE_EXTENSION, LabelTable
+from okgraph.manifest import ARTIFACT_INCOMPLETE, ARTIFACT_MISMATCH, \
+    ARTIFACT_STALE, ARTIFACT_UNKNOWN, ARTIFACT_VALID, Manifest
+from okgraph.results_cache import DEFAULT_RESULTS_CACHE_SIZE, ResultsCache
+from okgraph.utils import check_extension, corpus_basename, \
+    generate_dictionary, logger, update_dictionary
 from os import path, remove
 from shutil import rmtree as remove_dir
 from typing import Dict, List, Tuple
@@ -11,7 +20,7 @@ from typing import Dict, List, Tuple
 ALGORITHMS_PACKAGE = "okgraph.task"
 """str: package containing the task implementations."""
 
-DEFAULT_DICTIONARY_NAME: str = "dictTotal.npy"
+DEFAULT_DICTIONARY_NAME: str = "dictTotal.dict"
 """str: default name for the corpus dictionary file."""
 
 
@@ -39,6 +48,18 @@ class OKgraph:
             model).
         index (str): path of the indexed corpus files.
         dictionary (str): path of the corpus dictionary.
+        searcher_pool (SearcherPool): pool of searchers of the indexed corpus,
+            shared by the tasks.
+        results_cache (ResultsCache): cache of the windowing results, shared
+            by the tasks. None if the results are not cached.
+        label_table (LabelTable): labels precomputed for the most frequent
+            words, used by the set labeling task. None if no label table has
+            been generated.
+        windowing_processes (int): number of processes used by the labeling
+            tasks to window the seed concurrently.
+        windowing_executor (ProcessPoolExecutor): pool of windowing_processes
+            processes, kept alive and shared by the labeling tasks. None if
+            the seed is windowed by a single process.
 
     """
 
@@ -46,6 +67,11 @@ class OKgraph:
     embeddings: MagnitudeWordEmbeddings
     index: str
     dictionary: str
+    searcher_pool: SearcherPool
+    results_cache: ResultsCache
+    label_table: LabelTable
+    windowing_processes: int
+    windowing_executor: ProcessPoolExecutor
 
     def __init__(self,
                  corpus_file: str,
@@ -56,6 +82,16 @@ class OKgraph:
                  index_dir: str = None,
                  dictionary_file: str = None,
                  force_init: bool = False,
+                 incremental: bool = False,
+                 index_store_content: bool = None,
+                 index_stop_words: int = None,
+                 manifest_file: str = None,
+                 num_processes: int = 1,
+                 dictionary_min_count: int = None,
+                 dictionary_memory_limit: int = None,
+                 results_cache_size: int = DEFAULT_RESULTS_CACHE_SIZE,
+                 label_table_file: str = None,
+                 windowing_processes: int = 1,
                  ):
         """The constructor creates a OKgraph object.
 
@@ -64,7 +100,11 @@ class OKgraph:
 
         Args:
             corpus_file (str): path of the corpus file. The corpus file should
-                be a cleaned free text file (untagged).
+                be a cleaned free text file (untagged). The corpus file can be
+                compressed (*.gz*, *.bz2*, *.xz*, *.lzma* or *.zst*): it is
+                decompressed while it is read. The index of a compressed corpus
+                stores the documents content and can't be updated
+                incrementally.
             embeddings_file (MagnitudeWordEmbeddings): path or URL of the
                 embeddings file. FIXME: do not correctly handle URLs.
                 The supported embeddings are *.magnitude*, *.bin*, *.txt*,
@@ -108,15 +148,81 @@ class OKgraph:
                 If the directory exists it is used as it is, otherwise it is
                 created.
             dictionary_file (str): path of the corpus dictionary file.
-                The supported files are *.npy*. No extension will be treated as
-                *.npy*.
+                The supported files are *.dict* (columnar, memory-mapped) and
+                *.npy* (legacy). No extension will be treated as *.dict*.
                 If the dictionary file is not specified, the default path
-                points to a file named *dictTotal.npy* with the same parent
+                points to a file named *dictTotal.dict* with the same parent
                 directory of the corpus.
                 If the file exists it is used as it is, otherwise it is created.
+                A legacy *.npy* file is converted to a *.dict* file with the
+                same basename, that is used in its place.
             force_init (bool): forces the initialization of the embeddings,
                 index and dictionary from scratch, overwriting them if already
                 existing.
+            incremental (bool): if the corpus has been extended since the
+                index and dictionary generation, index and count just the
+                appended text, updating the existing index and dictionary.
+                If the already processed part of the corpus has been modified,
+                the index and dictionary are generated again from scratch.
+                The embeddings are never updated: if generated from a previous
+                version of the corpus, they are generated again only when
+                incremental is False.
+            index_store_content (bool): if False, a new index stores just the
+                position of its documents in the corpus file instead of their
+                content. The index is smaller, but the corpus file is read to
+                retrieve the documents content and must not be moved or
+                modified (appending text is allowed). If True or False, an
+                existing index generated with a different value is generated
+                again. If None, a new index stores the documents content.
+            index_stop_words (int): number of the most frequent words of the
+                corpus dictionary not indexed by a new index, besides the
+                common English words. Their postings are the largest of the
+                index, while they are discarded from the labels as noise: the
+                index is smaller and faster to search, and the windows are
+                unchanged. The words not indexed can't be searched. If not
+                None, an existing index generated with a different value is
+                generated again. If None, a new index skips just the common
+                English words.
+            manifest_file (str): path of the manifest file, recording the
+                fingerprint of the corpus and the parameters used to generate
+                the resources. If the manifest file is not specified, the
+                default path points to a *.manifest.json* file with the same
+                basename of the corpus file.
+                The existing resources whose generation has not been completed,
+                or that have been generated from a different corpus or with
+                different parameters, are generated again.
+            num_processes (int): number of processes used to generate the
+                index and dictionary.
+            dictionary_min_count (int): minimum occurrences of the words in a
+                new dictionary. The less frequent words are pruned, but still
+                considered in the dictionary total occurrences. If not None,
+                an existing dictionary generated with a different value is
+                generated again. If None, a new dictionary contains all the
+                words.
+            dictionary_memory_limit (int): memory (MB) of the partial counts
+                of the words of the corpus. The counts exceeding it are saved
+                in temporary files. The generated dictionary, pruned through
+                dictionary_min_count, is still kept in memory. If None, the
+                partial counts are not limited.
+            results_cache_size (int): maximum size (MB) of the cache of the
+                windowing results, saved in a *.results.sqlite* file with the
+                same name of the index directory. The results are reused by
+                the labeling tasks until the index or dictionary changes.
+                If None, the results are not cached.
+            label_table_file (str): path of the label table file, storing the
+                labels precomputed for the most frequent words (see
+                :func:`okgraph.sliding_windows.generate_label_table`). If the
+                label table file is not specified, the default path points to
+                a *.labels* file with the same basename of the corpus file.
+                If the file exists it is used by the set labeling task, as
+                long as it has been generated from the current index and
+                dictionary, with the default windowing parameters of the
+                task. The table stores just the best labels of every
+                word: the labels of the words in the table can differ from
+                the labels obtained windowing them (see
+                :class:`okgraph.label_table.LabelTable`).
+            windowing_processes (int): number of processes used by the
+                labeling tasks to window the seed words/tuples concurrently.
 
         Example:
             - Instantiating an OKgraph object specifing a corpus file:
@@ -130,7 +236,7 @@ class OKgraph:
               No path have been specified for the embeddings, index directory
               and dictionary, so the default paths (same of the corpus)
               '/OKgraph/Example/enwik9.magnitude',
-              '/OKgraph/Example/indexdir/', '/OKgraph/Example/dictTotal.npy'
+              '/OKgraph/Example/indexdir/', '/OKgraph/Example/dictTotal.dict'
               are implicitly used.
               All the resources will be searched in the default paths: if
               found they will be used, otherwise the missing one will be
@@ -150,7 +256,7 @@ class OKgraph:
               This code will create an OKgraph object using the *enwiki9.txt*
               corpus.
               No extension has been specified for the embeddings and the
-              dictionary, so the *.magnitude* and *.npy* exntensions will be
+              dictionary, so the *.magnitude* and *.dict* exntensions will be
               automatically appended.
               All the resources will be searched in the specified paths: if
               found they will be used, otherwise the missing one will be
@@ -169,24 +275,79 @@ class OKgraph:
             index_dir = path.normpath(index_dir)
         if dictionary_file is not None:
             dictionary_file = path.normpath(dictionary_file)
+        if label_table_file is not None:
+            label_table_file = path.normpath(label_table_file)
+
+        if manifest_file is not None:
+            manifest_file = path.normpath(manifest_file)
+        manifest = Manifest(corpus_file, manifest_file)
 
         embeddings_file = self._get_embeddings(
-            corpus_file, embeddings_file, force_init)
-        index_dir = self._get_index(
-            corpus_file, index_dir, force_init)
+            corpus_file, embeddings_file, force_init, manifest, incremental)
+        # The dictionary provides the most frequent words, not indexed
         dictionary_file = self._get_dictionary(
-            corpus_file, dictionary_file, force_init)
+            corpus_file, dictionary_file, force_init, incremental, manifest,
+            num_processes, dictionary_min_count, dictionary_memory_limit)
+        index_dir = self._get_index(
+            corpus_file, index_dir, force_init, incremental,
+            index_store_content, manifest, num_processes, dictionary_file,
+            index_stop_words)
 
         self.embeddings = MagnitudeWordEmbeddings(
             embeddings_file, k, stream, lazy_loading)
         self.corpus = corpus_file
         self.index = index_dir
         self.dictionary = dictionary_file
+        self.searcher_pool = SearcherPool(index_dir)
+        self.results_cache = None
+        if results_cache_size is not None:
+            self.results_cache = ResultsCache(index_dir,
+                                              max_size=results_cache_size)
+        if label_table_file is None:
+            label_table_file = \
+                corpus_basename(corpus_file) + LABEL_TABLE_EXTENSION
+        self.label_table = None
+        if path.exists(label_table_file):
+            # The table is checked just once, while it is loaded
+            label_table = LabelTable(label_table_file)
+            # The default options window the seed with the default
+            # SlidingWindows parameters
+            if label_table.matches(index_dir, dictionary_file):
+                logger.info(f"Label table {label_table_file} found: using it")
+                self.label_table = label_table
+            else:
+                logger.info(f"Label table {label_table_file} not generated"
+                            f" from the current index and dictionary, with"
+                            f" the default windowing parameters: ignoring"
+                            f" it")
+        self.windowing_processes = windowing_processes
+        # The processes open the index once, and are reused by every task
+        self.windowing_executor = None
+        if windowing_processes > 1:
+            self.windowing_executor = searcher_executor(index_dir,
+                                                        windowing_processes)
+
+    def close(self) -> None:
+        """Shuts down the windowing processes, and closes the searchers of the
+        indexed corpus and the results cache.
+
+        Returns:
+            None
+
+        """
+        if self.windowing_executor is not None:
+            self.windowing_executor.shutdown()
+            self.windowing_executor = None
+        self.searcher_pool.close()
+        if self.results_cache is not None:
+            self.results_cache.close()
 
     @staticmethod
     def _get_embeddings(corpus_file: str,
                         embeddings_file: str,
-                        force_init: bool) -> str:
+                        force_init: bool,
+                        manifest: Manifest = None,
+                        incremental: bool = False) -> str:
         """Loads or generates the embeddings whether or not it is already
         existing.
 
@@ -196,6 +357,11 @@ class OKgraph:
             corpus_file (str): path of the corpus file.
             embeddings_file (str): path of the embeddings file.
             force_init (bool): if True forces the creation of the embeddings.
+            manifest (Manifest): manifest of the corpus resources, used to
+                check if the embeddings generated from the corpus are still
+                valid.
+            incremental (bool): if True keeps the embeddings generated from
+                a previous version of the corpus.
 
         Returns:
             str: the path of the loaded/generated Magnitude model.
@@ -203,8 +369,7 @@ class OKgraph:
         """
         # If no name has been given, assign a default name
         if embeddings_file is None:
-            (corpus_basename, _) = path.splitext(corpus_file)
-            embeddings_file = corpus_basename + ".magnitude"
+            embeddings_file = corpus_basename(corpus_file) + ".magnitude"
             logger.info(
                 f"Embeddings file for corpus {corpus_file} not specified."
                 f" Referencing to default value {embeddings_file}")
@@ -232,6 +397,16 @@ class OKgraph:
 
         # If the embeddings name is of a Magnitude model
         if embeddings_extension == ".magnitude":
+            # If the model has not been correctly generated from the actual
+            # corpus, remove it
+            if path.exists(embeddings_file) and manifest is not None and \
+                    not OKgraph._is_reusable(manifest, "embeddings",
+                                             embeddings_file,
+                                             allow_stale=incremental):
+                logger.info(
+                    f"Removing embeddings file {embeddings_file}"
+                    f" to generate it again")
+                remove(embeddings_file)
             # If the model already exists, use it
             if path.exists(embeddings_file):
                 logger.info(
@@ -243,8 +418,12 @@ class OKgraph:
                     logger.info(
                         f"Specified embeddings file {embeddings_file} for corpus"
                         f" {corpus_file} doesn't exist: generating a new one")
+                if manifest is not None:
+                    manifest.begin("embeddings", embeddings_file, {})
                 embeddings_file = FileConverter.corpus_to_magnitude_model(
                     corpus_file, embeddings_file)
+                if manifest is not None:
+                    manifest.end("embeddings")
         # If the embeddings name is of another possible kind of embeddings
         elif embeddings_extension in [".txt", ".bin", ".vec", ".hdf5"]:
             # If the Magnitude file exists use it
@@ -275,13 +454,31 @@ class OKgraph:
     @staticmethod
     def _get_index(corpus_file: str,
                    index_dir: str,
-                   force_init: bool) -> str:
+                   force_init: bool,
+                   incremental: bool = False,
+                   store_content: bool = None,
+                   manifest: Manifest = None,
+                   num_processes: int = 1,
+                   dictionary_file: str = None,
+                   stop_words: int = None) -> str:
         """Loads or generates the index whether or not it is already existing.
 
         Args:
             corpus_file: path of the corpus file.
             index_dir: path of the index directory.
             force_init: if True forces the creation of the index.
+            incremental: if True updates the existing index with the text
+                appended to the corpus.
+            store_content: if False the generated index does not store the
+                content of the documents. If None, the content is stored.
+            manifest: manifest of the corpus resources, used to check if the
+                index is still valid.
+            num_processes: number of processes used by the index writer.
+            dictionary_file: path of the corpus dictionary file, providing the
+                most frequent words.
+            stop_words: number of the most frequent words of the dictionary
+                not indexed by the generated index. If None, no word of the
+                dictionary is skipped.
 
         Returns:
             str: the path of the loaded/generated index directory.
@@ -295,12 +492,44 @@ class OKgraph:
                 f"Indexing directoy for corpus {corpus_file} not specified."
                 f" Referencing to default value {index_dir}")
 
+        # The position semantics are required as well, so that the indexes
+        # generated with other semantics are generated again
+        params = {"store_content": store_content, "stop_words": stop_words,
+                  "positions": INDEX_POSITIONS}
+
         # If the index exists but force_init is True, remove it
         if path.exists(index_dir) and force_init is True:
             logger.info(
                 f"Removing existing indexing directory {index_dir}"
                 f" to generate it again")
             remove_dir(index_dir)
+        # If the index has not been correctly generated from the actual corpus,
+        # remove it (a previous corpus can be updated)
+        if path.exists(index_dir) and manifest is not None and \
+                not OKgraph._is_reusable(manifest, "index", index_dir, params,
+                                         allow_stale=incremental):
+            logger.info(
+                f"Removing indexing directory {index_dir}"
+                f" to generate it again")
+            remove_dir(index_dir)
+        # If the index exists and incremental is True, try to update it,
+        # otherwise remove it
+        if path.exists(index_dir) and incremental is True and \
+                (manifest is None or manifest.status(
+                    "index", index_dir, params) != ARTIFACT_VALID):
+            logger.info(
+                f"Updating existing indexing directory {index_dir}")
+            if manifest is not None:
+                manifest.begin("index", index_dir)
+            if Indexing(corpus_path=corpus_file).update(
+                    index_path=index_dir, num_processes=num_processes):
+                if manifest is not None:
+                    manifest.end("index")
+            else:
+                logger.info(
+                    f"Indexing directory {index_dir} can't be updated:"
+                    f" removing it to generate it again")
+                remove_dir(index_dir)
         # If the index already exists, use it
         if path.exists(index_dir):
             logger.info(
@@ -312,9 +541,28 @@ class OKgraph:
                 logger.info(
                     f"Specified indexing directory {index_dir} for corpus"
                     f" {corpus_file} doesn't exist: generating a new one")
-            ix = Indexing(corpus_path=corpus_file)
-            ix.indexing(index_path=index_dir)
+            if store_content is None:
+                store_content = True
+            if stop_words is None:
+                stop_words = 0
+            if stop_words < 0:
+                raise ValueError(f"index_stop_words can't be negative")
+            if manifest is not None:
+                manifest.begin("index", index_dir,
+                               {"store_content": store_content,
+                                "stop_words": stop_words,
+                                "positions": INDEX_POSITIONS})
+            frequent_words = None
+            if stop_words > 0:
+                frequent_words = CorpusDictionary(
+                    dictionary_file).most_frequent_words(stop_words)
+            ix = Indexing(corpus_path=corpus_file,
+                          store_content=store_content,
+                          stop_words=frequent_words)
+            ix.indexing(index_path=index_dir, num_processes=num_processes)
             del ix
+            if manifest is not None:
+                manifest.end("index")
 
         # Return the path of the index directory
         return index_dir
@@ -322,7 +570,12 @@ class OKgraph:
     @staticmethod
     def _get_dictionary(corpus_file: str,
                         dictionary_file: str,
-                        force_init: bool) -> str:
+                        force_init: bool,
+                        incremental: bool = False,
+                        manifest: Manifest = None,
+                        num_processes: int = 1,
+                        min_count: int = None,
+                        memory_limit: int = None) -> str:
         """Loads or generates the dictionary whether or not it is already
         existing.
 
@@ -330,6 +583,17 @@ class OKgraph:
             corpus_file: path of the corpus file.
             dictionary_file: path of the dictionary file.
             force_init: if True forces the creation of the index.
+            incremental: if True updates the existing dictionary with the text
+                appended to the corpus.
+            manifest: manifest of the corpus resources, used to check if the
+                dictionary is still valid.
+            num_processes: number of processes counting the words of the
+                corpus.
+            min_count: minimum occurrences of the words in the generated
+                dictionary. If None, all the words are kept.
+            memory_limit: memory (MB) of the partial counts of the words of
+                the corpus. The generated dictionary is still kept in memory.
+                If None, the partial counts are not limited.
 
         Returns:
             str: the path of the loaded/generated dictionary file.
@@ -346,9 +610,27 @@ class OKgraph:
         else:
             dictionary_file = check_extension(
                 file_name=dictionary_file,
-                default_extension=".npy",
-                allowed_extensions=[".npy"]
+                default_extension=DICTIONARY_EXTENSION,
+                allowed_extensions=[DICTIONARY_EXTENSION,
+                                    LEGACY_DICTIONARY_EXTENSION]
             )
+            # A legacy dictionary is referenced by its columnar version
+            dictionary_file = path.splitext(dictionary_file)[0] + \
+                DICTIONARY_EXTENSION
+
+        # If only the legacy version of the dictionary exists, convert it
+        legacy_file = path.splitext(dictionary_file)[0] + \
+            LEGACY_DICTIONARY_EXTENSION
+        if not path.exists(dictionary_file) and path.exists(legacy_file) and \
+                force_init is False:
+            logger.info(
+                f"Converting legacy dictionary file {legacy_file}"
+                f" to {dictionary_file}")
+            convert_dictionary(legacy_file, dictionary_file)
+            if manifest is not None:
+                manifest.move("dictionary", legacy_file, dictionary_file)
+
+        params = {"min_count": min_count}
 
         # If the dictionary exists but force_init is True, remove it
         if path.exists(dictionary_file) and force_init is True:
@@ -356,6 +638,33 @@ class OKgraph:
                 f"Removing existing dictionary file {dictionary_file}"
                 f" to generate it again")
             remove(dictionary_file)
+        # If the dictionary has not been correctly generated from the actual
+        # corpus, remove it (a previous corpus can be updated)
+        if path.exists(dictionary_file) and manifest is not None and \
+                not OKgraph._is_reusable(manifest, "dictionary",
+                                         dictionary_file, params,
+                                         allow_stale=incremental):
+            logger.info(
+                f"Removing dictionary file {dictionary_file}"
+                f" to generate it again")
+            remove(dictionary_file)
+        # If the dictionary exists and incremental is True, try to update it,
+        # otherwise remove it
+        if path.exists(dictionary_file) and incremental is True and \
+                (manifest is None or manifest.status(
+                    "dictionary", dictionary_file, params) != ARTIFACT_VALID):
+            logger.info(
+                f"Updating existing dictionary file {dictionary_file}")
+            if manifest is not None:
+                manifest.begin("dictionary", dictionary_file)
+            if update_dictionary(corpus_file, dictionary_file):
+                if manifest is not None:
+                    manifest.end("dictionary")
+            else:
+                logger.info(
+                    f"Dictionary file {dictionary_file} can't be updated:"
+                    f" removing it to generate it again")
+                remove(dictionary_file)
         # If the dictionary already exists, use it
         if path.exists(dictionary_file):
             logger.info(
@@ -367,12 +676,70 @@ class OKgraph:
                 logger.info(
                     f"Specified dictionary file {dictionary_file} for corpus"
                     f" {corpus_file} doesn't exist: generating a new one")
+            if min_count is None:
+                min_count = 1
+            if manifest is not None:
+                manifest.begin("dictionary", dictionary_file,
+                               {"min_count": min_count})
             generate_dictionary(corpus_file, dictionary=dictionary_file,
-                                save_dictionary=True)
+                                save_dictionary=True,
+                                num_processes=num_processes,
+                                memory_limit=memory_limit,
+                                min_count=min_count)
+            if manifest is not None:
+                manifest.end("dictionary")
 
         # Return the path of the dictionary file
         return dictionary_file
 
+    @staticmethod
+    def _is_reusable(manifest: Manifest,
+                     artifact: str,
+                     artifact_path: str,
+                     params: Dict = None,
+                     allow_stale: bool = False) -> bool:
+        """Checks through the manifest if an existing resource can be used.
+
+        A resource not recorded in the manifest has been generated before the
+        manifest introduction: it is recorded as it is, unless stale resources
+        are allowed (they are going to be updated and recorded).
+
+        Args:
+            manifest: manifest of the corpus resources.
+            artifact: name of the resource.
+            artifact_path: path of the resource.
+            params: parameters required for the resource.
+            allow_stale: if True a resource generated from a previous
+                version of the corpus can be used (it is going to be updated).
+                A resource generated with different parameters is never used.
+
+        Returns:
+            bool: True if the resource can be used, False if it has to be
+                generated again.
+
+        """
+        status = manifest.status(artifact, artifact_path, params)
+        if status == ARTIFACT_INCOMPLETE:
+            logger.info(
+                f"The generation of {artifact_path} has not been completed")
+            return False
+        if status == ARTIFACT_MISMATCH:
+            logger.info(
+                f"{artifact_path} has been generated with different"
+                f" parameters")
+            return False
+        if status == ARTIFACT_STALE and allow_stale is False:
+            logger.info(
+                f"{artifact_path} has been generated from a different corpus")
+            return False
+        if status == ARTIFACT_UNKNOWN and allow_stale is False:
+            logger.info(
+                f"{artifact_path} not found in manifest {manifest}:"
+                f" recording it")
+            manifest.begin(artifact, artifact_path, params or {})
+            manifest.end(artifact)
+        return True
+
     def relation_expansion(self,
                            seed: List[Tuple[str, ...]],
                            k: int = 15,
@@ -400,8 +767,11 @@ class OKgraph:
             algo = "intersection"
             options = {
                 "relation_labeling_algo": "intersection",
-                "relation_labeling_options": {"dictionary": self.dictionary,
-                                              "index": self.index},
+                "relation_labeling_options": {
+                    "dictionary": self.dictionary,
+                    "index": self.index,
+                    "searcher_pool": self.searcher_pool,
+                    "results_cache": self.results_cache},
                 "relation_labeling_k": 15,
                 "set_expansion_algo": "centroid",
                 "set_expansion_options": {"embeddings": self.embeddings},
@@ -441,7 +811,10 @@ class OKgraph:
             algo = "intersection"
             options = {
                 "dictionary": self.dictionary,
-                "index": self.index
+                "index": self.index,
+                "searcher_pool": self.searcher_pool,
+                "results_cache": self.results_cache,
+                "executor": self.windowing_executor
             }
 
         # Import the algorithm
@@ -512,7 +885,11 @@ class OKgraph:
             algo = "intersection"
             options = {
                 "dictionary": self.dictionary,
-                "index": self.index
+                "index": self.index,
+                "searcher_pool": self.searcher_pool,
+                "results_cache": self.results_cache,
+                "label_table": self.label_table,
+                "executor": self.windowing_executor
             }
 
         # Import the algorithm
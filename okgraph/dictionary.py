@@ -0,0 +1,480 @@
+"""The 'dictionary' module contains the utilities used to store the corpus
+dictionary in a columnar format, that can be memory-mapped and shared between
+processes.
+"""
+from collections.abc import Mapping
+from contextlib import contextmanager
+import mmap
+import numpy as np
+import os
+from os import path
+import tempfile
+import threading
+from typing import BinaryIO, Dict, Iterator, List, Tuple
+import zlib
+
+DICTIONARY_EXTENSION: str = ".dict"
+"""str: extension of the columnar dictionary files."""
+LEGACY_DICTIONARY_EXTENSION: str = ".npy"
+"""str: extension of the legacy dictionary files, storing a pickled dict."""
+DICTIONARY_MAGIC: bytes = b"OKGDICT2"
+"""bytes: signature at the beginning of a columnar dictionary file."""
+_HEADER = np.dtype([("magic", "S8"), ("words_count", "<i8"),
+                    ("table_size", "<i8"), ("blob_size", "<i8"),
+                    ("total_occurrences", "<i8"), ("min_count", "<i8")])
+
+
+def is_legacy_dictionary(dictionary_file: str) -> bool:
+    """Checks if a dictionary file has the legacy format.
+
+    Args:
+        dictionary_file (str): path of the dictionary file.
+
+    Returns:
+        bool: True if the file stores the dictionary as a pickled dict, False
+            otherwise.
+
+    """
+    return path.splitext(dictionary_file)[1] == LEGACY_DICTIONARY_EXTENSION
+
+
+def _word_hash(word: bytes) -> int:
+    """Evaluates the hash of an encoded word.
+
+    Unlike the built-in hash, the value does not change between processes.
+
+    Args:
+        word (bytes): the UTF-8 encoded word.
+
+    Returns:
+        int: the hash of the word.
+
+    """
+    return zlib.crc32(word)
+
+
+def _dictionary_bytes(occurrences: Dict[str, int],
+                      total_occurrences: int = None,
+                      min_count: int = 1) -> bytes:
+    """Serializes a dictionary in the columnar format.
+
+    The file is composed by a header followed by:
+        - the occurrences of the words (int64);
+        - the offsets of the words inside the vocabulary blob (int64);
+        - an open addressing hash table (linear probing) mapping the hash of
+          a word to its ID (int32, -1 for the empty slots);
+        - the vocabulary blob, the UTF-8 encoded words separated by new lines.
+    The ID of a word is its position in the dictionary, so the order of the
+    dictionary is preserved.
+
+    Args:
+        occurrences (Dict[str, int]): dictionary {word: occurrences}.
+        total_occurrences (int): total occurrences of the words of the corpus,
+            including the ones not in the dictionary. If None, the sum of the
+            occurrences in the dictionary.
+        min_count (int): minimum occurrences of the words in the dictionary.
+
+    Returns:
+        bytes: the serialized dictionary.
+
+    """
+    words = [word.encode("utf-8") for word in occurrences]
+    words_count = len(words)
+    counts = np.fromiter(occurrences.values(), dtype="<i8", count=words_count)
+    offsets = np.zeros(words_count + 1, dtype="<i8")
+    np.cumsum(np.fromiter(map(len, words), dtype="<i8", count=words_count) + 1,
+              out=offsets[1:])
+    blob = b"\n".join(words)
+
+    # Keep the table at most half full
+    table_size = 1 << max(1, (2 * words_count - 1).bit_length())
+    mask = table_size - 1
+    table = np.full(table_size, -1, dtype="<i4")
+    slots = np.fromiter(map(_word_hash, words), dtype=np.int64,
+                        count=words_count) & mask
+    # Insert all the words at the same time: a word colliding with an
+    # occupied slot, or with a word with lower ID, probes the next slot
+    pending = np.arange(words_count)
+    while pending.size > 0:
+        free = table[slots[pending]] == -1
+        candidates = pending[free]
+        _, first = np.unique(slots[candidates], return_index=True)
+        table[slots[candidates[first]]] = candidates[first]
+        pending = pending[table[slots[pending]] != pending]
+        slots[pending] = (slots[pending] + 1) & mask
+
+    if total_occurrences is None:
+        total_occurrences = int(counts.sum())
+    header = np.array([(DICTIONARY_MAGIC, words_count, table_size, len(blob),
+                        total_occurrences, min_count)], dtype=_HEADER)
+    return b"".join([header.tobytes(), counts.tobytes(), offsets.tobytes(),
+                     table.tobytes(), blob])
+
+
+def write_dictionary(dictionary_file: str,
+                     occurrences: Dict[str, int],
+                     total_occurrences: int = None,
+                     min_count: int = 1) -> None:
+    """Saves a dictionary in a file.
+
+    The legacy format (pickled dict) is used if the file has the *.npy*
+    extension, the columnar format otherwise.
+
+    Args:
+        dictionary_file (str): path of the dictionary file.
+        occurrences (Dict[str, int]): dictionary {word: occurrences}.
+        total_occurrences (int): total occurrences of the words of the corpus,
+            including the ones not in the dictionary. If None, the sum of the
+            occurrences in the dictionary. Not saved in the legacy format.
+        min_count (int): minimum occurrences of the words in the dictionary.
+            Not saved in the legacy format.
+
+    Returns:
+        None
+
+    """
+    if is_legacy_dictionary(dictionary_file):
+        np.save(dictionary_file, occurrences)
+    else:
+        _replace_file(dictionary_file, _dictionary_bytes(
+            occurrences, total_occurrences, min_count))
+
+
+def convert_dictionary(legacy_file: str, dictionary_file: str) -> None:
+    """Converts a legacy dictionary file to the columnar format.
+
+    Args:
+        legacy_file (str): path of the legacy (*.npy*) dictionary file.
+        dictionary_file (str): path of the columnar dictionary file.
+
+    Returns:
+        None
+
+    """
+    occurrences = np.load(legacy_file, allow_pickle=True).item()
+    _replace_file(dictionary_file, _dictionary_bytes(occurrences))
+
+
+@contextmanager
+def replacing_file(file_path: str) -> Iterator[BinaryIO]:
+    """Opens a new temporary file that replaces a file once it is written.
+
+    The file is never truncated, so that it can be safely replaced while it is
+    memory-mapped. Every writer has its own temporary file, in the directory
+    of the file: many processes can generate the same file at once, and the
+    last one replaces it. The temporary file is removed in case of errors.
+
+    Args:
+        file_path (str): path of the file.
+
+    Returns:
+        Iterator[BinaryIO]: the temporary file open for binary writing, to be
+            used in a with statement.
+
+    """
+    file = tempfile.NamedTemporaryFile(
+        dir=path.dirname(path.abspath(file_path)),
+        prefix=path.basename(file_path) + ".", suffix=".tmp", delete=False)
+    try:
+        with file:
+            yield file
+        # Keep the permissions of the replaced file (the temporary file is
+        # readable just by its owner)
+        mode = os.stat(file_path).st_mode if path.exists(file_path) \
+            else 0o644
+        os.chmod(file.name, mode)
+        os.replace(file.name, file_path)
+    except BaseException:
+        if path.exists(file.name):
+            os.remove(file.name)
+        raise
+
+
+def _replace_file(file_path: str, content: bytes) -> None:
+    """Writes a file in a temporary file that replaces it at the end (see
+    :func:`replacing_file`).
+
+    Args:
+        file_path (str): path of the file.
+        content (bytes): content of the file.
+
+    Returns:
+        None
+
+    """
+    with replacing_file(file_path) as file:
+        file.write(content)
+
+
+class CorpusDictionary(Mapping):
+    """A read-only dictionary {word: occurrences} backed by a columnar
+    dictionary file.
+
+    The file is memory-mapped, so that loading the dictionary is immediate and
+    its pages are shared by all the processes using it. A legacy (*.npy*)
+    dictionary file is converted in memory.
+
+    Attributes:
+        dictionary_file (str): path of the dictionary file.
+        counts (numpy.ndarray): occurrences of the words, indexed by word ID.
+        total_occurrences (int): total occurrences of the words of the
+            corpus. It is greater than the sum of the occurrences of the words
+            in the dictionary, if the less frequent words have been pruned.
+        min_count (int): minimum occurrences of the words in the dictionary.
+            The words of the corpus less frequent than min_count have been
+            pruned.
+
+    """
+
+    def __init__(self, dictionary_file: str):
+        """The constructor creates a CorpusDictionary object.
+
+        Args:
+            dictionary_file (str): path of the dictionary file.
+
+        """
+        self.dictionary_file = dictionary_file
+        if is_legacy_dictionary(dictionary_file):
+            self._buffer = _dictionary_bytes(
+                np.load(dictionary_file, allow_pickle=True).item())
+        else:
+            with open(dictionary_file, "rb") as file:
+                self._buffer = mmap.mmap(file.fileno(), 0,
+                                         access=mmap.ACCESS_READ)
+
+        header = np.frombuffer(self._buffer, dtype=_HEADER, count=1)[0]
+        if header["magic"] != DICTIONARY_MAGIC:
+            raise ValueError(
+                f"{dictionary_file} is not a valid dictionary file")
+        words_count = int(header["words_count"])
+        table_size = int(header["table_size"])
+        position = _HEADER.itemsize
+        self.counts = np.frombuffer(self._buffer, dtype="<i8",
+                                    count=words_count, offset=position)
+        position += self.counts.nbytes
+        self._offsets = np.frombuffer(self._buffer, dtype="<i8",
+                                      count=words_count + 1, offset=position)
+        position += self._offsets.nbytes
+        self._table = np.frombuffer(self._buffer, dtype="<i4",
+                                    count=table_size, offset=position)
+        position += self._table.nbytes
+        self._blob_offset = position
+        self._mask = table_size - 1
+        # Memory views are faster than arrays to access single elements
+        self._offsets_view = memoryview(self._offsets).cast("B").cast("q")
+        self._table_view = memoryview(self._table).cast("B").cast("i")
+        self._words = None
+        self.total_occurrences = int(header["total_occurrences"])
+        self.min_count = int(header["min_count"])
+
+    def __reduce__(self):
+        # Map the file again in other processes, instead of copying it
+        return CorpusDictionary, (self.dictionary_file,)
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.words())
+
+    def __contains__(self, word) -> bool:
+        return isinstance(word, str) and self.word_id(word) >= 0
+
+    def __getitem__(self, word: str) -> int:
+        word_id = self.word_id(word) if isinstance(word, str) else -1
+        if word_id < 0:
+            raise KeyError(word)
+        return self.counts[word_id].item()
+
+    def get(self, word: str, default=None):
+        word_id = self.word_id(word) if isinstance(word, str) else -1
+        return default if word_id < 0 else self.counts[word_id].item()
+
+    def word_id(self, word: str) -> int:
+        """Gets the ID of a word, or rather its position in the dictionary.
+
+        Args:
+            word (str): the word.
+
+        Returns:
+            int: the ID of the word, -1 if the word is not in the dictionary.
+
+        """
+        key = word.encode("utf-8")
+        slot = _word_hash(key) & self._mask
+        while True:
+            word_id = self._table_view[slot]
+            if word_id < 0 or self._word_bytes(word_id) == key:
+                return word_id
+            slot = (slot + 1) & self._mask
+
+    def word(self, word_id: int) -> str:
+        """Gets the word with the specified ID.
+
+        Args:
+            word_id (int): the ID of the word.
+
+        Returns:
+            str: the word.
+
+        """
+        return self._word_bytes(word_id).decode("utf-8")
+
+    def words(self) -> List[str]:
+        """Gets all the words, ordered by ID.
+
+        Returns:
+            List[str]: the words of the dictionary.
+
+        """
+        if self._words is None:
+            if len(self) == 0:
+                self._words = []
+            else:
+                blob_end = self._blob_offset + int(self._offsets[-1]) - 1
+                self._words = self._buffer[self._blob_offset:blob_end]\
+                    .decode("utf-8").split("\n")
+        return self._words
+
+    def most_frequent_words(self, count: int) -> List[str]:
+        """Gets the most frequent words.
+
+        Args:
+            count (int): number of words.
+
+        Returns:
+            List[str]: the most frequent words, sorted by decreasing
+                occurrences (the words with equal occurrences are sorted by
+                ID).
+
+        """
+        word_ids = np.argsort(-self.counts, kind="stable")[:count]
+        return [self.word(word_id) for word_id in word_ids.tolist()]
+
+    def to_dict(self) -> Dict[str, int]:
+        """Copies the dictionary in a dict.
+
+        Returns:
+            Dict[str, int]: dictionary {word: occurrences}.
+
+        """
+        return dict(zip(self.words(), self.counts.tolist()))
+
+    def _word_bytes(self, word_id: int) -> bytes:
+        """Gets the encoded word with the specified ID.
+
+        Args:
+            word_id (int): the ID of the word.
+
+        Returns:
+            bytes: the UTF-8 encoded word.
+
+        """
+        start = self._blob_offset + self._offsets_view[word_id]
+        end = self._blob_offset + self._offsets_view[word_id + 1] - 1
+        return self._buffer[start:end]
+
+
+class CorpusStatistics:
+    """A class holding the statistics of the words of a corpus dictionary.
+
+    The statistics are evaluated once for all the words, so that they can be
+    shared by all the objects using the same dictionary (see
+    :func:`corpus_statistics`).
+
+    Attributes:
+        dictionary (CorpusDictionary): the corpus dictionary.
+        fingerprint (Tuple[int, int, int]): size, modification time and inode
+            of the dictionary file.
+        counts (numpy.ndarray): occurrences of the words, indexed by word ID.
+        total_occurrences (int): total occurrences of the words of the
+            corpus.
+        min_count (int): minimum occurrences of the words in the dictionary.
+        idf (numpy.ndarray): logarithm of the inverse frequency of the words,
+            indexed by word ID.
+
+    """
+
+    def __init__(self, dictionary_file: str):
+        """The constructor creates a CorpusStatistics object.
+
+        Args:
+            dictionary_file (str): path of the dictionary file.
+
+        """
+        self.fingerprint = _file_fingerprint(dictionary_file)
+        self.dictionary = CorpusDictionary(dictionary_file)
+        self.counts = self.dictionary.counts
+        self.total_occurrences = self.dictionary.total_occurrences
+        self.min_count = self.dictionary.min_count
+        self.idf = np.log10(self.total_occurrences / self.counts)
+
+    def word_statistics(self, words: List[str]
+                        ) -> Tuple[np.ndarray, np.ndarray]:
+        """Gets the statistics of some words.
+
+        The words pruned from the dictionary are estimated with the highest
+        occurrences they can have (min_count - 1).
+
+        Args:
+            words (List[str]): the words.
+
+        Returns:
+            Tuple[numpy.ndarray, numpy.ndarray]: the occurrences of the words
+                and the logarithm of their inverse frequency. The occurrences
+                of the words missing from the corpus are 0.
+
+        """
+        word_ids = np.fromiter(map(self.dictionary.word_id, words),
+                               dtype=np.int64, count=len(words))
+        found = word_ids >= 0
+        pruned_occurrences = self.min_count - 1
+        occurrences = np.full(len(words), pruned_occurrences, dtype=np.int64)
+        occurrences[found] = self.counts[word_ids[found]]
+        idf = np.full(len(words), np.nan)
+        idf[found] = self.idf[word_ids[found]]
+        if pruned_occurrences > 0:
+            idf[~found] = np.log10(self.total_occurrences / pruned_occurrences)
+        return occurrences, idf
+
+
+def _file_fingerprint(file_path: str) -> Tuple[int, int, int]:
+    """Gets the fingerprint of a file, changing every time the file is
+    written.
+
+    Args:
+        file_path (str): path of the file.
+
+    Returns:
+        Tuple[int, int, int]: size, modification time and inode of the file.
+
+    """
+    stat = os.stat(file_path)
+    return stat.st_size, stat.st_mtime_ns, stat.st_ino
+
+
+_corpus_statistics_cache: Dict[str, CorpusStatistics] = {}
+_corpus_statistics_lock = threading.Lock()
+
+
+def corpus_statistics(dictionary_file: str) -> CorpusStatistics:
+    """Gets the statistics of the words of a corpus dictionary.
+
+    The statistics are loaded once per process and shared, unless the
+    dictionary file changes.
+
+    Args:
+        dictionary_file (str): path of the dictionary file.
+
+    Returns:
+        CorpusStatistics: the statistics of the corpus dictionary.
+
+    """
+    key = path.abspath(dictionary_file)
+    with _corpus_statistics_lock:
+        statistics = _corpus_statistics_cache.get(key)
+        if statistics is None or \
+                statistics.fingerprint != _file_fingerprint(key):
+            statistics = CorpusStatistics(key)
+            _corpus_statistics_cache[key] = statistics
+    return statistics
@@ -5,7 +5,7 @@ from gensim.models.word2vec import LineSentence, Word2Vec
 from gensim.models.phrases import Phraser, Phrases
 import numpy as np
 from numpy import ndarray
-from okgraph.utils import logger
+from okgraph.utils import is_compressed, logger, open_corpus
 from os import makedirs, path
 from pymagnitude import converter, Magnitude
 from typing import List
@@ -318,22 +318,31 @@ class FileConverter:
 
         model = Word2Vec()
 
+        # Compressed corpora are decompressed while they are read
+        if is_compressed(corpus_file):
+            corpus = open_corpus(corpus_file)
+        else:
+            corpus = corpus_file
+
         logger.info(f"Gensim: computing corpus phrases")
-        phrases = Phrases(LineSentence(corpus_file))
+        phrases = Phrases(LineSentence(corpus))
 
         logger.info(f"Gensim: generating bigram")
         bigram = Phraser(phrases)
 
         logger.info(f"Gensim: building vocabulary")
-        model.build_vocab(bigram[LineSentence(corpus_file)])
+        model.build_vocab(bigram[LineSentence(corpus)])
 
         logger.info(
             f"Gensim: training model with"
             f" total_examples={model.corpus_count} and epochs={model.epochs}")
-        model.train(bigram[LineSentence(corpus_file)],
+        model.train(bigram[LineSentence(corpus)],
                     total_examples=model.corpus_count,
                     epochs=model.epochs)
 
+        if corpus is not corpus_file:
+            corpus.close()
+
         logger.info(f"Gensim: saving... {model_file}")
         model.wv.save_word2vec_format(model_file, binary=True)
         logger.info(f"Gensim: saved {model_file}")
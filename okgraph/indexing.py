@@ -1,10 +1,24 @@
 """The 'indexing' module contains the utilities used to organize a corpus in
 sub-documents and allow faster searches of word occurrences into it.
 """
-from okgraph.utils import get_words, logger
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+import heapq
+from itertools import islice
+import mmap
+from okgraph.utils import appended_offset, file_digest, get_word_batches, \
+    get_words_offsets, is_compressed, load_state, logger, save_state, \
+    split_words
 from os import makedirs, path
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+import weakref
 from whoosh import index
-from whoosh.fields import Schema, TEXT
+from whoosh.analysis import Analyzer, LowercaseFilter, RegexTokenizer, \
+    STOP_WORDS, StopFilter
+from whoosh.fields import Schema, STORED, TEXT
+from whoosh.reading import IndexReader
+from whoosh.searching import Searcher
 
 DEFAULT_INDEX_FOLDER: str = "indexdir"
 """str: default name for the index folder."""
@@ -12,6 +26,20 @@ FIELD_ID: str = "id"
 """str: field that stores the ID of a document in the Schema"""
 FIELD_CONTENT: str = "content"
 """str: field that stores the content of a document in the Schema"""
+FIELD_OFFSET: str = "offset"
+"""str: field that stores the position of a document in the corpus file, when
+the content of the document is not stored in the Schema"""
+FIELD_POSITION: str = "position"
+"""str: field that stores the position (in words) of the first word of a
+document in the corpus, so that the overlaid documents can be joined"""
+INDEX_POSITIONS: str = "word_offsets"
+"""str: semantics of the positions of the indexed words, recorded with the
+index: the documents are split in words by whitespace and every word takes a
+position, even if it is not indexed (e.g. a stop word), so that the positions
+are the word offsets in the document"""
+INDEX_STATE_NAME: str = "okgraph_state.json"
+"""str: name of the file, inside the index folder, storing the indexing
+state."""
 
 
 class Indexing:
@@ -28,10 +56,18 @@ class Indexing:
         schema (Schema): the index structure composed by the following fields:
             "id": str
             "content": str
+            "position": int (stored, not indexed)
+            or, if the documents content is not stored:
+            "offset": int (stored, not indexed)
+            "content": str (indexed, not stored)
+            "position": int (stored, not indexed)
 
     """
 
-    def __init__(self, corpus_path: str):
+    def __init__(self,
+                 corpus_path: str,
+                 store_content: bool = True,
+                 stop_words: Iterable[str] = None):
         """The constructor creates an Indexing object.
 
         Saves the reference to the corpus file and defines the structure for
@@ -39,13 +75,43 @@ class Indexing:
 
         Args:
             corpus_path (str): path of the text corpus.
+            store_content (bool): True to store the content of the documents in
+                the index, False to store just the byte offset of the documents
+                in the corpus file. Without the stored content the index is
+                smaller, but the corpus file is needed to read the documents
+                (see :class:`DocumentReader`) and must not be modified.
+                The content of a compressed corpus must be stored.
+            stop_words (Iterable[str]): words not indexed, besides the common
+                English words never indexed (e.g. the most frequent words of
+                the corpus, see :meth:`CorpusDictionary.most_frequent_words`).
+                Their huge postings are not stored, so that the index is
+                smaller and faster to search. Their positions are left empty,
+                so that the distance between the indexed words is unchanged.
+                The content of the documents, and then the windows extracted
+                from it, is not affected, but the stop words can't be searched.
+                The positions of the indexed words are the same with and
+                without them.
 
         """
+        if not store_content and is_compressed(corpus_path):
+            raise ValueError(f"the content of the documents of the compressed"
+                             f" corpus {corpus_path} must be stored")
         self.corpus_path = corpus_path
-        self.schema = Schema(
-            id=TEXT(stored=True),
-            content=TEXT(stored=True)
-        )
+        # The positions do not depend on the stop words (see INDEX_POSITIONS)
+        content = TEXT(stored=store_content,
+                       analyzer=_content_analyzer(stop_words or ()))
+        if store_content:
+            self.schema = Schema(
+                id=TEXT(stored=True),
+                content=content,
+                position=STORED
+            )
+        else:
+            self.schema = Schema(
+                offset=STORED,
+                content=content,
+                position=STORED
+            )
 
     def __str__(self) -> str:
         return self.corpus_path.__str__()
@@ -59,6 +125,11 @@ class Indexing:
                  ) -> None:
         """Starts the indexing process.
 
+        Along with the index, the indexing state (size and digest of the
+        indexed corpus, words of the last incomplete document) is saved in the
+        index directory, so that the index can be later extended through
+        :meth:`update`.
+
         Args:
             index_path (str): path in which the index will be stored.
             document_overlay (int): number of words shared between two
@@ -83,22 +154,178 @@ class Indexing:
         if not memory_limit > 0:
             raise ValueError(f"memory_limit can't be negative or zero")
 
-        logger.info(f"Start documents indexing in corpus")
+        # Index the corpus if there is no trace of an index in the specified
+        # path
+        if index_path and not path.exists(index_path):
+            logger.info(f"Start documents indexing in corpus")
+
+            # Creates the path and the index for the specified schema
+            makedirs(index_path, exist_ok=True)
+            ix = index.create_in(index_path, self.schema)
+
+            # The first document has no left overlay: let the counter start
+            # like it had and it has been already processed
+            state = {
+                "corpus_path": path.abspath(self.corpus_path),
+                "document_overlay": document_overlay,
+                "document_center": document_center,
+                "document_index": 0,
+                "document_count": 0,
+                "document_list": [],
+                "document_offsets": [],
+                "document_list_count": document_overlay,
+                "document_position": 0,
+                "first_document_offset": None,
+                "positions": INDEX_POSITIONS
+            }
+            corpus_size = path.getsize(self.corpus_path)
+            self._index_documents(ix, index_path, state,
+                                  self._words(ix, 0),
+                                  num_processes, memory_limit)
+
+            state["corpus_size"] = corpus_size
+            state["corpus_digest"] = file_digest(self.corpus_path, corpus_size)
+            save_state(path.join(index_path, INDEX_STATE_NAME), state)
+
+            logger.info(f"Ended documents indexing in corpus")
+
+    def update(self,
+               index_path: str = DEFAULT_INDEX_FOLDER,
+               num_processes: int = 1,
+               memory_limit: int = 128
+               ) -> bool:
+        """Extends an existing index with the text appended to the corpus since
+        the last indexing.
 
+        Only the appended text is indexed, as new segments of the index. The
+        first new document overlays the last indexed document as if the whole
+        corpus was indexed at once.
+
+        Args:
+            index_path (str): path in which the index is stored.
+            num_processes (int): number of processes used by the index writer.
+            memory_limit (int): memory (MB) used by every single writer process.
+
+        Returns:
+            bool: True if the index has been updated, False if it can't be
+                updated because the indexed corpus has been modified, no
+                indexing state is available or the index has been generated
+                with other position semantics (see INDEX_POSITIONS).
+
+        """
+        if not num_processes > 0:
+            raise ValueError(f"num_processes can't be negative or zero")
+        if not memory_limit > 0:
+            raise ValueError(f"memory_limit can't be negative or zero")
+
+        state_file = path.join(index_path, INDEX_STATE_NAME)
+        state = load_state(state_file)
+        if state is None or state.get("positions") != INDEX_POSITIONS:
+            return False
+        offset = appended_offset(self.corpus_path, state["corpus_size"],
+                                 state["corpus_digest"])
+        if offset is None:
+            return False
+
+        corpus_size = path.getsize(self.corpus_path)
+        if offset == corpus_size:
+            logger.info(f"Index already up to date")
+            return True
+
+        logger.info(f"Start documents indexing in corpus from byte {offset}")
+
+        ix = index.open_dir(index_path)
+        self._index_documents(ix, index_path, state,
+                              self._words(ix, offset),
+                              num_processes, memory_limit)
+
+        state["corpus_size"] = corpus_size
+        state["corpus_digest"] = file_digest(self.corpus_path, corpus_size)
+        save_state(state_file, state)
+
+        logger.info(f"Ended documents indexing in corpus")
+        return True
+
+    def _words(self,
+               ix: index.Index,
+               offset: int
+               ) -> Iterator[Tuple[List[str], Optional[List[int]]]]:
+        """Reads the words of the corpus to index by batches, along with their
+        position in the corpus file if the index does not store the documents
+        content.
+
+        Args:
+            ix (Index): the index in which the words are added.
+            offset (int): byte offset from which the corpus is read.
+
+        Yields:
+            Tuple[List[str], Optional[List[int]]]: the next batch of words in
+                the corpus and their byte offsets (None if not needed by the
+                index).
+
+        """
+        if FIELD_OFFSET not in ix.schema:
+            for words in get_word_batches(self.corpus_path, offset):
+                yield words, None
+        else:
+            words_offsets = get_words_offsets(self.corpus_path, offset)
+            while True:
+                batch = list(islice(words_offsets, 2**16))
+                if not batch:
+                    break
+                (words, offsets) = zip(*batch)
+                yield list(words), list(offsets)
+
+    @staticmethod
+    def _index_documents(ix: index.Index,
+                         index_path: str,
+                         state: Dict,
+                         batches: Iterator[Tuple[List[str],
+                                                 Optional[List[int]]]],
+                         num_processes: int,
+                         memory_limit: int
+                         ) -> None:
+        """Divides a sequence of words in partially overlaid documents and adds
+        them to the index.
+
+        Args:
+            ix (Index): the index in which the documents are added.
+            index_path (str): path in which the index is stored.
+            state (Dict): the indexing state. It is updated with the words of
+                the last incomplete document and the document counters, so
+                that the indexing can be resumed.
+            batches (Iterator[Tuple[List[str], Optional[List[int]]]]): the
+                batches of words to index and their byte offset in the corpus
+                file.
+            num_processes (int): number of processes used by the index writer.
+            memory_limit (int): memory (MB) used by every single writer process.
+
+        Returns:
+            None
+
+        """
         # Indexing parameters
-        document_size = document_center + 2 * document_overlay
+        document_overlay = state["document_overlay"]
+        document_size = state["document_center"] + 2 * document_overlay
 
         # List of words that defines a document
-        document_list = []
-        # Number of words in the documents constructor list.
-        # The first document has no left overlay: let the counter start like it
-        # had and it has been already processed
-        document_list_count = document_overlay
+        document_list = state["document_list"]
+        # Offsets of the words in the document (if not storing the content)
+        document_offsets = state["document_offsets"]
+        store_content = FIELD_OFFSET not in ix.schema
+        # Number of words in the documents constructor list. The first
+        # document has no left overlay, but it is counted like it had
+        document_list_count = state["document_list_count"]
+        missing_overlay = document_list_count - len(document_list)
+        # Position of the first word of the next document in the corpus (the
+        # indexes created before the position field do not store it)
+        store_position = FIELD_POSITION in ix.schema
+        document_position = state.get("document_position", 0)
 
         # ID of the document being indexed and saved
-        document_index = 0
+        document_index = state["document_index"]
         # Counter for found documents
-        document_count = 0
+        document_count = state["document_count"]
         # Max number of indexable documents without saving and committing
         document_count_limit = 500000
 
@@ -107,70 +334,559 @@ class Indexing:
         # Frequency of log messages in term of found documents
         log_frequency = 10000
 
-        # Define the index schema
-        schema = self.schema
+        writer = ix.writer(procs=num_processes,
+                           multisegment=True,
+                           limitmb=memory_limit)
+        indexed_documents = False
 
-        # Index the corpus if there is no trace of an index in the specified
-        # path
-        if index_path and not path.exists(index_path):
-            # Creates the path and the index for the specified schema
-            makedirs(index_path, exist_ok=True)
-            ix = index.create_in(index_path, schema)
-            writer = ix.writer(procs=num_processes,
-                               multisegment=True,
-                               limitmb=memory_limit)
-
-            # Scrolls through the corpus word by word:
-            # divide the corpus in partially overlaid documents;
-            # index and save every document using the specified schema
-            for word in get_words(self.corpus_path):
-                # Add the word to the list of words in the document
-                document_list.append(word)
-                document_list_count += 1
-
-                # If a document has been completed
-                if document_list_count == document_size:
-                    # Count the new document
-                    document_index += 1
-                    document_count += 1
-                    log_count += 1
-
-                    if log_count == 1:
-                        logger.info(
-                            f"Indexing document number: {document_count}")
-                    if log_count == log_frequency:
-                        log_count = 0
-
-                    # Convert the temporary list of words, representing the
-                    # document, into plain text
-                    document_content = " ".join(map(str, document_list))
+        # Scrolls through the corpus by batches of words:
+        # divide the corpus in partially overlaid documents;
+        # index and save every document using the specified schema
+        for words, offsets in batches:
+            # Add the words to the list of words in the documents
+            document_list.extend(words)
+            if not store_content:
+                document_offsets.extend(offsets)
+
+            # Position of the first word of the next document in the list
+            document_start = 0
+            # While a document can be completed
+            while missing_overlay + len(document_list) - document_start >= \
+                    document_size:
+                document_end = \
+                    document_start + document_size - missing_overlay
+                missing_overlay = 0
+
+                # Count the new document
+                document_index += 1
+                document_count += 1
+                log_count += 1
+                indexed_documents = True
+
+                if log_count == 1:
+                    logger.info(
+                        f"Indexing document number: {document_count}")
+                if log_count == log_frequency:
+                    log_count = 0
+
+                # Convert the words representing the document into plain text
+                document_content = \
+                    " ".join(document_list[document_start:document_end])
+                document_fields = {FIELD_CONTENT: document_content}
+                if store_position:
+                    document_fields[FIELD_POSITION] = document_position
+                if store_content:
                     # Index the document content using the document index as
                     # its ID
-                    writer.add_document(
-                        id=str(hex(document_index)),
-                        content=document_content)
-
-                    # Get rid of the words that do not overlay with the next
-                    # document
-                    del document_list[:-document_overlay]
-                    document_list_count = document_overlay
-
-                    # If the limit has been reached, commit the changes and
-                    # start saving the next documents into a new file
-                    if document_index == document_count_limit:
-                        logger.info(
-                            f"Limit of {document_count_limit} document reached:"
-                            f" committing changes")
-                        writer.commit()
-                        ix = index.open_dir(index_path)
-                        writer = ix.writer()
-                        document_index = 0
-
-            if document_count != 0:
-                logger.info(
-                    f"Indexed last document with number: {document_count}")
-                logger.info(
-                    f"Committing")
-                writer.commit()
+                    document_fields[FIELD_ID] = str(hex(document_index))
+                else:
+                    # Index the document content storing just the position
+                    # of its first word
+                    document_fields[FIELD_OFFSET] = \
+                        document_offsets[document_start]
+                    # The first document is shorter, without left overlay
+                    if document_count == 1:
+                        state["first_document_offset"] = \
+                            document_offsets[document_start]
+                writer.add_document(**document_fields)
 
-            logger.info(f"Ended documents indexing in corpus")
+                # The next document starts with the overlay of this one
+                document_position += \
+                    document_end - document_overlay - document_start
+                document_start = document_end - document_overlay
+
+                # If the limit has been reached, commit the changes and
+                # start saving the next documents into a new file
+                if document_index == document_count_limit:
+                    logger.info(
+                        f"Limit of {document_count_limit} document reached:"
+                        f" committing changes")
+                    writer.commit()
+                    ix = index.open_dir(index_path)
+                    writer = ix.writer()
+                    document_index = 0
+                    indexed_documents = False
+
+            # Get rid of the words that do not overlay with the next document
+            del document_list[:document_start]
+            del document_offsets[:document_start]
+        document_list_count = missing_overlay + len(document_list)
+
+        if indexed_documents:
+            logger.info(
+                f"Indexed last document with number: {document_count}")
+            logger.info(
+                f"Committing")
+            writer.commit()
+        else:
+            writer.cancel()
+
+        state["document_list"] = document_list
+        state["document_offsets"] = document_offsets
+        state["document_list_count"] = document_list_count
+        state["document_position"] = document_position
+        state["document_index"] = document_index
+        state["document_count"] = document_count
+
+
+def _content_analyzer(stop_words: Iterable[str]) -> Analyzer:
+    """Creates the analyzer of the documents content skipping the stop words.
+
+    The analyzer works like the default one, but the words are split just by
+    whitespace, like the windows are, and the positions of the skipped words
+    are not assigned to the following words (see INDEX_POSITIONS).
+
+    Args:
+        stop_words (Iterable[str]): words not indexed, besides the common
+            English words (e.g. an empty tuple to skip just the latter).
+
+    Returns:
+        Analyzer: the analyzer of the documents content.
+
+    """
+    stop_list = STOP_WORDS.union(word.lower() for word in stop_words)
+    return RegexTokenizer(r"\S+") | LowercaseFilter() | \
+        StopFilter(stoplist=stop_list, renumber=False)
+
+
+class DocumentReader:
+    """A class used to read the content of the documents of an index that does
+    not store it.
+
+    The content of a document is read from the corpus file, mapped in memory,
+    starting from the document offset stored in the index.
+
+    Attributes:
+        corpus_path (str): path of the text corpus.
+        document_size (int): number of words in a document.
+
+    """
+
+    def __init__(self, index_path: str):
+        """The constructor creates a DocumentReader object.
+
+        Maps in memory the corpus file of the index.
+
+        Args:
+            index_path (str): path of the index directory.
+
+        """
+        state = load_state(path.join(index_path, INDEX_STATE_NAME))
+        if state is None:
+            raise ValueError(f"no indexing state found in {index_path}")
+        self.corpus_path = state["corpus_path"]
+        self.document_size = \
+            state["document_center"] + 2 * state["document_overlay"]
+        # The first document has no left overlay
+        self._first_document_size = \
+            state["document_center"] + state["document_overlay"]
+        # The indexing states saved by the previous versions do not record
+        # the offset of the first document: find it in the corpus
+        if "first_document_offset" in state:
+            self._first_document_offset = state["first_document_offset"]
+        else:
+            self._first_document_offset = \
+                next(get_words_offsets(self.corpus_path), (None, None))[1]
+        with open(self.corpus_path, "rb") as file:
+            self._corpus = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __enter__(self) -> "DocumentReader":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Unmaps the corpus file."""
+        self._corpus.close()
+
+    def document(self, offset: int) -> str:
+        """Reads the content of a document.
+
+        Args:
+            offset (int): byte offset of the document in the corpus file.
+
+        Returns:
+            str: the content of the document.
+
+        """
+        if offset == self._first_document_offset:
+            document_size = self._first_document_size
+        else:
+            document_size = self.document_size
+
+        # Read an increasing portion of the corpus until it surely contains
+        # all the words of the document
+        size = 16 * document_size
+        while True:
+            words = split_words(self._corpus[offset:offset + size].decode(
+                "utf-8", errors="ignore"))
+            # The last word could be truncated, unless the corpus is ended
+            if len(words) > document_size or \
+                    offset + size >= len(self._corpus):
+                return " ".join(words[:document_size])
+            size *= 2
+
+
+def find_cooccurrences(searcher: Searcher,
+                       words: List[str],
+                       window_size: int,
+                       positions: bool = False
+                       ) -> Union[List[int],
+                                  List[Tuple[int, Optional[List[int]]]]]:
+    """Finds the documents containing all the words inside a window of text.
+
+    The postings of the words are intersected in a single pass, starting from
+    the rarest word, and the positions of the words in every common document
+    are checked.
+
+    Args:
+        searcher (Searcher): searcher of the index.
+        words (List[str]): the words to search. The words are analyzed like
+            the indexed text: the words that are not indexed (e.g. stop
+            words) are ignored.
+        window_size (int): maximum number of consecutive positions containing
+            all the words.
+        positions (bool): if True, the positions of the words in every
+            matched document are returned along with the document.
+
+    Returns:
+        Union[List[int], List[Tuple[int, Optional[List[int]]]]]: the numbers
+            of the matched documents or, if the positions are requested, the
+            numbers of the matched documents and the sorted positions of all
+            the words in them (the word offsets, see INDEX_POSITIONS). The
+            positions are None if some words are not indexed as they are
+            (e.g. stop words or uppercase words), so that they can't be
+            found through the index.
+
+    """
+    field = searcher.schema[FIELD_CONTENT]
+    terms = []
+    exact_terms = True
+    for word in words:
+        word_terms = list(field.process_text(word, mode="query"))
+        exact_terms = exact_terms and word_terms == [word]
+        for term in word_terms:
+            if term not in terms:
+                terms.append(term)
+    if not terms:
+        return []
+
+    reader = searcher.reader()
+    terms.sort(key=lambda term: reader.doc_frequency(FIELD_CONTENT, term))
+    if reader.doc_frequency(FIELD_CONTENT, terms[0]) == 0:
+        return []
+    matchers = [reader.postings(FIELD_CONTENT, term) for term in terms]
+
+    documents = []
+    while matchers[0].is_active():
+        # Move all the postings to the next document containing every word
+        document = matchers[0].id()
+        aligned = True
+        for matcher in matchers[1:]:
+            if matcher.id() < document:
+                matcher.skip_to(document)
+                if not matcher.is_active():
+                    return documents
+            if matcher.id() > document:
+                matchers[0].skip_to(matcher.id())
+                aligned = False
+                break
+        if not aligned:
+            continue
+
+        terms_positions = [matcher.value_as("positions")
+                           for matcher in matchers]
+        if _shortest_span(terms_positions) <= window_size:
+            if not positions:
+                documents.append(document)
+            elif exact_terms:
+                documents.append(
+                    (document, list(heapq.merge(*terms_positions))))
+            else:
+                documents.append((document, None))
+        matchers[0].next()
+
+    return documents
+
+
+def documents_stride(index_path: str) -> Optional[int]:
+    """Reads the number of words between the first words of two consecutive
+    documents of an index.
+
+    Args:
+        index_path (str): path of the index directory.
+
+    Returns:
+        Optional[int]: the number of words, None if no indexing state is
+            available.
+
+    """
+    state = load_state(path.join(index_path, INDEX_STATE_NAME))
+    if state is None:
+        return None
+    return state["document_center"] + state["document_overlay"]
+
+
+def previous_document(searcher: Searcher,
+                      document: int,
+                      document_stride: int) -> Optional[int]:
+    """Finds the document preceding a document in the corpus, overlaid by
+    its first words.
+
+    The documents are usually numbered in corpus order, so the previous
+    number is checked first. Otherwise, the document is found through the
+    positions of all the documents, read once for every reader of the index.
+
+    Args:
+        searcher (Searcher): searcher of the index.
+        document (int): number of the document.
+        document_stride (int): number of words between the first words of two
+            consecutive documents (see :func:`documents_stride`).
+
+    Returns:
+        Optional[int]: the number of the previous document, None if the
+            document is the first one or the index does not store the
+            positions of the documents.
+
+    """
+    position = searcher.stored_fields(document).get(FIELD_POSITION)
+    if not position:
+        return None
+    # The first document is shorter, without left overlay
+    previous_position = max(0, position - document_stride)
+    if document > 0 and searcher.stored_fields(document - 1).get(
+            FIELD_POSITION) == previous_position:
+        return document - 1
+    return _documents_by_position(searcher.reader()).get(previous_position)
+
+
+# Numbers of the documents of every open reader of an index, by position
+_readers_documents: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def _documents_by_position(reader: IndexReader) -> Dict[int, int]:
+    """Maps the positions of the documents of an index to their numbers.
+
+    Args:
+        reader (IndexReader): reader of the index.
+
+    Returns:
+        Dict[int, int]: the number of every document, by position.
+
+    """
+    documents = _readers_documents.get(reader)
+    if documents is None:
+        documents = {fields.get(FIELD_POSITION): document
+                     for document, fields in reader.iter_docs()}
+        _readers_documents[reader] = documents
+    return documents
+
+
+def _shortest_span(positions: List[List[int]]) -> int:
+    """Evaluates the size of the shortest sequence of consecutive positions
+    containing at least one position of every list.
+
+    Args:
+        positions (List[List[int]]): sorted lists of positions.
+
+    Returns:
+        int: the size of the shortest sequence of positions.
+
+    """
+    merged_positions = sorted((position, i)
+                              for i, list_positions in enumerate(positions)
+                              for position in list_positions)
+    counts = [0] * len(positions)
+    missing = len(positions)
+    shortest_span = None
+    start = 0
+    for position, i in merged_positions:
+        counts[i] += 1
+        if counts[i] == 1:
+            missing -= 1
+        # Shrink the sequence from the left while it contains every list
+        while missing == 0:
+            (start_position, start_i) = merged_positions[start]
+            span = position - start_position + 1
+            if shortest_span is None or span < shortest_span:
+                shortest_span = span
+            counts[start_i] -= 1
+            if counts[start_i] == 0:
+                missing += 1
+            start += 1
+
+    return shortest_span
+
+
+def index_version(index_path: str) -> Tuple[int, float]:
+    """Opens an index to read the version of its latest commit.
+
+    The version is recorded with the data obtained from the index (the cached
+    results, the label tables) to recognize when the index is updated or
+    generated again.
+
+    Args:
+        index_path (str): path of the index directory.
+
+    Returns:
+        Tuple[int, float]: the latest generation number of the index and the
+            modification time of its table of contents. The generation number
+            alone starts again from zero when the index is generated again.
+
+    """
+    ix = index.open_dir(index_path)
+    return ix.latest_generation(), ix.last_modified()
+
+
+class SearcherPool:
+    """A thread-safe pool of searchers of an index.
+
+    The searchers are opened once and reused by the following searches. Every
+    searcher is used by one thread at a time. When the index changes on disk
+    the index is opened again, so that the following searches use its latest
+    version.
+
+    Attributes:
+        index_path (str): path of the index directory.
+
+    """
+
+    def __init__(self, index_path: str):
+        """The constructor creates a SearcherPool object.
+
+        Args:
+            index_path (str): path of the index directory.
+
+        """
+        self.index_path = index_path
+        self._lock = threading.Lock()
+        self._searchers = []
+        self._open_index()
+
+    def __enter__(self) -> "SearcherPool":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Closes the searchers not in use."""
+        with self._lock:
+            for searcher in self._searchers:
+                searcher.close()
+            self._searchers = []
+
+    @contextmanager
+    def searcher(self) -> Iterator[Searcher]:
+        """Provides a searcher of the latest version of the index, giving it
+        back to the pool at the end of its use.
+
+        Returns:
+            Iterator[Searcher]: the searcher, to be used in a with statement.
+
+        """
+        with self._lock:
+            if self._index_version() != self._version:
+                logger.info(f"Index {self.index_path} changed: opening it"
+                            f" again")
+                for searcher in self._searchers:
+                    searcher.close()
+                self._searchers = []
+                self._open_index()
+            version = self._version
+            if self._searchers:
+                searcher = self._searchers.pop()
+            else:
+                searcher = self._index.searcher()
+        try:
+            yield searcher
+        finally:
+            with self._lock:
+                if version == self._version:
+                    self._searchers.append(searcher)
+                else:
+                    searcher.close()
+
+    def _open_index(self) -> None:
+        """Opens the latest version of the index."""
+        self._index = index.open_dir(self.index_path)
+        self._version = self._index_version()
+
+    def _index_version(self) -> Tuple[int, float]:
+        """Gets the version of the index on disk.
+
+        The modification time distinguishes an index generated again from
+        scratch, whose generation number starts again from zero.
+
+        Returns:
+            Tuple[int, float]: the generation number of the index and the
+                modification time of its table of contents.
+
+        """
+        return self._index.latest_generation(), self._index.last_modified()
+
+
+# Pool of searchers of a process of a searcher_executor, opened when the
+# process starts
+_process_searcher_pool: Optional[SearcherPool] = None
+
+
+def searcher_executor(index_path: str,
+                      num_processes: int
+                      ) -> ProcessPoolExecutor:
+    """Creates a pool of processes searching an index.
+
+    Every process opens the index once, when it starts, and its tasks share
+    the same pool of searchers (see :func:`process_searcher_pool`). The pool
+    of processes can be kept alive and reused by many searches.
+
+    Args:
+        index_path (str): path of the index directory.
+        num_processes (int): number of processes.
+
+    Returns:
+        ProcessPoolExecutor: the pool of processes. It should be shut down
+            when no longer used.
+
+    """
+    if num_processes < 1:
+        raise ValueError(f"num_processes must be a positive int")
+    return ProcessPoolExecutor(max_workers=num_processes,
+                               initializer=_open_process_searcher_pool,
+                               initargs=(index_path,))
+
+
+def _open_process_searcher_pool(index_path: str) -> None:
+    """Opens the pool of searchers of a process of a
+    :func:`searcher_executor`.
+
+    Args:
+        index_path (str): path of the index directory.
+
+    Returns:
+        None
+
+    """
+    global _process_searcher_pool
+    _process_searcher_pool = SearcherPool(index_path)
+
+
+def process_searcher_pool(index_path: str) -> Optional[SearcherPool]:
+    """Gets the pool of searchers opened when the current process started,
+    if it searches the specified index.
+
+    Args:
+        index_path (str): path of the index directory.
+
+    Returns:
+        Optional[SearcherPool]: the pool of searchers of the process, None if
+            the process has not been started by a :func:`searcher_executor`
+            of the index.
+
+    """
+    if _process_searcher_pool is None or \
+            path.abspath(_process_searcher_pool.index_path) != \
+            path.abspath(index_path):
+        return None
+    return _process_searcher_pool
@@ -0,0 +1,178 @@
+"""The 'label_scoring' module contains the utilities to rank the labels
+obtained from the windows of the targets and to combine the labels of many
+targets.
+"""
+from collections.abc import Mapping
+import itertools
+import numpy
+from okgraph.utils import top_k
+from scipy.sparse import csr_matrix
+from typing import Dict, Iterator, List
+
+
+class RankedLabels(Mapping):
+    """A read-only dictionary {label: score} whose labels are sorted by
+    decreasing score (the labels with equal scores keep their order).
+
+    The labels are sorted just when all of them are requested (e.g. iterating
+    the dictionary), while the best labels are selected in linear time.
+    """
+
+    def __init__(self, scores: Dict[str, float]):
+        """The constructor creates a RankedLabels object.
+
+        Args:
+            scores (Dict[str, float]): the scores {label: score} of the labels,
+                in any order.
+
+        """
+        self._scores = scores
+        self._ranked_scores = None
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    def __iter__(self) -> Iterator[str]:
+        if self._ranked_scores is None:
+            self._ranked_scores = self.top(len(self._scores))
+        return iter(self._ranked_scores)
+
+    def __getitem__(self, label: str) -> float:
+        return self._scores[label]
+
+    def __repr__(self) -> str:
+        return f"RankedLabels({dict(self.items())})"
+
+    def top(self, k: int) -> Dict[str, float]:
+        """Selects the labels with the highest scores.
+
+        Args:
+            k (int): limit to the number of labels.
+
+        Returns:
+            Dict[str, float]: the scores {label: score} of the selected labels,
+                sorted by decreasing score.
+
+        """
+        labels = list(self._scores)
+        scores = numpy.fromiter(self._scores.values(), dtype=numpy.float64,
+                                count=len(labels))
+        return {labels[i]: self._scores[labels[i]]
+                for i in top_k(scores, k).tolist()}
+
+    def unranked(self) -> Dict[str, float]:
+        """Returns the scores of the labels without sorting them.
+
+        Returns:
+            Dict[str, float]: the scores {label: score} of the labels, in the
+                order they have been provided.
+
+        """
+        return self._scores
+
+
+class LabelScores:
+    """A class used to score the labels of many targets together.
+
+    The scores (e.g. the TF-IDF statistic) of the labels of every target are
+    the rows of a sparse matrix (targets x labels), so that the labels can be
+    aggregated and selected through vectorized operations.
+
+    Attributes:
+        labels (List[str]): the labels of all the targets, in order of
+            appearance. The i-th label is the i-th column of the matrix.
+        matrix (csr_matrix): the scores of the labels of every target.
+
+    """
+
+    def __init__(self, results: List[Dict[str, float]]):
+        """The constructor creates a LabelScores object.
+
+        Args:
+            results (List[Dict[str, float]]): the scores {label: score} of the
+                labels of every target.
+
+        """
+        self.labels = list(dict.fromkeys(itertools.chain.from_iterable(
+            results)))
+        label_ids = {label: label_id
+                     for label_id, label in enumerate(self.labels)}
+
+        sizes = numpy.fromiter(map(len, results), dtype=numpy.int64,
+                               count=len(results))
+        indptr = numpy.zeros(len(results) + 1, dtype=numpy.int64)
+        numpy.cumsum(sizes, out=indptr[1:])
+        indices = numpy.fromiter(
+            map(label_ids.__getitem__, itertools.chain.from_iterable(results)),
+            dtype=numpy.int64, count=int(indptr[-1]))
+        data = numpy.fromiter(
+            itertools.chain.from_iterable(
+                result.values() for result in results),
+            dtype=numpy.float64, count=int(indptr[-1]))
+        self.matrix = csr_matrix((data, indices, indptr),
+                                 shape=(len(results), len(self.labels)))
+
+    @classmethod
+    def from_matrix(cls,
+                    matrix: csr_matrix,
+                    labels: List[str]
+                    ) -> "LabelScores":
+        """Creates a LabelScores object from the matrix of the scores.
+
+        Args:
+            matrix (csr_matrix): the scores of the labels of every target
+                (targets x labels).
+            labels (List[str]): the labels related to the columns of the
+                matrix.
+
+        Returns:
+            LabelScores: the scores of the labels.
+
+        """
+        label_scores = cls.__new__(cls)
+        label_scores.labels = labels
+        label_scores.matrix = matrix
+        return label_scores
+
+    def intersection_mean(self) -> numpy.ndarray:
+        """Evaluates the average score of the labels common to all the
+        targets.
+
+        Returns:
+            numpy.ndarray: the average score of every label, NaN for the labels
+                missing from some targets.
+
+        """
+        (targets, _) = self.matrix.shape
+        # The explicit zero scores are counted as well
+        common = self.matrix.getnnz(axis=0) == targets
+        scores = numpy.full(len(self.labels), numpy.nan)
+        if targets > 0:
+            scores[common] = \
+                numpy.asarray(self.matrix.sum(axis=0)).ravel()[common] \
+                / targets
+        return scores
+
+    def top_labels(self,
+                   scores: numpy.ndarray,
+                   k: int,
+                   min_score: float = None
+                   ) -> List[str]:
+        """Selects the labels with the highest scores.
+
+        Args:
+            scores (numpy.ndarray): the score of every label (NaN for the
+                labels that can't be selected).
+            k (int): limit to the number of labels.
+            min_score (float): minimum score to select a label. If None, all
+                the scores are accepted.
+
+        Returns:
+            List[str]: the selected labels, sorted by decreasing score.
+
+        """
+        candidates = numpy.flatnonzero(~numpy.isnan(scores))
+        if min_score is not None:
+            candidates = candidates[scores[candidates] >= min_score]
+        candidates = candidates[top_k(scores[candidates], k)]
+        return [self.labels[label_id] for label_id in candidates.tolist()]
@@ -0,0 +1,232 @@
+"""The 'label_table' module contains the utilities to store the labels of the
+most frequent words of a corpus, precomputed from their windows, in a file
+that can be memory-mapped and shared between processes.
+"""
+import mmap
+import numpy as np
+from okgraph.dictionary import corpus_statistics, CorpusDictionary, \
+    replacing_file
+from okgraph.indexing import index_version
+from typing import Dict, Optional
+
+LABEL_TABLE_EXTENSION: str = ".labels"
+"""str: extension of the label table files."""
+LABEL_TABLE_MAGIC: bytes = b"OKGLABL1"
+"""bytes: signature at the beginning of a label table file."""
+_HEADER = np.dtype([("magic", "S8"), ("words_count", "<i8"),
+                    ("labels_count", "<i8"), ("window_size", "<i8"),
+                    ("noise_threshold", "<f8"), ("dictionary_size", "<i8"),
+                    ("dictionary_mtime", "<i8"), ("dictionary_inode", "<i8"),
+                    ("index_generation", "<i8"), ("index_mtime", "<f8")])
+
+
+def write_label_table(table_file: str,
+                      word_ids: np.ndarray,
+                      label_ids: np.ndarray,
+                      scores: np.ndarray,
+                      index_path: str,
+                      dictionary_file: str,
+                      window_size: int,
+                      noise_threshold: float
+                      ) -> None:
+    """Saves the labels of some words in a label table file.
+
+    The file is composed by a header followed by:
+        - the dictionary IDs of the words, in increasing order (int64);
+        - the dictionary IDs of the labels of every word, sorted by decreasing
+          score (int32, -1 after the last label of a word);
+        - the scores of the labels of every word (float32).
+    The header records the versions of the index and dictionary the labels
+    have been obtained from.
+
+    Args:
+        table_file (str): path of the label table file.
+        word_ids (numpy.ndarray): dictionary IDs of the words, in increasing
+            order.
+        label_ids (numpy.ndarray): dictionary IDs of the labels of every word
+            (words x labels).
+        scores (numpy.ndarray): scores of the labels of every word (words x
+            labels).
+        index_path (str): path of the index the labels have been obtained
+            from.
+        dictionary_file (str): path of the dictionary the labels have been
+            obtained from.
+        window_size (int): size of the windows used to obtain the labels.
+        noise_threshold (float): noise threshold used to obtain the labels.
+
+    Returns:
+        None
+
+    """
+    (words_count, labels_count) = label_ids.shape
+    (dictionary_size, dictionary_mtime, dictionary_inode) = \
+        corpus_statistics(dictionary_file).fingerprint
+    (index_generation, index_mtime) = index_version(index_path)
+    header = np.array([(LABEL_TABLE_MAGIC, words_count, labels_count,
+                        window_size, noise_threshold, dictionary_size,
+                        dictionary_mtime, dictionary_inode, index_generation,
+                        index_mtime)], dtype=_HEADER)
+
+    # Replace the file at the end, so that it can be safely replaced while it
+    # is memory-mapped
+    with replacing_file(table_file) as file:
+        file.write(header.tobytes())
+        file.write(word_ids.astype("<i8").tobytes())
+        file.write(label_ids.astype("<i4").tobytes())
+        file.write(scores.astype("<f4").tobytes())
+
+
+class LabelTable:
+    """A read-only table of the labels of the most frequent words of a
+    corpus, backed by a label table file.
+
+    The file is memory-mapped, so that loading the table is immediate and its
+    pages are shared by all the processes using it.
+
+    Just the best labels of every word are stored (at most labels_count). The
+    labels beyond them are lost, so the intersection of the labels of many
+    words in the table is an approximation of the intersection of their
+    SlidingWindows results. The intersection is exact for the words whose
+    labels are fewer than labels_count.
+
+    Attributes:
+        table_file (str): path of the label table file.
+        word_ids (numpy.ndarray): dictionary IDs of the words in the table.
+        label_ids (numpy.ndarray): dictionary IDs of the labels of every word.
+        scores (numpy.ndarray): scores of the labels of every word.
+        labels_count (int): maximum number of labels of every word.
+        window_size (int): size of the windows used to obtain the labels.
+        noise_threshold (float): noise threshold used to obtain the labels.
+
+    """
+
+    def __init__(self, table_file: str):
+        """The constructor creates a LabelTable object.
+
+        Args:
+            table_file (str): path of the label table file.
+
+        """
+        self.table_file = table_file
+        with open(table_file, "rb") as file:
+            self._buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        header = np.frombuffer(self._buffer, dtype=_HEADER, count=1)[0]
+        if header["magic"] != LABEL_TABLE_MAGIC:
+            raise ValueError(f"{table_file} is not a valid label table file")
+        words_count = int(header["words_count"])
+        labels_count = int(header["labels_count"])
+        position = _HEADER.itemsize
+        self.word_ids = np.frombuffer(self._buffer, dtype="<i8",
+                                      count=words_count, offset=position)
+        position += self.word_ids.nbytes
+        self.label_ids = np.frombuffer(
+            self._buffer, dtype="<i4", count=words_count * labels_count,
+            offset=position).reshape(words_count, labels_count)
+        position += self.label_ids.nbytes
+        self.scores = np.frombuffer(
+            self._buffer, dtype="<f4", count=words_count * labels_count,
+            offset=position).reshape(words_count, labels_count)
+        self.labels_count = labels_count
+        self.window_size = int(header["window_size"])
+        self.noise_threshold = float(header["noise_threshold"])
+        self._dictionary_fingerprint = (int(header["dictionary_size"]),
+                                        int(header["dictionary_mtime"]),
+                                        int(header["dictionary_inode"]))
+        self._index_version = (int(header["index_generation"]),
+                               float(header["index_mtime"]))
+
+    def __str__(self) -> str:
+        return self.table_file.__str__()
+
+    def __len__(self) -> int:
+        return len(self.word_ids)
+
+    def matches(self,
+                index_path: str,
+                dictionary_file: str,
+                window_size: int = 14,
+                noise_threshold: float = 0.10,
+                max_windows: int = None
+                ) -> bool:
+        """Checks if the labels have been obtained from the current version
+        of an index and dictionary, with the same windowing parameters (see
+        :meth:`matches_windowing`).
+
+        The index is opened to read its version: the table should be checked
+        once, before using it.
+
+        Args:
+            index_path (str): path of the index.
+            dictionary_file (str): path of the dictionary.
+            window_size (int): size of the windows of the live windowing.
+            noise_threshold (float): noise threshold of the live windowing.
+            max_windows (int): maximum number of windows of the live
+                windowing.
+
+        Returns:
+            bool: True if the index and dictionary have not changed since the
+                table generation, and the windowing parameters are the same.
+
+        """
+        return \
+            self.matches_windowing(window_size, noise_threshold,
+                                   max_windows) and \
+            corpus_statistics(dictionary_file).fingerprint == \
+            self._dictionary_fingerprint and \
+            index_version(index_path) == self._index_version
+
+    def matches_windowing(self,
+                          window_size: int = 14,
+                          noise_threshold: float = 0.10,
+                          max_windows: int = None
+                          ) -> bool:
+        """Checks if the labels have been obtained with the windowing
+        parameters of a live windowing, so that they can be mixed with its
+        results.
+
+        The labels of the table are obtained from all the windows of the
+        words: the table matches just a windowing without a maximum number of
+        windows, whatever its sampling seed (the windows are not sampled).
+
+        Args:
+            window_size (int): size of the windows of the live windowing.
+            noise_threshold (float): noise threshold of the live windowing.
+            max_windows (int): maximum number of windows of the live
+                windowing.
+
+        Returns:
+            bool: True if the windowing parameters are the same.
+
+        """
+        return max_windows is None and window_size == self.window_size and \
+            noise_threshold == self.noise_threshold
+
+    def labels(self,
+               word: str,
+               dictionary: CorpusDictionary
+               ) -> Optional[Dict[str, float]]:
+        """Gets the labels of a word.
+
+        Args:
+            word (str): the word.
+            dictionary (CorpusDictionary): the dictionary the table has been
+                generated from.
+
+        Returns:
+            Optional[Dict[str, float]]: the labels {label: score} of the word,
+                sorted by decreasing score, or None if the word is not in the
+                table.
+
+        """
+        word_id = dictionary.word_id(word)
+        row = int(np.searchsorted(self.word_ids, word_id))
+        if word_id < 0 or row == len(self.word_ids) or \
+                self.word_ids[row] != word_id:
+            return None
+
+        label_ids = self.label_ids[row]
+        labels_count = int(np.count_nonzero(label_ids >= 0))
+        return {dictionary.word(int(label_id)): float(score)
+                for label_id, score in zip(label_ids[:labels_count],
+                                           self.scores[row, :labels_count])}
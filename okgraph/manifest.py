@@ -0,0 +1,210 @@
+"""The 'manifest' module contains the utilities used to keep track of the
+resources generated from a corpus, so that they can be safely reused.
+"""
+import hashlib
+from okgraph.utils import corpus_basename, load_state, logger, save_state
+from os import path
+from typing import Dict
+
+ARTIFACT_UNKNOWN: str = "unknown"
+"""str: status of a resource not recorded in the manifest."""
+ARTIFACT_INCOMPLETE: str = "incomplete"
+"""str: status of a resource whose generation has not been completed."""
+ARTIFACT_STALE: str = "stale"
+"""str: status of a resource generated from a different version of the corpus
+(e.g. before some text was appended to it)."""
+ARTIFACT_MISMATCH: str = "mismatch"
+"""str: status of a resource generated with different parameters."""
+ARTIFACT_VALID: str = "valid"
+"""str: status of a resource that can be used as it is."""
+
+
+def corpus_fingerprint(corpus_file: str,
+                       samples: int = 16,
+                       sample_size: int = 2**16) -> Dict:
+    """Evaluates the fingerprint of a corpus file.
+
+    The fingerprint is composed by the size and modification time of the file,
+    and by a digest of some portions of the file evenly spread through it.
+
+    Args:
+        corpus_file (str): path of the corpus file.
+        samples (int): number of portions of the file to digest.
+        sample_size (int): size (bytes) of every digested portion.
+
+    Returns:
+        Dict: the fingerprint {"size": int, "mtime": float,
+            "sampled_digest": str}.
+
+    """
+    size = path.getsize(corpus_file)
+    digest = hashlib.md5(str(size).encode())
+    with open(corpus_file, "rb") as file:
+        if size <= samples * sample_size:
+            digest.update(file.read())
+        else:
+            step = (size - sample_size) // (samples - 1)
+            for i in range(samples):
+                file.seek(i * step)
+                digest.update(file.read(sample_size))
+
+    return {"size": size,
+            "mtime": path.getmtime(corpus_file),
+            "sampled_digest": digest.hexdigest()}
+
+
+class Manifest:
+    """A class used to record the resources generated from a corpus.
+
+    For every resource (artifact) the manifest records its path, the
+    fingerprint of the corpus it has been generated from, the parameters used
+    to generate it and whether its generation has been completed. The manifest
+    is saved as a JSON file every time it changes.
+
+    Attributes:
+        corpus_file (str): path of the corpus file.
+        manifest_file (str): path of the manifest file.
+
+    """
+
+    def __init__(self, corpus_file: str, manifest_file: str = None):
+        """The constructor creates a Manifest object.
+
+        Loads the manifest file, if existing.
+
+        Args:
+            corpus_file (str): path of the corpus file.
+            manifest_file (str): path of the manifest file. If not specified,
+                the default path points to a *.manifest.json* file with the
+                same basename of the corpus file.
+
+        """
+        if manifest_file is None:
+            manifest_file = corpus_basename(corpus_file) + ".manifest.json"
+        self.corpus_file = corpus_file
+        self.manifest_file = manifest_file
+        self._artifacts = load_state(manifest_file) or {}
+        self._fingerprint = None
+
+    def __str__(self) -> str:
+        return self.manifest_file.__str__()
+
+    def status(self,
+               artifact: str,
+               artifact_path: str,
+               params: Dict = None
+               ) -> str:
+        """Checks if a resource can be used as it is.
+
+        The corpus is digested only if its size is unchanged but its
+        modification time is different from the recorded one.
+
+        Args:
+            artifact (str): name of the resource.
+            artifact_path (str): path of the resource.
+            params (Dict): parameters required for the resource. Parameters
+                with None value are not checked.
+
+        Returns:
+            str: the status of the resource: ARTIFACT_UNKNOWN,
+                ARTIFACT_INCOMPLETE, ARTIFACT_MISMATCH, ARTIFACT_STALE or
+                ARTIFACT_VALID.
+
+        """
+        entry = self._artifacts.get(artifact)
+        if entry is None or entry["path"] != path.normpath(artifact_path):
+            return ARTIFACT_UNKNOWN
+        if not entry["complete"]:
+            return ARTIFACT_INCOMPLETE
+
+        for key, value in (params or {}).items():
+            if value is not None and entry["params"].get(key) != value:
+                logger.info(f"Resource {artifact_path} has been generated with"
+                            f" {key}={entry['params'].get(key)}, not {value}")
+                return ARTIFACT_MISMATCH
+
+        recorded = entry["corpus"]
+        if recorded["size"] != path.getsize(self.corpus_file):
+            return ARTIFACT_STALE
+        if recorded["mtime"] == path.getmtime(self.corpus_file):
+            return ARTIFACT_VALID
+        if recorded["sampled_digest"] != \
+                self._corpus_fingerprint()["sampled_digest"]:
+            return ARTIFACT_STALE
+
+        # The corpus has just been touched: record the new modification time
+        recorded["mtime"] = self._corpus_fingerprint()["mtime"]
+        save_state(self.manifest_file, self._artifacts)
+        return ARTIFACT_VALID
+
+    def begin(self,
+              artifact: str,
+              artifact_path: str,
+              params: Dict = None
+              ) -> None:
+        """Records the start of the generation of a resource.
+
+        Args:
+            artifact (str): name of the resource.
+            artifact_path (str): path of the resource.
+            params (Dict): parameters used to generate the resource.
+                Parameters with None value are not recorded. If None, the
+                parameters already recorded for the resource are kept.
+
+        Returns:
+            None
+
+        """
+        if params is None:
+            params = self._artifacts.get(artifact, {}).get("params", {})
+        self._fingerprint = None
+        self._artifacts[artifact] = {
+            "path": path.normpath(artifact_path),
+            "corpus": self._corpus_fingerprint(),
+            "params": {key: value for key, value in params.items()
+                       if value is not None},
+            "complete": False
+        }
+        save_state(self.manifest_file, self._artifacts)
+
+    def end(self, artifact: str) -> None:
+        """Records the completion of the generation of a resource.
+
+        Args:
+            artifact (str): name of the resource.
+
+        Returns:
+            None
+
+        """
+        self._artifacts[artifact]["complete"] = True
+        save_state(self.manifest_file, self._artifacts)
+
+    def move(self, artifact: str, old_path: str, new_path: str) -> None:
+        """Records the new path of a resource, if it was recorded with the
+        old one.
+
+        Args:
+            artifact (str): name of the resource.
+            old_path (str): previous path of the resource.
+            new_path (str): new path of the resource.
+
+        Returns:
+            None
+
+        """
+        entry = self._artifacts.get(artifact)
+        if entry is not None and entry["path"] == path.normpath(old_path):
+            entry["path"] = path.normpath(new_path)
+            save_state(self.manifest_file, self._artifacts)
+
+    def _corpus_fingerprint(self) -> Dict:
+        """Returns the fingerprint of the corpus, evaluating it just once.
+
+        Returns:
+            Dict: the corpus fingerprint (see :func:`corpus_fingerprint`).
+
+        """
+        if self._fingerprint is None:
+            self._fingerprint = corpus_fingerprint(self.corpus_file)
+        return self._fingerprint
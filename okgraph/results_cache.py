@@ -0,0 +1,229 @@
+"""The 'results_cache' module contains the utilities to save on disk the
+results of the windowing of the target words, so that they can be reused.
+"""
+import hashlib
+import json
+from okgraph.indexing import index_version
+from okgraph.utils import logger
+import os
+from os import path
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+import zlib
+
+DEFAULT_RESULTS_CACHE_SIZE: int = 64
+"""int: default maximum size (MB) of the results cache."""
+RESULTS_CACHE_EXTENSION: str = ".results.sqlite"
+"""str: extension of the results cache file, placed next to the index."""
+RESULTS_ACCESS_BATCH: int = 1024
+"""int: maximum number of accesses to the cached results kept in memory before
+saving them."""
+
+
+class ResultsCache:
+    """A thread-safe cache of results, saved in a SQLite database.
+
+    Every result is identified by a key (a dictionary of the parameters used to
+    obtain it) and by the version of the index it has been obtained from. The
+    results obtained from a previous version of the index are removed when the
+    index changes. When the cache exceeds its maximum size, the least recently
+    used results are removed.
+
+    The version of the index is read just when the index directory changes, and
+    the accesses to the results are saved by batches, so that reading a result
+    neither opens the index nor writes the cache file.
+
+    Attributes:
+        index_path (str): path of the index directory.
+        cache_file (str): path of the cache file.
+        max_size (int): maximum size (MB) of the cached results.
+
+    """
+
+    def __init__(self,
+                 index_path: str,
+                 cache_file: str = None,
+                 max_size: int = DEFAULT_RESULTS_CACHE_SIZE):
+        """The constructor creates a ResultsCache object.
+
+        Opens the cache file, creating it if it does not exist.
+
+        Args:
+            index_path (str): path of the index directory.
+            cache_file (str): path of the cache file. If not specified, the
+                default path points to a *.results.sqlite* file with the same
+                name of the index directory.
+            max_size (int): maximum size (MB) of the cached results.
+
+        """
+        if max_size <= 0:
+            raise ValueError(f"max_size must be a positive int")
+        if cache_file is None:
+            cache_file = path.normpath(index_path) + RESULTS_CACHE_EXTENSION
+        self.index_path = index_path
+        self.cache_file = cache_file
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        # Status of the index directory when its version has been checked
+        self._index_status = None
+        # Last access time of the results read, not saved yet
+        self._accesses = {}
+        self._connection = sqlite3.connect(cache_file, timeout=60,
+                                           check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY,"
+                " value BLOB, size INTEGER, last_access INTEGER)")
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS results_last_access"
+                " ON results (last_access)")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS info (name TEXT PRIMARY KEY,"
+                " value TEXT)")
+
+    def __str__(self) -> str:
+        return self.cache_file.__str__()
+
+    def __enter__(self) -> "ResultsCache":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Saves the accesses to the results and closes the cache file."""
+        with self._lock:
+            with self._connection:
+                self._save_accesses()
+            self._connection.close()
+
+    def get(self, key: Dict) -> Optional[Dict[str, float]]:
+        """Gets the results related to a key.
+
+        Args:
+            key (Dict): parameters used to obtain the results. The values must
+                be serializable in JSON.
+
+        Returns:
+            Optional[Dict[str, float]]: the results, in the same order they
+                have been saved, or None if they are not in the cache.
+
+        """
+        digest = self._digest(key)
+        with self._lock, self._connection:
+            self._check_index_version()
+            row = self._connection.execute(
+                "SELECT value FROM results WHERE key = ?",
+                (digest,)).fetchone()
+            if row is None:
+                return None
+            self._accesses[digest] = time.time_ns()
+            if len(self._accesses) >= RESULTS_ACCESS_BATCH:
+                self._save_accesses()
+
+        return dict(json.loads(zlib.decompress(row[0])))
+
+    def put(self, key: Dict, results: Dict[str, float]) -> None:
+        """Saves the results related to a key, removing the least recently
+        used results if the cache exceeds its maximum size.
+
+        Args:
+            key (Dict): parameters used to obtain the results. The values must
+                be serializable in JSON.
+            results (Dict[str, float]): the results.
+
+        Returns:
+            None
+
+        """
+        value = zlib.compress(json.dumps(list(results.items())).encode())
+        with self._lock, self._connection:
+            self._check_index_version()
+            self._connection.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                (self._digest(key), value, len(value), time.time_ns()))
+            # The least recently used results are known just after saving the
+            # accesses
+            self._save_accesses()
+            self._evict()
+
+    def clear(self) -> None:
+        """Removes all the cached results."""
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM results")
+            self._accesses = {}
+
+    @staticmethod
+    def _digest(key: Dict) -> str:
+        """Gets the digest identifying a key in the cache.
+
+        Args:
+            key (Dict): parameters used to obtain the results.
+
+        Returns:
+            str: the digest of the key.
+
+        """
+        return hashlib.sha1(
+            json.dumps(key, sort_keys=True).encode()).hexdigest()
+
+    def _check_index_version(self) -> None:
+        """Removes all the cached results if the index has changed since they
+        have been saved.
+
+        The version of the index is read again just if the index directory has
+        changed (every commit of the index adds a new table of contents to it)
+        since the last check.
+        """
+        stat = os.stat(self.index_path)
+        index_status = (stat.st_mtime_ns, stat.st_ino)
+        if index_status == self._index_status:
+            return
+
+        version = json.dumps(index_version(self.index_path))
+        row = self._connection.execute(
+            "SELECT value FROM info WHERE name = 'index_version'").fetchone()
+        if row is None or row[0] != version:
+            if row is not None:
+                logger.info(f"Index {self.index_path} changed: removing the"
+                            f" results cached in {self.cache_file}")
+            self._connection.execute("DELETE FROM results")
+            self._connection.execute(
+                "INSERT OR REPLACE INTO info VALUES ('index_version', ?)",
+                (version,))
+            self._accesses = {}
+        self._index_status = index_status
+
+    def _save_accesses(self) -> None:
+        """Saves the last access time of the results read since the last
+        save.
+        """
+        if not self._accesses:
+            return
+        self._connection.executemany(
+            "UPDATE results SET last_access = ? WHERE key = ?",
+            [(access, digest) for digest, access in self._accesses.items()])
+        self._accesses = {}
+
+    def _evict(self) -> None:
+        """Removes the least recently used results exceeding the maximum size
+        of the cache.
+        """
+        excess = self._connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0] \
+            - self.max_size * 2**20
+        if excess <= 0:
+            return
+
+        evicted = []
+        for key, size in self._connection.execute(
+                "SELECT key, size FROM results ORDER BY last_access"):
+            evicted.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        self._connection.executemany(
+            "DELETE FROM results WHERE key = ?", evicted)
+        logger.debug(f"Removed {len(evicted)} results from {self.cache_file}")
@@ -1,16 +1,33 @@
 """The 'sliding_windows' module contains the utilities to search for semantic
 similarities between the words in a corpus.
 """
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
 import itertools
+import logging
 import math
 import numpy
 from okgraph.core import DEFAULT_DICTIONARY_NAME
-from okgraph.indexing import DEFAULT_INDEX_FOLDER, FIELD_ID, FIELD_CONTENT
+from okgraph.dictionary import corpus_statistics, CorpusDictionary
+from okgraph.indexing import DEFAULT_INDEX_FOLDER, documents_stride, \
+    FIELD_CONTENT, FIELD_OFFSET, FIELD_POSITION, DocumentReader, \
+    find_cooccurrences, previous_document, process_searcher_pool, \
+    searcher_executor, SearcherPool
+from okgraph.label_scoring import RankedLabels
+from okgraph.label_table import write_label_table
+from okgraph.results_cache import ResultsCache
 from okgraph.utils import logger
 import operator
-from typing import Dict, List, Tuple
-from whoosh import index
-from whoosh.qparser import QueryParser
+from os import path
+import random
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from whoosh.searching import Searcher
+
+LABEL_TABLE_BATCH_SIZE: int = 64
+"""int: number of words windowed together while generating a label table."""
+WINDOWS_STATISTICS_SIZE: int = 1024
+"""int: number of words the windows statistics can initially count, before
+being enlarged."""
 
 
 class SlidingWindows:
@@ -33,6 +50,11 @@ class SlidingWindows:
                  corpus_dictionary_path: str = DEFAULT_DICTIONARY_NAME,
                  window_size: int = 14,
                  noise_threshold: float = 0.10,
+                 searcher_pool: SearcherPool = None,
+                 max_windows: int = None,
+                 sampling_seed: int = 0,
+                 results_cache: ResultsCache = None,
+                 lean: bool = False,
                  ):
         """The constructor creates a SlidingWindows object.
 
@@ -56,6 +78,260 @@ class SlidingWindows:
                 windows are high rated and probably not characteristic for the
                 windows. The noise and TF-IDF statistics are not bound, so that
                 a word can score a high TF-IDF and yet a high noise.
+            searcher_pool (SearcherPool): pool of searchers of the indexed
+                corpus. If None, the index is opened just for this object.
+            max_windows (int): maximum number of windows. If the target words
+                have more windows, a uniform sample of the windows is kept:
+                all the windows are extracted, but just the sampled ones are
+                kept in memory and processed. If None, all the windows are
+                kept.
+            sampling_seed (int): seed of the windows sampling, so that the
+                same windows are sampled for the same target words.
+            results_cache (ResultsCache): cache of the results of the index.
+                If the results of the same windowing are found in the cache,
+                the windows are not extracted again and just the results are
+                available. If None, the results are not cached.
+            lean (bool): if True, the windows and the intermediate statistics
+                are discarded once the results are obtained, so that just the
+                results are kept in memory.
+
+        """
+        self._setup(target_words, corpus_index_path, corpus_dictionary_path,
+                    window_size, noise_threshold, searcher_pool, max_windows,
+                    sampling_seed, results_cache, lean)
+        if not self._load_cached_results():
+            self._windowing([self])
+
+    @classmethod
+    def batch(cls,
+              targets: List[Tuple[str, ...]],
+              corpus_index_path: str = DEFAULT_INDEX_FOLDER,
+              corpus_dictionary_path: str = DEFAULT_DICTIONARY_NAME,
+              window_size: int = 14,
+              noise_threshold: float = 0.10,
+              searcher_pool: SearcherPool = None,
+              max_windows: int = None,
+              sampling_seed: int = 0,
+              results_cache: ResultsCache = None,
+              lean: bool = False,
+              num_processes: int = 1,
+              executor: ProcessPoolExecutor = None
+              ) -> List["SlidingWindows"]:
+        """Creates the SlidingWindows objects of many targets at once.
+
+        The objects are equal to the ones created one by one, but the index is
+        searched with a single searcher, the documents matched by more targets
+        are read just once and the corpus statistics of all the windows words
+        are retrieved together.
+        With more processes, the targets are windowed concurrently, every
+        process searching the index with its own searchers, and the objects
+        keep just the results (like in lean mode).
+
+        Args:
+            targets (List[Tuple[str, ...]]): list of tuples of word/words whose
+                context has/have to be inspected.
+            corpus_index_path (str): path of the indexed corpus.
+            corpus_dictionary_path (str): path of the corpus dictionary.
+            window_size (int): size of the windows containing the target
+                word/words.
+            noise_threshold (float): upper bound of the noise statistic value
+                to accept a word as a valid label.
+            searcher_pool (SearcherPool): pool of searchers of the indexed
+                corpus. If None, the index is opened just for these objects.
+            max_windows (int): maximum number of windows of every target.
+            sampling_seed (int): seed of the windows sampling.
+            results_cache (ResultsCache): cache of the results of the index.
+                If None, the results are not cached.
+            lean (bool): if True, just the results are kept in memory.
+            num_processes (int): number of processes used to window the
+                targets. Ignored if an executor is provided.
+            executor (ProcessPoolExecutor): pool of processes used to window
+                the targets, kept alive between the batches (see
+                :func:`okgraph.indexing.searcher_executor`). If None, a pool
+                of num_processes processes is created just for these objects.
+
+        Returns:
+            List[SlidingWindows]: the SlidingWindows object of every target,
+                in the same order of the targets.
+
+        """
+        if num_processes < 1:
+            raise ValueError(f"num_processes must be a positive int")
+
+        sliding_windows = []
+        for target_words in targets:
+            windows = cls.__new__(cls)
+            windows._setup(target_words, corpus_index_path,
+                           corpus_dictionary_path, window_size,
+                           noise_threshold, searcher_pool, max_windows,
+                           sampling_seed, results_cache, lean)
+            sliding_windows.append(windows)
+
+        uncached_windows = [windows for windows in sliding_windows
+                            if not windows._load_cached_results()]
+        if len(uncached_windows) < 2 or \
+                (executor is None and num_processes == 1):
+            cls._windowing(uncached_windows)
+        elif executor is not None:
+            cls._parallel_windowing(uncached_windows, executor)
+        else:
+            with searcher_executor(
+                    corpus_index_path,
+                    min(num_processes, len(uncached_windows))) as executor:
+                cls._parallel_windowing(uncached_windows, executor)
+        return sliding_windows
+
+    @classmethod
+    def multi_size(cls,
+                   target_words: Tuple[str, ...],
+                   window_sizes: List[int],
+                   corpus_index_path: str = DEFAULT_INDEX_FOLDER,
+                   corpus_dictionary_path: str = DEFAULT_DICTIONARY_NAME,
+                   noise_threshold: float = 0.10,
+                   searcher_pool: SearcherPool = None,
+                   max_windows: int = None,
+                   sampling_seed: int = 0,
+                   results_cache: ResultsCache = None,
+                   lean: bool = False,
+                   ) -> Dict[int, "SlidingWindows"]:
+        """Creates the SlidingWindows objects of the same target words for
+        many window sizes at once.
+
+        The index is searched just once, with the largest window size, and the
+        windows of every size are extracted from the same matched documents.
+        The objects are equal to the ones created one by one.
+
+        Args:
+            target_words (Tuple[str, ...]): tuple of word/words whose context
+                has/have to be inspected.
+            window_sizes (List[int]): sizes of the windows containing the
+                target word/words.
+            corpus_index_path (str): path of the indexed corpus.
+            corpus_dictionary_path (str): path of the corpus dictionary.
+            noise_threshold (float): upper bound of the noise statistic value
+                to accept a word as a valid label.
+            searcher_pool (SearcherPool): pool of searchers of the indexed
+                corpus. If None, the index is opened just for these objects.
+            max_windows (int): maximum number of windows of every size.
+            sampling_seed (int): seed of the windows sampling.
+            results_cache (ResultsCache): cache of the results of the index.
+                If None, the results are not cached.
+            lean (bool): if True, just the results are kept in memory.
+
+        Returns:
+            Dict[int, SlidingWindows]: dictionary {window size: SlidingWindows}
+                sorted by increasing window size.
+
+        """
+        if not window_sizes:
+            raise ValueError(f"window_sizes must contain at least one size")
+
+        sliding_windows = {}
+        for window_size in sorted(set(window_sizes)):
+            windows = cls.__new__(cls)
+            windows._setup(target_words, corpus_index_path,
+                           corpus_dictionary_path, window_size,
+                           noise_threshold, searcher_pool, max_windows,
+                           sampling_seed, results_cache, lean)
+            sliding_windows[window_size] = windows
+
+        cls._windowing([windows for windows in sliding_windows.values()
+                        if not windows._load_cached_results()])
+        return sliding_windows
+
+    @classmethod
+    def iter_windows(cls,
+                     target_words: Tuple[str, ...],
+                     statistics: "WindowsStatistics",
+                     corpus_index_path: str = DEFAULT_INDEX_FOLDER,
+                     corpus_dictionary_path: str = DEFAULT_DICTIONARY_NAME,
+                     window_size: int = 14,
+                     searcher_pool: SearcherPool = None,
+                     max_windows: int = None,
+                     sampling_seed: int = 0,
+                     ) -> Iterator[numpy.ndarray]:
+        """Yields the windows of the target words one at a time, updating the
+        statistics of their words.
+
+        The matched documents are read while the windows are consumed, so that
+        neither the documents nor the windows are kept in memory (except for
+        the sampled windows, if the number of windows is limited).
+
+        Args:
+            target_words (Tuple[str, ...]): tuple of word/words whose context
+                has/have to be inspected.
+            statistics (WindowsStatistics): the statistics updated with the
+                words of every window.
+            corpus_index_path (str): path of the indexed corpus.
+            corpus_dictionary_path (str): path of the corpus dictionary.
+            window_size (int): size of the windows containing the target
+                word/words.
+            searcher_pool (SearcherPool): pool of searchers of the indexed
+                corpus. If None, the index is opened just for these windows.
+            max_windows (int): maximum number of windows.
+            sampling_seed (int): seed of the windows sampling.
+
+        Yields:
+            numpy.ndarray: the token IDs (see
+                :attr:`WindowsStatistics.vocabulary`) of the words of every
+                window.
+
+        """
+        windows = cls.__new__(cls)
+        windows._setup(target_words, corpus_index_path, corpus_dictionary_path,
+                       window_size, None, searcher_pool, max_windows,
+                       sampling_seed, None, True)
+        if searcher_pool is None:
+            searcher_pool = SearcherPool(corpus_index_path)
+
+        document_stride = documents_stride(corpus_index_path)
+        try:
+            with searcher_pool.searcher() as searcher:
+                # If the index does not store the documents content, the
+                # documents are read from the corpus file
+                reader = None
+                if FIELD_OFFSET in searcher.schema:
+                    reader = DocumentReader(corpus_index_path)
+                try:
+                    # Sort the documents, along with the documents preceding
+                    # them, by position in the corpus, reading their content
+                    # just when the windows are consumed
+                    documents = sorted(
+                        (searcher.stored_fields(document).get(FIELD_POSITION)
+                         or 0, document, positions)
+                        for document, positions in find_cooccurrences(
+                            searcher, windows._target_words, window_size,
+                            positions=True))
+                    documents = sorted(documents + windows._context_documents(
+                        searcher, reader, documents, {}, window_size,
+                        document_stride))
+                    yield from statistics.stream(windows._create_windows(
+                        windows._read_document(searcher, reader, document) +
+                        (positions,) for _, document, positions in documents))
+                finally:
+                    if reader is not None:
+                        reader.close()
+        finally:
+            if windows._searcher_pool is None:
+                searcher_pool.close()
+
+    def _setup(self,
+               target_words: Tuple[str, ...],
+               corpus_index_path: str,
+               corpus_dictionary_path: str,
+               window_size: int,
+               noise_threshold: float,
+               searcher_pool: SearcherPool,
+               max_windows: int,
+               sampling_seed: int,
+               results_cache: ResultsCache,
+               lean: bool
+               ) -> None:
+        """Checks the parameters of the windowing and loads the corpus
+        dictionary (see the constructor).
+
+        Returns:
+            None
 
         """
         if not isinstance(window_size, int):
@@ -71,38 +347,259 @@ class SlidingWindows:
             raise ValueError(f"target_words contains {len(target_words)} words "
                              f"that cannot fit in windows of the specified "
                              f"size ({window_size})")
+        if max_windows is not None and max_windows < 1:
+            raise ValueError(f"max_windows must be a positive int")
 
         logger.info(f"{target_words}: "
                     f"Start windowing of target words")
 
         self._target_words = list(target_words)
         self._window_size = window_size
+        self._noise_threshold = noise_threshold
         self._corpus_index_path = corpus_index_path
+        self._corpus_dictionary_path = corpus_dictionary_path
+        self._searcher_pool = searcher_pool
+        self._max_windows = max_windows
+        self._sampling_seed = sampling_seed
+        self._results_cache = results_cache
+        self._lean = lean
 
         logger.info(f"{self._target_words}: "
                     f"Loading corpus dictionary")
-        self._corpus_dict = dict(
-            (numpy.load(corpus_dictionary_path, allow_pickle=True)).item()
-        )
+        self._corpus_statistics = corpus_statistics(corpus_dictionary_path)
+        self._corpus_dict = self._corpus_statistics.dictionary
         self._corpus_total_occurrences = \
-            self._total_occurrences(self._corpus_dict)
+            self._corpus_statistics.total_occurrences
 
-        logger.debug(f"{self._target_words}: "
-                     f"Building corpus inverse frequency dictionary")
+        # The inverse frequencies are evaluated just for the requested words
         self.corpus_inverse_frequency_dict = \
-            self._inverse_frequency_dictionary(self._corpus_dict,
-                                               self._corpus_total_occurrences)
+            _InverseFrequencies(self._corpus_dict)
+
+        self._cache_key = {"target_words": self._target_words,
+                           "window_size": window_size,
+                           "noise_threshold": noise_threshold,
+                           "max_windows": max_windows,
+                           "sampling_seed": sampling_seed,
+                           "dictionary": path.abspath(corpus_dictionary_path),
+                           "dictionary_fingerprint":
+                               self._corpus_statistics.fingerprint}
+
+    def _load_cached_results(self) -> bool:
+        """Reuses the results of the same windowing, if cached.
+
+        Returns:
+            bool: True if the results have been found in the cache.
+
+        """
+        if self._results_cache is None:
+            return False
+        cached_results = self._results_cache.get(self._cache_key)
+        if cached_results is None:
+            return False
 
         logger.info(f"{self._target_words}: "
-                    f"Creating windows")
-        (self._windows_list, self._windows_dict) = self._create_windows()
+                    f"Results found in cache {self._results_cache}")
+        self._set_results(cached_results)
+        return True
+
+    def _set_results(self, results: Dict[str, float]) -> None:
+        """Sets the results obtained without extracting the windows.
+
+        Args:
+            results (Dict[str, float]): the results, in any order.
+
+        Returns:
+            None
 
+        """
+        self._discard_windows()
+        self._windows_total_occurrences = 0
+        self._results_dict = RankedLabels(results)
+
+    def _discard_windows(self) -> None:
+        """Discards the windows and the intermediate statistics, keeping just
+        the results.
+
+        Returns:
+            None
+
+        """
+        self._windows_statistics = None
+        self._windows_list = []
+        self._windows_dict = {}
+        self._windows_occurrence_dict = {}
+        self._windows_frequency_dict = {}
+        self._noise_dict = {}
+        self._tf_idf_dict = {}
+
+    @staticmethod
+    def _parallel_windowing(sliding_windows: List["SlidingWindows"],
+                            executor: ProcessPoolExecutor
+                            ) -> None:
+        """Obtains the results of many SlidingWindows objects concurrently,
+        windowing every object in a pool of processes.
+
+        Args:
+            sliding_windows (List[SlidingWindows]): the objects whose results
+                have to be obtained. They share the same windowing parameters.
+            executor (ProcessPoolExecutor): the pool of processes (see
+                :func:`okgraph.indexing.searcher_executor`).
+
+        Returns:
+            None
+
+        """
+        first = sliding_windows[0]
+        parameters = (first._corpus_index_path, first._corpus_dictionary_path,
+                      first._window_size, first._noise_threshold,
+                      first._max_windows, first._sampling_seed)
+        logger.info(f"Windowing {len(sliding_windows)} targets in a pool of"
+                    f" processes")
+        results = executor.map(
+            _windowing_results,
+            [tuple(windows._target_words) for windows in sliding_windows],
+            *(itertools.repeat(parameter) for parameter in parameters))
+        for windows, windows_results in zip(sliding_windows, results):
+            windows._set_results(windows_results)
+            if windows._results_cache is not None:
+                windows._results_cache.put(windows._cache_key,
+                                           windows_results)
+
+    @staticmethod
+    def _windowing(sliding_windows: List["SlidingWindows"]) -> None:
+        """Extracts and processes the windows of many SlidingWindows objects,
+        sharing the same index and corpus dictionary.
+
+        Args:
+            sliding_windows (List[SlidingWindows]): the objects whose windows
+                have to be extracted.
+
+        Returns:
+            None
+
+        """
+        if not sliding_windows:
+            return
+
+        # Open the indexed corpus to search for the documents containing the
+        # target words, unless a pool of searchers has been provided.
+        searcher_pool = sliding_windows[0]._searcher_pool
+        index_path = sliding_windows[0]._corpus_index_path
+        if searcher_pool is None:
+            searcher_pool = SearcherPool(index_path)
+
+        # Find the documents containing all the target words, in any order,
+        # inside a window of the specified size, along with the positions of
+        # the target words.
+        # The same target words are searched just once with the largest size:
+        # the documents matching a smaller size are a subset of them, and the
+        # extraction finds no windows in the other ones.
+        # If the index does not store the documents content, the documents
+        # are identified by their offset and read from the corpus file.
+        # The documents matched by more targets are retrieved just once, along
+        # with their position in the corpus (0 if not stored).
+        # The documents preceding the matched ones are retrieved too, if their
+        # target words can change the windows.
+        window_sizes = {}
+        targets = {}
+        for windows in sliding_windows:
+            target_words = tuple(windows._target_words)
+            window_sizes[target_words] = max(
+                window_sizes.get(target_words, 0), windows._window_size)
+            targets[target_words] = windows
+        document_stride = documents_stride(index_path)
+        with searcher_pool.searcher() as searcher:
+            reader = None
+            if FIELD_OFFSET in searcher.schema:
+                reader = DocumentReader(index_path)
+            matches = {}
+            for target_words, window_size in window_sizes.items():
+                logger.info(f"{list(target_words)}: "
+                            f"Creating windows")
+                matches[target_words] = find_cooccurrences(
+                    searcher, list(target_words), window_size, positions=True)
+            documents_results = {}
+            for document in sorted({document
+                                    for target_matches in matches.values()
+                                    for document, _ in target_matches}):
+                documents_results[document] = SlidingWindows._read_document(
+                    searcher, reader, document)
+            documents = {}
+            for target_words, window_size in window_sizes.items():
+                target_documents = sorted(
+                    (documents_results[document][0], document, positions)
+                    for document, positions in matches[target_words])
+                documents[target_words] = sorted(
+                    target_documents +
+                    targets[target_words]._context_documents(
+                        searcher, reader, target_documents, documents_results,
+                        window_size, document_stride))
+            if reader is not None:
+                reader.close()
+        if sliding_windows[0]._searcher_pool is None:
+            searcher_pool.close()
+
+        # Update the statistics of the windows while they are extracted,
+        # keeping the windows just if requested.
+        # The documents are sorted by position, so that the overlaid documents
+        # can be joined.
+        for windows in sliding_windows:
+            windows._windows_statistics = WindowsStatistics()
+            windows._windows_list = []
+            for window in windows._create_windows(
+                    documents_results[document] + (positions,)
+                    for _, document, positions in
+                    documents[tuple(windows._target_words)]):
+                windows._windows_statistics.add(window)
+                if not windows._lean:
+                    windows._windows_list.append(window)
+
+        # Get the corpus statistics of the words of all the windows (the words
+        # pruned from the corpus dictionary are estimated)
+        words = list(dict.fromkeys(itertools.chain.from_iterable(
+            windows._windows_statistics.vocabulary
+            for windows in sliding_windows)))
+        word_ids = {word: word_id for word_id, word in enumerate(words)}
+        (corpus_occurrences, corpus_idf) = \
+            sliding_windows[0]._corpus_statistics.word_statistics(words)
+
+        for windows in sliding_windows:
+            windows._process_windows(word_ids, corpus_occurrences, corpus_idf)
+            if windows._results_cache is not None:
+                windows._results_cache.put(windows._cache_key,
+                                           windows._results_dict.unranked())
+
+    def _process_windows(self,
+                         word_ids: Dict[str, int],
+                         corpus_occurrences: numpy.ndarray,
+                         corpus_idf: numpy.ndarray
+                         ) -> None:
+        """Calculates the statistics of the words in the windows, selecting
+        the most characteristic ones as results.
+
+        Args:
+            word_ids (Dict[str, int]): dictionary {word: position} of the
+                windows words in the corpus statistics.
+            corpus_occurrences (numpy.ndarray): occurrences of the windows
+                words in the corpus.
+            corpus_idf (numpy.ndarray): logarithm of the inverse frequency of
+                the windows words in the corpus.
+
+        Returns:
+            None
+
+        """
         logger.info(f"{self._target_words}: "
                     f"Processing windows data")
+        windows_statistics = self._windows_statistics
         logger.debug(f"{self._target_words}: "
-                     f"Number of windows: {len(self._windows_list)}")
+                     f"Number of windows: {windows_statistics.windows_count}")
+
+        if windows_statistics.windows_count > 0:
+            vocabulary = windows_statistics.vocabulary
+            self._windows_dict = dict(zip(
+                vocabulary, windows_statistics.occurrences().tolist()))
 
-        if len(self._windows_list) > 0:
             logger.debug(f"{self._target_words}: "
                          f"Removing target words from windows dictionary")
             for word in self._target_words:
@@ -117,136 +614,383 @@ class SlidingWindows:
                          f"Total windows occurrences: "
                          f"{self._windows_total_occurrences}")
 
+            # Select the corpus statistics of the windows words
+            windows_words = list(self._windows_dict)
+            statistics = numpy.fromiter(
+                (word_ids[word] for word in windows_words),
+                dtype=numpy.int64, count=len(windows_words))
+            corpus_occurrences = corpus_occurrences[statistics]
+            corpus_idf = corpus_idf[statistics]
+            labels = numpy.fromiter(
+                (vocabulary[word] for word in windows_words),
+                dtype=numpy.int64, count=len(windows_words))
+
             logger.debug(f"{self._target_words}: "
                          f"Building windows occurrence dictionary")
+            windows_occurrences = windows_statistics.presences()[labels]
             self._windows_occurrence_dict = \
-                self._windows_occurrence_dictionary(self._windows_dict,
-                                                    self._windows_list)
+                dict(zip(windows_words, windows_occurrences.tolist()))
 
             logger.debug(f"{self._target_words}: "
                          f"Building windows frequency dictionary")
+            words_occurrences = windows_statistics.occurrences()[labels]
+            windows_frequencies = self._frequencies(
+                words_occurrences, self._windows_total_occurrences)
             self._windows_frequency_dict = \
-                self._frequency_dictionary(self._windows_dict,
-                                           self._windows_total_occurrences)
+                dict(zip(windows_words, windows_frequencies.tolist()))
 
             logger.debug(f"{self._target_words}: "
                          f"Building windows noise dictionary")
-            self._noise_dict = \
-                self._noise_dictionary(self._windows_dict,
-                                       self._windows_total_occurrences,
-                                       self._corpus_dict,
-                                       self._corpus_total_occurrences)
+            noise = self._noise(windows_frequencies, corpus_occurrences,
+                                self._corpus_total_occurrences)
+            self._noise_dict = dict(zip(windows_words, noise.tolist()))
 
             logger.debug(f"{self._target_words}: "
                          f"Building windows TF-IDF dictionary")
-            self._tf_idf_dict = \
-                self._tf_idf_dictionary(self._windows_occurrence_dict,
-                                        self._windows_frequency_dict,
-                                        self.corpus_inverse_frequency_dict,
-                                        self._windows_list)
+            tf_idf = self._tf_idf(windows_occurrences, corpus_idf,
+                                  windows_statistics.windows_count).tolist()
+            self._tf_idf_dict = dict(zip(windows_words, tf_idf))
 
             logger.debug(f"{self._target_words}: "
                          f"Cleaning windows TF-IDF dictionary")
-            cleaned_tf_idf_dict = \
-                self._clean_results(self._target_words, self._windows_dict,
-                                    self._tf_idf_dict, self._noise_dict,
-                                    noise_threshold)
-
-            logger.debug(f"{self._target_words}: "
-                         f"Sorting cleaned TF-IDF dictionary to obtain labels")
-            self._results_dict = \
-                {k: v for k, v in
-                 sorted(cleaned_tf_idf_dict.items(),
-                        key=operator.itemgetter(1),
-                        reverse=True)
-                 }
+            significant_words = self._clean_results(
+                self._target_words, windows_words, words_occurrences,
+                windows_statistics.label_words()[labels], noise,
+                self._noise_threshold)
+            # The labels are sorted just when all of them are requested
+            self._results_dict = RankedLabels(
+                {windows_words[i]: tf_idf[i]
+                 for i in significant_words.tolist()})
         else:
             logger.info(f"{self._target_words}: "
                         f"No windows found in corpus")
+            self._windows_dict = {}
             self._windows_total_occurrences = 0
             self._windows_occurrence_dict = {}
             self._windows_frequency_dict = {}
             self._noise_dict = {}
-            self._results_dict = {}
+            self._results_dict = RankedLabels({})
+
+        if self._lean:
+            self._discard_windows()
 
     def __str__(self) -> str:
         return "The windows of " + " and ".join(self._target_words)
 
-    def _create_windows(self) -> Tuple[List[List[str]], Dict[str, int]]:
-        """Extracts the windows from the corpus to represent the context of the
-        target words. Target words are centered in the windows.
+    def _create_windows(self,
+                        documents_results: Iterable[
+                            Tuple[int, str, Optional[List[int]]]]
+                        ) -> Iterable[List[str]]:
+        """Extracts the windows from the matched documents to represent the
+        context of the target words. Target words are centered in the windows.
+
+        Args:
+            documents_results (Iterable[Tuple[int, str, Optional[List[int]]]]):
+                the position in the corpus (0 if not stored in the index), the
+                content and the positions of the target words (None if not
+                known) of the documents of the indexed corpus, sorted by
+                position.
 
         Returns:
-            Tuple[List[List[str]], Dict[str, int]]: the list of windows
-                containing the target words and the dictionary
-                {word: occurrences} related to those windows.
+            Iterable[List[str]]: the windows containing the target words, in
+                corpus order.
 
         """
-        # Limit of parsed documents.
-        limit = None
-
-        # Open the indexed corpus to search for the documents containing the
-        # target words.
-        ix = index.open_dir(self._corpus_index_path)
-
-        # Define all the possible sequences of target words.
-        target_words_permutations = \
-            list(itertools.permutations(self._target_words,
-                                        len(self._target_words)))
-
-        # Define the queries to search the target words in the indexed text:
-        # the query will match the documents containing the words in the same
-        # order of the permutation at a max distance defined by the integer
-        # following the '~' character.
-        text_queries = \
-            ['"'+' '.join(permutation)+'"~'+str(self._window_size)
-             for permutation in target_words_permutations]
-        parsed_queries = \
-            [QueryParser(FIELD_CONTENT, ix.schema).parse(u''+text_query)
-             for text_query in text_queries]
-
-        # Find the documents containing the target words.
-        # Save the documents content in a dictionary using their id as a key:
-        # this way the documents matching more than one permutation of the
-        # target words are counted just one time.
-        documents_results = {}
-        with ix.searcher() as searcher:
-            queries_results = \
-                [searcher.search(parsed_query, limit=limit)
-                 for parsed_query in parsed_queries]
-            for query_results in queries_results:
-                for result in query_results:
-                    if result[FIELD_ID] not in documents_results:
-                        documents_results[result[FIELD_ID]] = \
-                            result[FIELD_CONTENT]
-        # Convert the dictionary into a list of windows
-        documents_results = list(documents_results.values())
         # Filter the content of every matched document:
-        # search and extract from every document the window/windows in which the
-        # target words appear closely.
-        windows_list, windows_dict = self._window_extraction(documents_results)
-        return windows_list, windows_dict
+        # find the bounds of the window/windows in which the target words
+        # appear closely, and slice them from the joined documents.
+        # If there are too many windows, sample them
+        return self._sample_windows(
+            words[max(i_first, 0):i_last + 1]
+            for words, offsets in self._join_documents(documents_results)
+            for i_first, i_last in self._window_bounds(words, offsets))
 
-    def _window_extraction(self,
-                           documents_results: List[str]
-                           ) -> Tuple[List[List[str]], Dict[str, int]]:
-        """Extracts the windows from the list of documents of the indexed
-        corpus. Windows are created centering the target words in a sequence of
-        words with fixed maximum size.
+    @staticmethod
+    def _read_document(searcher: Searcher,
+                       reader: Optional[DocumentReader],
+                       document: int
+                       ) -> Tuple[int, str]:
+        """Reads the position in the corpus and the content of a document of
+        the index.
+
+        Args:
+            searcher (Searcher): the searcher of the index.
+            reader (Optional[DocumentReader]): the reader of the corpus file,
+                if the index does not store the content of the documents.
+            document (int): the number of the document in the index.
+
+        Returns:
+            Tuple[int, str]: the position in the corpus (0 if not stored in the
+                index) and the content of the document.
+
+        """
+        fields = searcher.stored_fields(document)
+        if reader is None:
+            return fields.get(FIELD_POSITION) or 0, fields[FIELD_CONTENT]
+        return (fields.get(FIELD_POSITION) or 0,
+                reader.document(fields[FIELD_OFFSET]))
+
+    def _target_positions(self,
+                          words: List[str],
+                          positions: Optional[List[int]]
+                          ) -> List[int]:
+        """Finds the positions of the target words in the words of a document.
 
         Args:
-            documents_results (List[str]): list of matched documents of
-                the indexed corpus.
+            words (List[str]): the words of the document.
+            positions (Optional[List[int]]): the positions of the target words
+                found by the index, or None to scan the words.
 
         Returns:
-            Tuple[List[List[str]], Dict[str, int]]: the list of windows (a 
-                window is a list of words) and their occurrence dictionary.
+            List[int]: the sorted positions of the target words.
 
         """
-        windows_list = []
-        windows_dict = {}
-        for content in documents_results:
-            content = content.split()
+        if positions is None:
+            return [i for i, word in enumerate(words)
+                    if word in self._target_words]
+        return [i for i in positions
+                if i < len(words) and words[i] in self._target_words]
+
+    def _context_documents(self,
+                           searcher: Searcher,
+                           reader: Optional[DocumentReader],
+                           documents: List[
+                               Tuple[int, int, Optional[List[int]]]],
+                           documents_results: Dict[int, Tuple[int, str]],
+                           window_size: int,
+                           document_stride: Optional[int]
+                           ) -> List[Tuple[int, int, None]]:
+        """Finds the documents preceding the matched documents whose target
+        words can change the windows extracted from them.
+
+        The windows are extracted as if the whole corpus was scanned, so a
+        match of the target words started before a sequence of overlaid
+        matched documents can complete or reset inside it. The preceding
+        documents are added until a document without target words in its
+        first 'window_size' words.
+
+        Args:
+            searcher (Searcher): the searcher of the index.
+            reader (Optional[DocumentReader]): the reader of the corpus file,
+                if the index does not store the content of the documents.
+            documents (List[Tuple[int, int, Optional[List[int]]]]): the
+                position in the corpus, the number and the positions of the
+                target words of the matched documents, sorted by position.
+            documents_results (Dict[int, Tuple[int, str]]): the position in
+                the corpus and the content of the documents already read, by
+                number. The documents read are added to it.
+            window_size (int): the largest size of the windows.
+            document_stride (Optional[int]): the distance between the positions
+                of two consecutive documents, None if not known.
+
+        Returns:
+            List[Tuple[int, int, None]]: the position in the corpus and the
+                number of the preceding documents.
+
+        """
+        if document_stride is None:
+            return []
+
+        matched_documents = {document for _, document, _ in documents}
+        context_documents = []
+        previous_position = None
+        for position, document, positions in documents:
+            # Skip the documents overlaid to the previous matched document, or
+            # starting the corpus
+            run_start = position > 0 and \
+                previous_position != max(0, position - document_stride)
+            previous_position = position
+            while run_start:
+                if document not in documents_results:
+                    documents_results[document] = \
+                        self._read_document(searcher, reader, document)
+                target_positions = self._target_positions(
+                    documents_results[document][1].split(), positions)
+                if not target_positions or \
+                        target_positions[0] >= window_size:
+                    break
+                document = previous_document(
+                    searcher, document, document_stride)
+                if document is None or document in matched_documents:
+                    break
+                position = max(0, position - document_stride)
+                positions = None
+                context_documents.append((position, document, None))
+        return context_documents
+
+    def _join_documents(self,
+                        documents_results: Iterable[
+                            Tuple[int, str, Optional[List[int]]]]
+                        ) -> Iterator[Tuple[List[str], List[int]]]:
+        """Joins the overlaid documents in sequences of consecutive words of
+        the corpus, so that every window is extracted just once and the
+        windows crossing the boundaries of a document are not cut.
+
+        The documents are joined through their position in the corpus: if the
+        position is not stored in the index, every document is a sequence on
+        its own. The target words are identified by their offset in the
+        sequence, so that the target words in the overlay of two documents are
+        counted once.
+
+        Args:
+            documents_results (Iterable[Tuple[int, str, Optional[List[int]]]]):
+                the position in the corpus (0 if not stored in the index), the
+                content and the positions of the target words (None if not
+                known) of the documents, sorted by position.
+
+        Yields:
+            Tuple[List[str], List[int]]: the words of every sequence of
+                overlaid documents and the sorted offsets of the target words
+                in it.
+
+        """
+        words = []
+        offsets = set()
+        # Position in the corpus of the first word of the sequence
+        start = None
+        # Position in the corpus of the word following the sequence
+        end = None
+        for position, content, positions in documents_results:
+            document_words = content.split()
+            if end is not None and 0 < position <= end:
+                words.extend(document_words[end - position:])
+            else:
+                if words:
+                    yield words, sorted(offsets)
+                words = document_words
+                offsets = set()
+                start = position
+            offsets.update(
+                position - start + i
+                for i in self._target_positions(document_words, positions))
+            end = max(end or 0, position + len(document_words))
+        if words:
+            yield words, sorted(offsets)
+
+    def _window_bounds(self,
+                       words: List[str],
+                       offsets: List[int]
+                       ) -> Iterator[Tuple[int, int]]:
+        """Finds the bounds of the windows in a sequence of words, visiting
+        just the target words. The windows are the same extracted by
+        '_window_extraction' from the whole sequence.
+
+        Args:
+            words (List[str]): the words of the sequence.
+            offsets (List[int]): the sorted offsets of the target words in the
+                sequence.
+
+        Yields:
+            Tuple[int, int]: the index of the first word (negative if the
+                window is cut by the start of the sequence) and of the last
+                word of every window.
+
+        """
+        matched_target_words = []
+        # Index of the first target word match
+        i_first_match = None
+        # Index of the last word of the window, when all the target words are
+        # matched
+        i_window_end = None
+        # Size of the window borders
+        offset_size = None
+
+        # The end of the sequence completes the pending matches
+        for i in itertools.chain(offsets, [len(words)]):
+            # New window completed before the target word: save it and reset
+            # previous matches. The word completing the window is consumed
+            if i_window_end is not None and i_window_end <= i:
+                if i_window_end < len(words):
+                    yield i_first_match - offset_size, i_window_end
+                i_reset = i_window_end
+                matched_target_words = []
+                i_first_match = None
+                i_window_end = None
+                if i_reset == i:
+                    continue
+
+            # Exceeded maximum distance between two target words: reset the
+            # previous matches. The word exceeding the distance is consumed
+            elif matched_target_words and \
+                    i - i_first_match + 1 > self._window_size:
+                i_reset = i_first_match + self._window_size
+                matched_target_words = []
+                i_first_match = None
+                if i_reset == i:
+                    continue
+
+            if i == len(words):
+                break
+
+            # Matched a new target word
+            if words[i] not in matched_target_words:
+                matched_target_words.append(words[i])
+
+                if len(matched_target_words) == 1:
+                    i_first_match = i
+                if len(matched_target_words) == len(self._target_words):
+                    center_size = i - i_first_match + 1
+                    offset_size = \
+                        math.floor((self._window_size - center_size) / 2)
+                    i_window_end = i + offset_size
+                    # Window completed by the target word
+                    if offset_size == 0:
+                        yield i_first_match, i
+                        matched_target_words = []
+                        i_first_match = None
+                        i_window_end = None
+
+    def _sample_windows(self,
+                        windows: Iterable[List[str]]
+                        ) -> Iterable[List[str]]:
+        """Samples the windows to keep at most the maximum number of windows.
+        Every window has the same probability to be sampled (reservoir
+        sampling), and the sample depends just on the windows and the sampling
+        seed.
+
+        Args:
+            windows (Iterable[List[str]]): the windows, in corpus order.
+
+        Returns:
+            Iterable[List[str]]: the sampled windows, in corpus order.
+
+        """
+        if self._max_windows is None:
+            return windows
+
+        generator = random.Random(self._sampling_seed)
+        sample = []
+        windows_count = 0
+        for windows_count, window in enumerate(windows, 1):
+            if windows_count <= self._max_windows:
+                sample.append((windows_count, window))
+            else:
+                i = generator.randrange(windows_count)
+                if i < self._max_windows:
+                    sample[i] = (windows_count, window)
+        if windows_count > self._max_windows:
+            logger.debug(f"{self._target_words}: "
+                         f"Sampled {self._max_windows} of {windows_count} "
+                         f"windows")
+        sample.sort(key=operator.itemgetter(0))
+        return [window for _, window in sample]
+
+    def _window_extraction(self,
+                           documents_words: Iterable[List[str]]
+                           ) -> Iterator[List[str]]:
+        """Extracts the windows from the documents of the indexed corpus, one
+        document at a time. Windows are created centering the target words in a
+        sequence of words with fixed maximum size.
+
+        Args:
+            documents_words (Iterable[List[str]]): the words of the matched
+                documents of the indexed corpus.
+
+        Yields:
+            List[str]: the windows (a window is a list of words).
+
+        """
+        for content in documents_words:
             new_window = []
             matched_target_words = []
             # Index of the first target word match
@@ -288,14 +1032,8 @@ class SlidingWindows:
                 # New window completed: save it and reset previous matches
                 elif len(matched_target_words) == len(self._target_words) and \
                         i - offset_size == i_last_match:
-                    # Add the last 'window_size' words to the windows list
-                    windows_list.append(
-                        new_window[-(center_size+2*offset_size):]
-                    )
-                    # Update the dictionary with the words in the new window
-                    for window_word in windows_list[-1]:
-                        windows_dict[window_word] = \
-                            windows_dict.get(window_word, 0) + 1
+                    # Yield the last 'window_size' words
+                    yield new_window[-(center_size+2*offset_size):]
 
                     matched_target_words = []
                     i_first_match = None
@@ -303,8 +1041,6 @@ class SlidingWindows:
                     center_size = None
                     offset_size = None
 
-        return windows_list, windows_dict
-
     @staticmethod
     def _total_occurrences(dictionary: Dict[str, int]) -> int:
         """Get the total amount of words in the dictionary, or rather the sum 
@@ -324,89 +1060,30 @@ class SlidingWindows:
         return total_occurrences
 
     @staticmethod
-    def _windows_occurrence_dictionary(
-            dictionary: Dict[str, int],
-            windows: List[List[str]]
-    ) -> Dict[str, int]:
-        """Evaluates the presences of the words in the windows.
-        
-        Args:
-            dictionary (Dict[str, int]): dictionary {word: occurrences}.
-            windows (List[List[str]]): list of all the matched windows of the 
-                corpus.
-
-        Returns:
-            Dict[str, int]: dictionary {word: number of windows containing the 
-            word}
-
-        """
-        dictionary_keys = list(dictionary.keys())
-        windows_occurrence_dict = {}
-        for word in dictionary_keys:
-            for window in windows:
-                if word in window:
-                    windows_occurrence_dict[word] = \
-                        windows_occurrence_dict.get(word, 0) + 1
-
-        return windows_occurrence_dict
-
-    @staticmethod
-    def _frequency_dictionary(
-            occurrence_dictionary: Dict[str, int], 
+    def _frequencies(
+            occurrences: numpy.ndarray,
             total_occurrences: int
-    ) -> Dict[str, float]:
-        """Evaluates the frequency of every word in the dictionary.
+    ) -> numpy.ndarray:
+        """Evaluates the frequency of the words.
         The frequency of a word is obtained dividing the word occurrences by
-        the total number of word occurrences in the dictionary.
+        the total number of word occurrences.
 
         Args:
-            occurrence_dictionary (Dict[str, int]): dictionary {word:
-                occurrences}.
-            total_occurrences (int): total occurrences of the dictionary.
+            occurrences (numpy.ndarray): occurrences of the words.
+            total_occurrences (int): total occurrences of the words.
 
         Returns:
-            Dict[str, float]: dictionary {word: words frequency}
+            numpy.ndarray: frequency of the words.
 
         """
-        occurrence_dictionary_keys = list(occurrence_dictionary.keys())
-        f_dict = {}
-        for word in occurrence_dictionary_keys:
-            f_dict[word] = occurrence_dictionary.get(word) / total_occurrences
-
-        return f_dict
+        return occurrences / total_occurrences
 
     @staticmethod
-    def _inverse_frequency_dictionary(
-            occurrence_dictionary: Dict[str, int],
-            total_occurrences: int
-    ) -> Dict[str, float]:
-        """Evaluates the inverse frequency of every word in the dictionary.
-        The inverse frequency of a word is obtained from the division of the
-        total number of word occurrences in the dictionary by the word
-        occurrences.
-
-        Args:
-            occurrence_dictionary (Dict[str, int]): dictionary {word:
-                occurrences}.
-            total_occurrences (int): total occurrences of the dictionary.
-
-        Returns:
-            Dict[str, float]: dictionary {word: words inverse frequency}.
-
-        """
-        occurrence_dictionary_keys = list(occurrence_dictionary.keys())
-        if_dict = {}
-        for word in occurrence_dictionary_keys:
-            if_dict[word] = total_occurrences / occurrence_dictionary.get(word)
-        return if_dict
-
-    @staticmethod
-    def _noise_dictionary(
-            windows_dictionary: Dict[str, int],
-            windows_total_occurrences: int,
-            corpus_dictionary: Dict[str, int],
+    def _noise(
+            windows_frequencies: numpy.ndarray,
+            corpus_occurrences: numpy.ndarray,
             corpus_total_occurrences: int
-    ) -> Dict[str, float]:
+    ) -> numpy.ndarray:
         """Evaluates the importance of a word in the defined context, or rather
         how much that word is characteristic for the defined windows. The
         importance is evaluated through the 'word corpus frequency / word
@@ -415,188 +1092,137 @@ class SlidingWindows:
         rated. A logarithm function is used to scale the ratio.
 
         Args:
-            windows_dictionary (Dict[str, int]): dictionary {word: occurrences
-                of word in windows}.
-            windows_total_occurrences (int): total occurrences of the windows
-                dictionary.
-            corpus_dictionary (Dict[str, int]): dictionary {word: occurrences
-                of word in corpus}.
+            windows_frequencies (numpy.ndarray): frequency of the words in the
+                windows.
+            corpus_occurrences (numpy.ndarray): occurrences of the words in the
+                corpus (0 for the words missing from the corpus dictionary).
             corpus_total_occurrences (int):  total occurrences of the corpus
                 dictionary.
 
         Returns:
-            Dict[str, float]: the noise dictionary
-                {word: log(1 + word corpus frequency / word window frequency)}.
-
-        """
-        windows_dictionary_keys = \
-            list(windows_dictionary.keys())
-
-        noise_dict = {}
-        for word in windows_dictionary_keys:
-            # NOTE: all the words in the windows dictionary surely are in the
-            #  corpus dictionary, 'cause windows have been extracted from the
-            #  corpus. We are scrolling through the windows, so the if
-            #  statement will always be False, right?
-            if word not in corpus_dictionary:
-                # NOTE: possibly unreachable
-                noise_dict[word] = 0
-            else:
-                window_frequency = \
-                    windows_dictionary.get(word) / windows_total_occurrences
-                corpus_frequency = \
-                    corpus_dictionary.get(word) / corpus_total_occurrences
-                noise_dict[word] = \
-                    numpy.log10(1+corpus_frequency / window_frequency)
+            numpy.ndarray: the noise of the words
+                log(1 + word corpus frequency / word window frequency), 0 for
+                the words missing from the corpus dictionary.
 
-        return noise_dict
+        """
+        noise = numpy.zeros(len(windows_frequencies))
+        found = corpus_occurrences > 0
+        corpus_frequencies = \
+            corpus_occurrences[found] / corpus_total_occurrences
+        noise[found] = numpy.log10(
+            1 + corpus_frequencies / windows_frequencies[found])
+
+        return noise
 
     @staticmethod
-    def _tf_idf_dictionary(
-            windows_occurrence_dictionary: Dict[str, int],
-            windows_frequency_dictionary: Dict[str, float],
-            corpus_inverse_frequency_dictionary: Dict[str, float],
-            windows_list: List[List[str]]
-    ) -> Dict[str, float]:
-        """Evaluates the TF-IDF statistic for every word in the windows.
+    def _tf_idf(
+            windows_occurrences: numpy.ndarray,
+            corpus_idf: numpy.ndarray,
+            windows_count: int
+    ) -> numpy.ndarray:
+        """Evaluates the TF-IDF statistic for the words in the windows.
 
         Args:
-            windows_occurrence_dictionary (Dict[str, int]): dictionary {word in
-                windows: occurrences}.
-            windows_frequency_dictionary (Dict[str, float]): dictionary {word
-                in windows: frequency}.
-            corpus_inverse_frequency_dictionary (Dict[str, float]): dictionary
-                {word in corpus: inverse frequency}.
-            windows_list (List[List[str]]): list of matched windows.
+            windows_occurrences (numpy.ndarray): number of windows containing
+                the words.
+            corpus_idf (numpy.ndarray): logarithm of the inverse frequency of
+                the words in the corpus (NaN for the words missing from the
+                corpus dictionary).
+            windows_count (int): number of windows.
 
         Returns:
-            Dict[str, float]: the TF-IDF dictionary {word in window: TF-IDF}.
-
-        """
-        windows_frequency_dictionary_keys = \
-            list(windows_frequency_dictionary.keys())
-
-        tf_idf_dict = {}
-        for word in windows_frequency_dictionary_keys:
-            # NOTE: all the words in the windows dictionary surely are in the
-            #  corpus dictionary, 'cause windows have been extracted from the
-            #  corpus. We are scrolling through the windows, so none of the
-            #  conditions in the if statement will always be True, right?
-            if word not in windows_frequency_dictionary or \
-               word not in windows_occurrence_dictionary or \
-               word not in corpus_inverse_frequency_dictionary:
-                # NOTE: possibly unreachable
-                tf_idf_dict[word] = 0
-            else:
-                tf = windows_occurrence_dictionary.get(word) / len(windows_list)
-                idf = numpy.log10(corpus_inverse_frequency_dictionary.get(word))
-                tf_idf_dict[word] = tf * idf
+            numpy.ndarray: the TF-IDF of the words, 0 for the words missing
+                from the corpus dictionary.
 
-        return tf_idf_dict
+        """
+        tf = windows_occurrences / windows_count
+        return numpy.where(numpy.isnan(corpus_idf), 0, tf * corpus_idf)
 
     @staticmethod
     def _clean_results(
             target_words: List[str],
-            windows_dictionary: Dict[str, int],
-            tf_idf_dictionary: Dict[str, float],
-            noise_dictionary: Dict[str, float],
+            windows_words: List[str],
+            windows_occurrences: numpy.ndarray,
+            label_words: numpy.ndarray,
+            noise: numpy.ndarray,
             noise_threshold: float
-    ) -> Dict[str, float]:
-        """Clean the result dictionary removing the less significant words.
+    ) -> numpy.ndarray:
+        """Clean the results removing the less significant words.
         These words as treated as not significant:
             - words whose occurrences are higher than the total amount of
                unique words;
             - words shorter than 3 characters;
             - words with a noise higher than the specified threshold;
             - digits;
-        So these words are not present in the cleaned dictionary.
+        The words are filtered in a single pass over the arrays of their
+        statistics.
 
         Args:
             target_words (List[str]): list of the target words.
-            windows_dictionary (Dict[str, int]): dictionary {word in window:
-                occurrences}.
-            tf_idf_dictionary (Dict[str, float]): dictionary {word in window:
-                TF-IDF}.
-            noise_dictionary (Dict[str, float]): dictionary
-                {word: log(1 + word corpus frequency / word window frequency)}.
+            windows_words (List[str]): the words in the windows.
+            windows_occurrences (numpy.ndarray): occurrences of the words in
+                the windows.
+            label_words (numpy.ndarray): True for the words at least 3
+                characters long and not numeric.
+            noise (numpy.ndarray): log(1 + word corpus frequency / word window
+                frequency) of the words.
             noise_threshold (float): maximum 'noise' value to accept the word
                 as significant.
 
         Returns:
-            Dict[str, float]: the cleaned TF-IDF dictionary {significant word
-                in window: TF-IDF}.
+            numpy.ndarray: the indexes of the significant words, in increasing
+                order.
 
         """
-        cleaned_dictionary = dict(tf_idf_dictionary)
+        words_count = len(windows_words)
 
         # Remove the words whose occurrences are higher than the total amount
-        # of unique words
-        count_removed_words = 0
-        logger.debug(
-            f"{target_words}:"
-            f" Removing words whose occurrences are higher than the total"
-            f" amount of unique words")
-        windows_dictionary_keys = list(windows_dictionary.keys())
-        for key in windows_dictionary_keys:
-            if windows_dictionary.get(key) > len(cleaned_dictionary):
-                count_removed_words += 1
-                logger.debug(
-                    f"{target_words}: "
-                    f"Removing '{key}': "
-                    f"{windows_dictionary.get(key)} < {len(cleaned_dictionary)}"
-                )
-                cleaned_dictionary.pop(key)
-        logger.debug(f"{target_words}: Removed {count_removed_words} words")
-
-        # Remove words shorter than 3 characters
-        count_removed_words = 0
-        logger.debug(
-            f"{target_words}:"
-            f" Removing words shorter than 3 characters")
-        clean_dictionary_keys = list(cleaned_dictionary.keys())
-        for key in clean_dictionary_keys:
-            if len(key) < 3:
-                count_removed_words += 1
-                logger.debug(
-                    f"{target_words}:"
-                    f" Removing '{key}': len={len(key)} < 3")
-                cleaned_dictionary.pop(key)
-        logger.debug(f"{target_words}: Removed {count_removed_words} words")
-
-        # Remove words with a noise higher than the specified threshold
-        count_removed_words = 0
-        logger.debug(
-            f"{target_words}:"
-            f" Removing words with a noise higher than the specified threshold")
-        clean_dictionary_keys = list(cleaned_dictionary.keys())
-        for key in clean_dictionary_keys:
-            if noise_dictionary.get(key) > noise_threshold:
-                count_removed_words += 1
-                logger.debug(
-                    f"{target_words}:"
-                    f" Removing '{key}':"
-                    f" {noise_dictionary.get(key):.4f} > {noise_threshold:.2f}")
-                cleaned_dictionary.pop(key)
-        logger.debug(f"{target_words}: Removed {count_removed_words} words")
-
-        # Remove digits
-        count_removed_words = 0
-        logger.debug(f"{target_words}: Removing digits")
-        clean_dictionary_keys = list(cleaned_dictionary.keys())
-        for key in clean_dictionary_keys:
-            if str.isnumeric(key):
-                count_removed_words += 1
-                logger.debug(f"{target_words}: Removing '{key}'")
-                cleaned_dictionary.pop(key)
-        logger.debug(f"{target_words}: Removed {count_removed_words} words")
-
-        logger.debug(
-            f"{target_words}:"
-            f" Cleaned dictionary counts {len(cleaned_dictionary)} words,"
-            f" against the {len(tf_idf_dictionary)} words of the starting"
-            f" dictionary")
-
-        return cleaned_dictionary
+        # of unique words. The amount decreases while the words are removed in
+        # order, but it can't get lower than the least fixed point of the
+        # number of words exceeding it: just those words are checked in order
+        removable_count = 0
+        while True:
+            exceeding_count = int(numpy.count_nonzero(
+                windows_occurrences > words_count - removable_count))
+            if exceeding_count == removable_count:
+                break
+            removable_count = exceeding_count
+        frequent_words = numpy.zeros(words_count, dtype=bool)
+        removed_count = 0
+        for i in numpy.flatnonzero(
+                windows_occurrences > words_count - removable_count).tolist():
+            if windows_occurrences[i] > words_count - removed_count:
+                frequent_words[i] = True
+                removed_count += 1
+
+        significant = ~frequent_words & label_words & \
+            ~(noise > noise_threshold)
+
+        # Build the debug messages just if they are logged
+        if logger.isEnabledFor(logging.DEBUG):
+            removed = ~significant
+            logger.debug(
+                f"{target_words}: Removed {removed_count} words whose"
+                f" occurrences are higher than the total amount of unique"
+                f" words")
+            removed &= ~frequent_words
+            logger.debug(
+                f"{target_words}: Removed"
+                f" {numpy.count_nonzero(removed & ~label_words)} words"
+                f" shorter than 3 characters or digits")
+            logger.debug(
+                f"{target_words}: Removed"
+                f" {numpy.count_nonzero(removed & label_words)} words with a"
+                f" noise higher than {noise_threshold:.2f}")
+            removed_words = [windows_words[i]
+                             for i in numpy.flatnonzero(~significant)]
+            logger.debug(f"{target_words}: Removed words: {removed_words}")
+            logger.debug(
+                f"{target_words}: Cleaned dictionary counts"
+                f" {numpy.count_nonzero(significant)} words, against the"
+                f" {words_count} words of the starting dictionary")
+
+        return numpy.flatnonzero(significant)
 
     def get_target_words(self) -> List[str]:
         """Returns the list of target words.
@@ -606,13 +1232,14 @@ class SlidingWindows:
         """
         return self._target_words
 
-    def get_results_dict(self) -> Dict[str, float]:
+    def get_results_dict(self) -> RankedLabels:
         """Return the dictionary of labels and their TF-IDF value, related to
         the target words.
 
         Returns:
-            Dict[str, float]: the dictionary of labels and their TF-IDF value,
-                ordered for congruence through the TF-IDF statistic.
+            RankedLabels: the dictionary of labels and their TF-IDF value,
+                ordered for congruence through the TF-IDF statistic. The labels
+                are sorted just when all of them are requested.
 
         """
         return self._results_dict
@@ -633,4 +1260,302 @@ class SlidingWindows:
             if not isinstance(k, int):
                 raise TypeError(f"k must be an int")
 
-        return list(self._results_dict)[:k]
+        if k is None or k < 0:
+            return list(self._results_dict)[:k]
+        # Select the best labels without sorting all of them
+        return list(self._results_dict.top(k))
+
+
+def generate_label_table(table_file: str,
+                         corpus_index_path: str = DEFAULT_INDEX_FOLDER,
+                         corpus_dictionary_path: str = DEFAULT_DICTIONARY_NAME,
+                         top_words: int = 10000,
+                         top_labels: int = 200,
+                         window_size: int = 14,
+                         noise_threshold: float = 0.10,
+                         num_processes: int = 1
+                         ) -> None:
+    """Precomputes the labels of the most frequent words of the corpus
+    dictionary, saving them in a label table file (see
+    :class:`okgraph.label_table.LabelTable`).
+
+    The labels of every word are the results of its SlidingWindows object. Just
+    the labels with the highest scores are saved, and the labels missing from
+    the corpus dictionary are discarded.
+
+    Args:
+        table_file (str): path of the label table file.
+        corpus_index_path (str): path of the indexed corpus.
+        corpus_dictionary_path (str): path of the corpus dictionary.
+        top_words (int): number of words, the most frequent ones of the corpus
+            dictionary.
+        top_labels (int): maximum number of labels of every word. The other
+            labels are lost: the labeling of many words in the table is
+            exact just if they have at most top_labels labels.
+        window_size (int): size of the windows containing the words.
+        noise_threshold (float): upper bound of the noise statistic value to
+            accept a word as a valid label.
+        num_processes (int): number of processes used to window the words.
+
+    Returns:
+        None
+
+    """
+    if top_words < 1:
+        raise ValueError(f"top_words must be a positive int")
+    if top_labels < 1:
+        raise ValueError(f"top_labels must be a positive int")
+    if num_processes < 1:
+        raise ValueError(f"num_processes must be a positive int")
+
+    counts = corpus_statistics(corpus_dictionary_path).counts
+    word_ids = numpy.sort(
+        numpy.argsort(-counts, kind="stable")[:top_words])
+    batches = numpy.array_split(
+        word_ids, max(1, -(-len(word_ids) // LABEL_TABLE_BATCH_SIZE)))
+    logger.info(f"Generating the labels of {len(word_ids)} words in"
+                f" {table_file}")
+
+    parameters = (corpus_index_path, corpus_dictionary_path, top_labels,
+                  window_size, noise_threshold)
+    if num_processes == 1:
+        results = [_words_labels(batch, *parameters) for batch in batches]
+    else:
+        with searcher_executor(corpus_index_path, num_processes) \
+                as executor:
+            results = list(executor.map(
+                _words_labels, batches,
+                *(itertools.repeat(parameter) for parameter in parameters)))
+
+    (label_ids, scores) = zip(*results)
+    write_label_table(table_file, word_ids, numpy.concatenate(label_ids),
+                      numpy.concatenate(scores), corpus_index_path,
+                      corpus_dictionary_path, window_size, noise_threshold)
+    logger.info(f"Label table {table_file} generated")
+
+
+def _windowing_results(target_words: Tuple[str, ...],
+                       corpus_index_path: str,
+                       corpus_dictionary_path: str,
+                       window_size: int,
+                       noise_threshold: float,
+                       max_windows: int,
+                       sampling_seed: int
+                       ) -> Dict[str, float]:
+    """Gets the results of the windowing of some target words (see
+    :class:`SlidingWindows`).
+
+    Returns:
+        Dict[str, float]: the labels of the target words and their TF-IDF
+            value, not sorted.
+
+    """
+    windows = SlidingWindows(target_words,
+                             corpus_index_path=corpus_index_path,
+                             corpus_dictionary_path=corpus_dictionary_path,
+                             window_size=window_size,
+                             noise_threshold=noise_threshold,
+                             searcher_pool=process_searcher_pool(
+                                 corpus_index_path),
+                             max_windows=max_windows,
+                             sampling_seed=sampling_seed,
+                             lean=True)
+    return windows.get_results_dict().unranked()
+
+
+def _words_labels(word_ids: numpy.ndarray,
+                  corpus_index_path: str,
+                  corpus_dictionary_path: str,
+                  top_labels: int,
+                  window_size: int,
+                  noise_threshold: float
+                  ) -> Tuple[numpy.ndarray, numpy.ndarray]:
+    """Gets the labels of some words of the corpus dictionary.
+
+    Args:
+        word_ids (numpy.ndarray): dictionary IDs of the words.
+        corpus_index_path (str): path of the indexed corpus.
+        corpus_dictionary_path (str): path of the corpus dictionary.
+        top_labels (int): maximum number of labels of every word.
+        window_size (int): size of the windows containing the words.
+        noise_threshold (float): upper bound of the noise statistic value to
+            accept a word as a valid label.
+
+    Returns:
+        Tuple[numpy.ndarray, numpy.ndarray]: the dictionary IDs of the labels
+            of every word (-1 after the last label) and their scores.
+
+    """
+    dictionary = corpus_statistics(corpus_dictionary_path).dictionary
+    sliding_windows = SlidingWindows.batch(
+        [(dictionary.word(int(word_id)),) for word_id in word_ids],
+        corpus_index_path=corpus_index_path,
+        corpus_dictionary_path=corpus_dictionary_path,
+        window_size=window_size,
+        noise_threshold=noise_threshold,
+        searcher_pool=process_searcher_pool(corpus_index_path),
+        lean=True)
+
+    label_ids = numpy.full((len(word_ids), top_labels), -1, dtype=numpy.int32)
+    scores = numpy.zeros((len(word_ids), top_labels), dtype=numpy.float32)
+    for row, windows in enumerate(sliding_windows):
+        # Select the best labels found in the corpus dictionary, without
+        # sorting all of them
+        labels = windows.get_results_dict()
+        labels_count = top_labels
+        while True:
+            results = [(dictionary.word_id(label), score)
+                       for label, score in labels.top(labels_count).items()]
+            results = [result for result in results if result[0] >= 0]
+            if len(results) >= top_labels or labels_count >= len(labels):
+                break
+            labels_count += top_labels - len(results)
+        results = results[:top_labels]
+        if results:
+            (label_ids[row, :len(results)], scores[row, :len(results)]) = \
+                zip(*results)
+
+    return label_ids, scores
+
+
+class WindowsStatistics:
+    """The occurrences of the words of a stream of windows, updated while the
+    windows are added, so that the windows do not need to be kept in memory.
+
+    Every distinct word of the windows is identified by a token ID, assigned in
+    order of appearance.
+
+    Attributes:
+        vocabulary (Dict[str, int]): dictionary {word: token ID} of all the
+            words in the windows.
+        windows_count (int): number of windows.
+
+    """
+
+    def __init__(self):
+        """The constructor creates an empty WindowsStatistics object."""
+        self.vocabulary = {}
+        self.windows_count = 0
+        self._occurrences = numpy.zeros(WINDOWS_STATISTICS_SIZE,
+                                        dtype=numpy.int64)
+        self._presences = numpy.zeros(WINDOWS_STATISTICS_SIZE,
+                                      dtype=numpy.int64)
+        self._label_words = numpy.zeros(WINDOWS_STATISTICS_SIZE, dtype=bool)
+
+    def occurrences(self) -> numpy.ndarray:
+        """Returns the occurrences of the words in the windows.
+
+        Returns:
+            numpy.ndarray: occurrences of every word, indexed by token ID.
+
+        """
+        return self._occurrences[:len(self.vocabulary)].copy()
+
+    def presences(self) -> numpy.ndarray:
+        """Returns the number of windows containing the words.
+
+        Returns:
+            numpy.ndarray: number of windows containing every word, indexed by
+                token ID.
+
+        """
+        return self._presences[:len(self.vocabulary)].copy()
+
+    def label_words(self) -> numpy.ndarray:
+        """Returns which words of the windows can be labels, being at least 3
+        characters long and not numeric.
+
+        Returns:
+            numpy.ndarray: True for the words that can be labels, indexed by
+                token ID.
+
+        """
+        return self._label_words[:len(self.vocabulary)].copy()
+
+    def add(self, window: List[str]) -> numpy.ndarray:
+        """Updates the statistics with the words of a window.
+
+        Args:
+            window (List[str]): the words of the window.
+
+        Returns:
+            numpy.ndarray: the token IDs of the words of the window.
+
+        """
+        # Convert the distinct words of the window, instead of every word
+        (words, first_positions, window_tokens, counts) = numpy.unique(
+            numpy.array(window, dtype=str), return_index=True,
+            return_inverse=True, return_counts=True)
+        word_ids = numpy.fromiter((self.vocabulary.get(word, -1)
+                                   for word in words.tolist()),
+                                  dtype=numpy.int64, count=len(words))
+        # The new words get their token IDs in order of appearance
+        new_words = numpy.flatnonzero(word_ids < 0)
+        new_words = new_words[numpy.argsort(first_positions[new_words])]
+        if len(new_words) > 0:
+            self._add_words(words[new_words].tolist())
+            word_ids[new_words] = [self.vocabulary[word]
+                                   for word in words[new_words].tolist()]
+
+        # Every word is counted just once per window in the presences
+        self._occurrences[word_ids] += counts
+        self._presences[word_ids] += 1
+        self.windows_count += 1
+
+        return word_ids[window_tokens.reshape(-1)]
+
+    def _add_words(self, words: List[str]):
+        """Assigns the next token IDs to new words, enlarging the statistics
+        when they are full.
+
+        Args:
+            words (List[str]): the new words.
+
+        """
+        first_id = len(self.vocabulary)
+        size = first_id + len(words)
+        if size > len(self._occurrences):
+            capacity = max(size, 2 * len(self._occurrences))
+            self._occurrences = numpy.resize(self._occurrences, capacity)
+            self._presences = numpy.resize(self._presences, capacity)
+            self._label_words = numpy.resize(self._label_words, capacity)
+            self._occurrences[first_id:] = 0
+            self._presences[first_id:] = 0
+        self.vocabulary.update(zip(words, range(first_id, size)))
+        self._label_words[first_id:size] = [
+            len(word) >= 3 and not word.isnumeric() for word in words]
+
+    def stream(self,
+               windows: Iterable[List[str]]
+               ) -> Iterator[numpy.ndarray]:
+        """Updates the statistics with the words of every window, while the
+        windows are consumed.
+
+        Args:
+            windows (Iterable[List[str]]): the windows.
+
+        Yields:
+            numpy.ndarray: the token IDs of the words of every window.
+
+        """
+        for window in windows:
+            yield self.add(window)
+
+
+class _InverseFrequencies(Mapping):
+    """A read-only dictionary {word: inverse frequency} evaluating the
+    inverse frequency of a word of the corpus dictionary when it is requested.
+    """
+
+    def __init__(self, corpus_dictionary: CorpusDictionary):
+        self._corpus_dictionary = corpus_dictionary
+
+    def __len__(self) -> int:
+        return len(self._corpus_dictionary)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._corpus_dictionary)
+
+    def __getitem__(self, word: str) -> float:
+        return self._corpus_dictionary.total_occurrences / \
+            self._corpus_dictionary[word]
@@ -0,0 +1,62 @@
+from okgraph.cooccurrence import CooccurrenceMatrix
+from okgraph.dictionary import corpus_statistics
+from okgraph.label_scoring import LabelScores
+from okgraph.utils import logger
+from typing import List, Tuple
+
+
+def task(seed: List[Tuple[str, ...]],
+         k: int,
+         matrix: CooccurrenceMatrix,
+         dictionary: str,
+         min_score: float = 0.0,
+         noise_threshold: float = 0.10
+         ) -> List[str]:
+    """Finds labels describing the implicit relation between the seed tuples.
+
+    This task is based on the distributional hypothesis, like the intersection
+    algorithm, but the context of every seed tuple is read from a corpus
+    co-occurrence matrix instead of the windows of the indexed corpus. The
+    context of a tuple is described by the words co-occurring with all its
+    words, scored with their lowest PPMI. The co-occurring words are cleaned
+    like the results of the windows: the words too frequent in the context, too
+    short, numeric or with a high noise are not labels. The labels common to
+    all the seed tuples are ordered using their average score.
+
+    Args:
+        seed (List[Tuple[str, ...]]): list of word tuples that has to be
+            labeled.
+        k (int): limit to the number of labels.
+        matrix (CooccurrenceMatrix): co-occurrence matrix of the corpus (see
+            :func:`okgraph.cooccurrence.generate_cooccurrence_matrix`).
+        dictionary (str): path of the corpus dictionary the matrix has been
+            generated from.
+        min_score (float): minimum value of the average score to accept a
+            label as a valid one.
+        noise_threshold (float): upper bound of the noise statistic value to
+            accept a word as a valid label (see
+            :class:`okgraph.sliding_windows.SlidingWindows`).
+
+    Returns:
+        List[str]: labels describing the seed.
+
+    """
+    logger.info(f"Starting the relation labeling of {seed}")
+    if not matrix.matches(dictionary):
+        raise ValueError(f"the co-occurrence matrix {matrix} has not been"
+                         f" generated from the dictionary {dictionary}")
+
+    # Get the context of every words tuple, as the rows of a sparse matrix
+    logger.debug(f"Get the context of every tuple in the seed")
+    corpus_dictionary = corpus_statistics(dictionary).dictionary
+    label_scores = LabelScores.from_matrix(
+        matrix.contexts(seed, corpus_dictionary, noise_threshold),
+        corpus_dictionary.words())
+
+    # Assign to the labels common to all the contexts their average score,
+    # selecting the labels with the highest values
+    logger.debug(f"Evaluate the intersection of the sets of labels")
+    labels = label_scores.top_labels(label_scores.intersection_mean(), k,
+                                     min_score)
+    logger.debug(f"Labels are {labels}")
+    return labels
@@ -1,7 +1,9 @@
-import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from okgraph.indexing import SearcherPool
+from okgraph.label_scoring import LabelScores
+from okgraph.results_cache import ResultsCache
 from okgraph.sliding_windows import SlidingWindows
 from okgraph.utils import logger
-import operator
 from typing import List, Tuple
 
 
@@ -9,7 +11,13 @@ def task(seed: List[Tuple[str, ...]],
          k: int,
          dictionary: str,
          index: str,
-         min_score: float = 0.125
+         min_score: float = 0.125,
+         searcher_pool: SearcherPool = None,
+         max_windows: int = None,
+         sampling_seed: int = 0,
+         results_cache: ResultsCache = None,
+         num_processes: int = 1,
+         executor: ProcessPoolExecutor = None
          ) -> List[str]:
     """Finds labels describing the implicit relation between the seed tuples.
 
@@ -28,6 +36,20 @@ def task(seed: List[Tuple[str, ...]],
         index (str): path of the indexed corpus files.
         min_score (float): minimum value of the average TF-IDF statistic to
             accept a label as a valid one.
+        searcher_pool (SearcherPool): pool of searchers of the indexed corpus.
+            If None, the index is opened for every SlidingWindows object.
+        max_windows (int): maximum number of windows of every SlidingWindows
+            object. If None, all the windows are extracted.
+        sampling_seed (int): seed used to sample the windows when they exceed
+            the maximum number.
+        results_cache (ResultsCache): cache of the SlidingWindows results. If
+            None, the results are not cached.
+        num_processes (int): number of processes used to window the seed
+            tuples concurrently. Ignored if an executor is provided.
+        executor (ProcessPoolExecutor): pool of processes used to window the
+            seed concurrently, kept alive between the tasks (see
+            :func:`okgraph.indexing.searcher_executor`). If None, a
+            pool of num_processes processes is created for the task.
 
     Returns:
         List[str]: labels describing the seed.
@@ -38,46 +60,31 @@ def task(seed: List[Tuple[str, ...]],
     # Get the SlidingWindows of every words tuple
     logger.debug(f"Start windowing of every pair in the seed")
     sliding_windows = \
-        [SlidingWindows(tuple,
-                        corpus_dictionary_path=dictionary,
-                        corpus_index_path=index)
-         for tuple in seed]
+        SlidingWindows.batch(seed,
+                             corpus_dictionary_path=dictionary,
+                             corpus_index_path=index,
+                             searcher_pool=searcher_pool,
+                             max_windows=max_windows,
+                             sampling_seed=sampling_seed,
+                             results_cache=results_cache,
+                             lean=True,
+                             num_processes=num_processes,
+                             executor=executor)
     # TODO: could be useful to add the 'sliding_windows' parameters such
     #  'window_size' and 'noise_threshold' as a parameter of this task with
     #  default values
 
-    # Get the labels of every word tuple from the related SlidingWindows
-    # objects
+    # Get the labels from every window, as the rows of a sparse matrix (the
+    # labels do not need to be sorted)
     logger.debug(f"Get the labels from every window")
-    all_win_labels_dict = []
-    for window in sliding_windows:
-        all_win_labels_dict.append(window.get_results_dict())
+    label_scores = LabelScores(
+        [window.get_results_dict().unranked() for window in sliding_windows])
 
-    # Evaluates the intersection of all the sets of labels
+    # Assign to the labels common to all the windows the average value of the
+    # TF-IDF statistic obtained from the different windows, selecting the
+    # labels with the highest values
     logger.debug(f"Evaluate the intersection of the sets of labels")
-    win_labels_intersection = all_win_labels_dict[0].keys()
-    for win_labels_dict in all_win_labels_dict[1:]:
-        win_labels_intersection = \
-            win_labels_intersection & win_labels_dict.keys()
-
-    # Assign to the labels in the intersections the average value of the TF-IDF
-    # statistic obtained from the different windows
-    labels_dict = {}
-    for label in win_labels_intersection:
-        avg_tf_idf = np.mean(
-            [win_labels_dict[label] for win_labels_dict in all_win_labels_dict]
-        )
-        if avg_tf_idf >= min_score:
-            labels_dict[label] = avg_tf_idf
-        logger.debug(f"{label}: score={avg_tf_idf}")
-
-    # Sort the dictionary using the TF-IDF statistic
-    labels_dict = {k: v for k, v in
-                   sorted(labels_dict.items(),
-                          key=operator.itemgetter(1),
-                          reverse=True)
-                   }
-
-    labels = list(labels_dict)
+    labels = label_scores.top_labels(label_scores.intersection_mean(), k,
+                                     min_score)
     logger.debug(f"Labels are {labels}")
-    return labels[:k]
+    return labels
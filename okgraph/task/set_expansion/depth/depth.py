@@ -1,5 +1,6 @@
 from okgraph.embeddings import WordEmbeddings
-from okgraph.utils import list_flatten, logger
+import numpy
+from okgraph.utils import list_flatten, logger, top_k
 from typing import List
 
 
@@ -51,8 +52,11 @@ def task(seed: List[str],
             scores[word] = scores.get(word, 0) + 1
         words_in_level = words_in_new_level
 
-    co_hyponyms = \
-        [key for key in sorted(scores, key=scores.get, reverse=True)
-         if key not in seed][:k]
+    # Select the most scored words without sorting all of them. The words
+    # with the same score keep their order of insertion, like a stable sort
+    words = [word for word in scores if word not in seed]
+    words_scores = numpy.fromiter((scores[word] for word in words),
+                                  dtype=numpy.int64, count=len(words))
+    co_hyponyms = [words[i] for i in top_k(words_scores, k).tolist()]
     logger.info(f"Expansion is {co_hyponyms}")
     return co_hyponyms
@@ -45,7 +45,7 @@ def task(seed: List[str],
          courpus' and a 'dictionary file' to create the OKgraph instance.
         >>> from okgraph.core import OKgraph
         >>> okg = OKgraph("tests/data/text9/text9.txt",
-        >>>               dictionary_file="corpus_dictionary.npy")
+        >>>               dictionary_file="corpus_dictionary.dict")
         >>> okg.set_expansion(
         >>>     seed = ['illinois', 'arizona', 'california'],
         >>>     algo = "fill_mask",
@@ -0,0 +1,63 @@
+from okgraph.cooccurrence import CooccurrenceMatrix
+from okgraph.dictionary import corpus_statistics
+from okgraph.label_scoring import LabelScores
+from okgraph.utils import logger
+from typing import List
+
+
+def task(seed: List[str],
+         k: int,
+         matrix: CooccurrenceMatrix,
+         dictionary: str,
+         min_score: float = 0.0,
+         noise_threshold: float = 0.10
+         ) -> List[str]:
+    """Finds labels describing the implicit relation between the seed words
+    (hyperonym).
+
+    This task is based on the distributional hypothesis, like the intersection
+    algorithm, but the context of every seed word is read from a corpus
+    co-occurrence matrix instead of the windows of the indexed corpus. The
+    context of a word is described by the PPMI of the words co-occurring with
+    it. The co-occurring words are cleaned like the results of the windows: the
+    words too frequent in the context, too short, numeric or with a high noise
+    are not labels. The labels common to all the seed words are ordered using
+    their average PPMI.
+
+    Args:
+        seed (List[str]): list of words that has to be labeled.
+        k (int): limit to the number of labels.
+        matrix (CooccurrenceMatrix): co-occurrence matrix of the corpus (see
+            :func:`okgraph.cooccurrence.generate_cooccurrence_matrix`).
+        dictionary (str): path of the corpus dictionary the matrix has been
+            generated from.
+        min_score (float): minimum value of the average PPMI to accept a label
+            as a valid one.
+        noise_threshold (float): upper bound of the noise statistic value to
+            accept a word as a valid label (see
+            :class:`okgraph.sliding_windows.SlidingWindows`).
+
+    Returns:
+        List[str]: labels describing the seed.
+
+    """
+    logger.info(f"Starting the set labeling of {seed}")
+    if not matrix.matches(dictionary):
+        raise ValueError(f"the co-occurrence matrix {matrix} has not been"
+                         f" generated from the dictionary {dictionary}")
+
+    # Get the context of every word, as the rows of a sparse matrix
+    logger.debug(f"Get the context of every word in the seed")
+    corpus_dictionary = corpus_statistics(dictionary).dictionary
+    label_scores = LabelScores.from_matrix(
+        matrix.contexts([(word,) for word in seed], corpus_dictionary,
+                        noise_threshold),
+        corpus_dictionary.words())
+
+    # Assign to the labels common to all the contexts their average PPMI,
+    # selecting the labels with the highest values
+    logger.debug(f"Evaluate the intersection of the sets of labels")
+    labels = label_scores.top_labels(label_scores.intersection_mean(), k,
+                                     min_score)
+    logger.debug(f"Labels are {labels}")
+    return labels
@@ -1,7 +1,11 @@
-import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from okgraph.dictionary import corpus_statistics
+from okgraph.indexing import SearcherPool
+from okgraph.label_scoring import LabelScores
+from okgraph.label_table import LabelTable
+from okgraph.results_cache import ResultsCache
 from okgraph.sliding_windows import SlidingWindows
 from okgraph.utils import logger
-import operator
 from typing import List
 
 
@@ -9,7 +13,14 @@ def task(seed: List[str],
          k: int,
          dictionary: str,
          index: str,
-         min_score: float = 0.125
+         min_score: float = 0.125,
+         searcher_pool: SearcherPool = None,
+         max_windows: int = None,
+         sampling_seed: int = 0,
+         results_cache: ResultsCache = None,
+         label_table: LabelTable = None,
+         num_processes: int = 1,
+         executor: ProcessPoolExecutor = None
          ) -> List[str]:
     """Finds labels describing the implicit relation between the seed words
     (hyperonym).
@@ -28,6 +39,31 @@ def task(seed: List[str],
         index (str): path of the indexed corpus files.
         min_score (float): minimum value of the average TF-IDF statistic to
             accept a label as a valid one.
+        searcher_pool (SearcherPool): pool of searchers of the indexed corpus.
+            If None, the index is opened for every SlidingWindows object.
+        max_windows (int): maximum number of windows of every SlidingWindows
+            object. If None, all the windows are extracted.
+        sampling_seed (int): seed used to sample the windows when they exceed
+            the maximum number.
+        results_cache (ResultsCache): cache of the SlidingWindows results. If
+            None, the results are not cached.
+        label_table (LabelTable): labels precomputed for the most frequent
+            words, from the current index and dictionary (see
+            :meth:`LabelTable.matches`). The labels of the seed words found in
+            the table are not obtained from their SlidingWindows objects.
+            The table stores just the best labels of every word: a label
+            common to all the seed words, but missing from the best labels of
+            a word in the table, is not found. The labels are equal to the
+            labels obtained without the table only if the table stores all
+            the labels of the seed words. The table is ignored if it has
+            been generated with other windowing parameters (see
+            :meth:`LabelTable.matches_windowing`).
+        num_processes (int): number of processes used to window the seed
+            words concurrently. Ignored if an executor is provided.
+        executor (ProcessPoolExecutor): pool of processes used to window the
+            seed concurrently, kept alive between the tasks (see
+            :func:`okgraph.indexing.searcher_executor`). If None, a
+            pool of num_processes processes is created for the task.
 
     Returns:
         List[str]: labels describing the seed.
@@ -35,49 +71,55 @@ def task(seed: List[str],
     """
     logger.info(f"Starting the set labeling of {seed}")
 
-    # Get the SlidingWindows of every word
+    # Get the precomputed labels of the seed words in the label table, if
+    # they have been obtained like the live windowing (with the default
+    # SlidingWindows parameters)
+    seed_labels = {}
+    if label_table is not None and not label_table.matches_windowing(
+            window_size=14, noise_threshold=0.10, max_windows=max_windows):
+        logger.info(f"Label table {label_table} generated with other"
+                    f" windowing parameters: ignoring it")
+        label_table = None
+    if label_table is not None:
+        corpus_dictionary = corpus_statistics(dictionary).dictionary
+        for word in seed:
+            labels = label_table.labels(word, corpus_dictionary)
+            if labels is not None:
+                seed_labels[word] = labels
+        logger.debug(f"Labels of {list(seed_labels)} found in the label"
+                     f" table {label_table}")
+
+    # Get the SlidingWindows of every other word
     logger.debug(f"Start windowing of every word in the seed")
+    windowed_seed = [word for word in dict.fromkeys(seed)
+                     if word not in seed_labels]
     sliding_windows = \
-        [SlidingWindows((word,),
-                        corpus_dictionary_path=dictionary,
-                        corpus_index_path=index)
-         for word in seed]
+        SlidingWindows.batch([(word,) for word in windowed_seed],
+                             corpus_dictionary_path=dictionary,
+                             corpus_index_path=index,
+                             searcher_pool=searcher_pool,
+                             max_windows=max_windows,
+                             sampling_seed=sampling_seed,
+                             results_cache=results_cache,
+                             lean=True,
+                             num_processes=num_processes,
+                             executor=executor)
     # TODO: could be useful to add the 'sliding_windows' parameters such
     #  'window_size' and 'noise_threshold' as a parameter of this task with
     #  default values
 
-    # Get the labels of every pair of words from the related SlidingWindows
-    # objects
+    # Get the labels from every window, as the rows of a sparse matrix (the
+    # labels do not need to be sorted)
     logger.debug(f"Get the labels from every window")
-    all_win_labels_dict = []
-    for window in sliding_windows:
-        all_win_labels_dict.append(window.get_results_dict())
+    for word, window in zip(windowed_seed, sliding_windows):
+        seed_labels[word] = window.get_results_dict().unranked()
+    label_scores = LabelScores([seed_labels[word] for word in seed])
 
-    # Evaluate the intersection of all the sets of labels
+    # Assign to the labels common to all the windows the average value of the
+    # TF-IDF statistic obtained from the different windows, selecting the
+    # labels with the highest values
     logger.debug(f"Evaluate the intersection of the sets of labels")
-    win_labels_intersection = all_win_labels_dict[0].keys()
-    for win_labels_dict in all_win_labels_dict[1:]:
-        win_labels_intersection = \
-            win_labels_intersection & win_labels_dict.keys()
-
-    # Assign to the labels in the intersections the average value of the TF-IDF
-    # statistic obtained from the different windows
-    labels_dict = {}
-    for label in win_labels_intersection:
-        avg_tf_idf = np.mean(
-            [win_labels_dict[label] for win_labels_dict in all_win_labels_dict]
-        )
-        if avg_tf_idf >= min_score:
-            labels_dict[label] = avg_tf_idf
-        logger.debug(f"{label}: score={avg_tf_idf}")
-
-    # Sort the dictionary using the TF-IDF statistic
-    labels_dict = {k: v for k, v in
-                   sorted(labels_dict.items(),
-                          key=operator.itemgetter(1),
-                          reverse=True)
-                   }
-
-    labels = list(labels_dict)
+    labels = label_scores.top_labels(label_scores.intersection_mean(), k,
+                                     min_score)
     logger.debug(f"Labels are {labels}")
-    return labels[:k]
+    return labels
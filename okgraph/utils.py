@@ -1,14 +1,30 @@
 """The 'utils' module contains generic utilities supporting the other modules of
 the library.
 """
+import bz2
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import gzip
+import hashlib
+import heapq
+import io
+from itertools import groupby, repeat
+import json
 import logging
 from logging.config import fileConfig
-import numpy as np
+import lzma
+import numpy
+from okgraph.dictionary import CorpusDictionary, is_legacy_dictionary, \
+    write_dictionary
 import operator
 from os import makedirs, path
+import queue
 import re
 import string
-from typing import Dict, Iterator, List, Tuple
+import tempfile
+import threading
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple
 
 LOG_CONFIG_FILE = path.normpath(path.join(
     path.dirname(path.normpath(__file__)),
@@ -141,69 +157,758 @@ def check_extension(file_name: str,
         )
 
 
-def get_words(file_path: str) -> Iterator[str]:
+COMPRESSED_EXTENSIONS: List[str] = [".gz", ".bz2", ".xz", ".lzma", ".zst"]
+"""List[str]: extensions of the supported compressed corpus files."""
+
+CORPUS_BUFFER_SIZE: int = 2**22
+"""int: size (bytes) of the buffer used to read the corpus files."""
+
+
+class _ThreadedReader(io.RawIOBase):
+    """A raw binary stream reading a file in a background thread.
+
+    The file is read by chunks that are queued for the consumer, so that the
+    (decompressing) reads of the file overlap with the processing of the
+    already read data. The stream can only be rewound, not moved to an
+    arbitrary position.
+    """
+
+    def __init__(self,
+                 opener: Callable[[], BinaryIO],
+                 chunk_size: int = CORPUS_BUFFER_SIZE,
+                 queue_size: int = 4):
+        """The constructor creates a _ThreadedReader object and starts the
+        reading thread.
+
+        Args:
+            opener (Callable[[], BinaryIO]): function opening the file to read.
+            chunk_size (int): size (bytes) of the chunks read from the file.
+            queue_size (int): maximum number of chunks read in advance.
+
+        """
+        super().__init__()
+        self._opener = opener
+        self._chunk_size = chunk_size
+        self._queue_size = queue_size
+        self._thread = None
+        self._start()
+
+    def _start(self) -> None:
+        """Starts reading the file from its beginning."""
+        self._queue = queue.Queue(self._queue_size)
+        self._stop = threading.Event()
+        self._chunk = memoryview(b"")
+        self._position = 0
+        self._eof = False
+        self._thread = threading.Thread(target=self._read_file,
+                                        args=(self._queue, self._stop),
+                                        daemon=True)
+        self._thread.start()
+
+    def _halt(self) -> None:
+        """Stops the reading thread."""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def _read_file(self, chunks: queue.Queue, stop: threading.Event) -> None:
+        """Reads the file and queues its chunks. An empty chunk is queued at
+        the end of the file, an exception in case of errors."""
+        try:
+            with self._opener() as file:
+                while not stop.is_set():
+                    chunk = file.read(self._chunk_size)
+                    self._put(chunks, stop, chunk)
+                    if not chunk:
+                        break
+        except Exception as e:
+            self._put(chunks, stop, e)
+
+    @staticmethod
+    def _put(chunks: queue.Queue, stop: threading.Event, item) -> None:
+        """Queues an item, unless the reading has been stopped."""
+        while not stop.is_set():
+            try:
+                chunks.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence != io.SEEK_SET:
+            raise io.UnsupportedOperation("can only rewind the stream")
+        if offset == 0:
+            self._halt()
+            self._start()
+        elif offset != self._position:
+            raise io.UnsupportedOperation("can only rewind the stream")
+        return self._position
+
+    def readinto(self, buffer) -> int:
+        while not self._chunk and not self._eof:
+            chunk = self._queue.get()
+            if isinstance(chunk, Exception):
+                raise chunk
+            if not chunk:
+                self._eof = True
+            self._chunk = memoryview(chunk)
+        size = min(len(buffer), len(self._chunk))
+        buffer[:size] = self._chunk[:size]
+        self._chunk = self._chunk[size:]
+        self._position += size
+        return size
+
+    def close(self) -> None:
+        self._halt()
+        super().close()
+
+
+def is_compressed(file_path: str) -> bool:
+    """Checks if a corpus file is compressed, according to its extension.
+
+    Args:
+        file_path (str): path of the corpus file.
+
+    Returns:
+        bool: True if the file is compressed, False otherwise.
+
+    """
+    (_, file_extension) = path.splitext(file_path)
+    return file_extension in COMPRESSED_EXTENSIONS
+
+
+def corpus_basename(file_path: str) -> str:
+    """Removes the extensions (compression included) from the path of a
+    corpus file.
+
+    Args:
+        file_path (str): path of the corpus file.
+
+    Returns:
+        str: the path of the corpus file without extensions.
+
+    Example:
+        >>> corpus_basename("/corpora/text8.txt.gz")
+        '/corpora/text8'
+
+    """
+    if is_compressed(file_path):
+        (file_path, _) = path.splitext(file_path)
+    (file_basename, _) = path.splitext(file_path)
+    return file_basename
+
+
+def open_corpus(file_path: str,
+                offset: int = 0,
+                buffer_size: int = CORPUS_BUFFER_SIZE) -> BinaryIO:
+    """Opens a corpus file for a buffered binary reading.
+
+    The supported compressed corpus files (*.gz*, *.bz2*, *.xz*, *.lzma* and
+    *.zst*) are decompressed in a background thread while they are read. The
+    *.zst* files need the 'zstandard' library.
+
+    Args:
+        file_path (str): path of the corpus file.
+        offset (int): byte offset from which the file is read. Compressed files
+            can only be read from the beginning.
+        buffer_size (int): size (bytes) of the reading buffer.
+
+    Returns:
+        BinaryIO: the opened corpus file.
+
+    """
+    (_, file_extension) = path.splitext(file_path)
+    if file_extension not in COMPRESSED_EXTENSIONS:
+        file = open(file_path, "rb", buffering=buffer_size)
+        if offset > 0:
+            file.seek(offset)
+        return file
+
+    if offset > 0:
+        raise ValueError(f"compressed corpus {file_path} can't be read from"
+                         f" an offset")
+    if file_extension == ".zst":
+        import zstandard as decompressor
+    else:
+        decompressor = {".gz": gzip, ".bz2": bz2,
+                        ".xz": lzma, ".lzma": lzma}[file_extension]
+    opener = partial(decompressor.open, file_path, "rb")
+
+    return io.BufferedReader(_ThreadedReader(opener, buffer_size),
+                             buffer_size)
+
+
+PUNCTUATION_REGEX = re.compile('[%s]' % re.escape(string.punctuation))
+"""Pattern: regular expression matching the punctuation characters."""
+
+
+def split_words(text: str) -> List[str]:
+    """Splits a text in words. The text is formatted so that the words are
+    lowercase and the punctuation is removed.
+
+    Args:
+        text (str): the text to split.
+
+    Returns:
+        List[str]: the words in the text.
+
+    """
+    return PUNCTUATION_REGEX.sub(' ', text).lower().split()
+
+
+TOKENIZER_TABLE: bytes = bytes.maketrans(
+    string.punctuation.encode() + string.ascii_uppercase.encode()
+    + b"\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f",
+    b" " * len(string.punctuation) + string.ascii_lowercase.encode()
+    + b" " * 9)
+"""bytes: translation table used to tokenize the corpus. Maps the ASCII
+punctuation and whitespace characters to spaces and the ASCII uppercase letters
+to lowercase."""
+
+TOKENIZER_BLOCK_SIZE: int = 2**22
+"""int: size (bytes) of the blocks of corpus tokenized at once."""
+
+
+def get_word_batches(file_path: str,
+                     offset: int = 0,
+                     block_size: int = TOKENIZER_BLOCK_SIZE,
+                     length: int = None
+                     ) -> Iterator[List[str]]:
+    """Reads a text file and allows to scroll over it by batches of words. The
+    text is formatted so that the words are lowercase and the punctuation is
+    removed.
+
+    The file is read by blocks of fixed size, regardless of its lines, so that
+    the memory usage is bounded even for corpora without line breaks. The words
+    split between two blocks are joined back.
+
+    Args:
+        file_path (str): path of the corpus file. The file can be compressed
+            (see :func:`open_corpus`).
+        offset (int): byte offset from which the file is read. The offset
+            should not fall inside a word or a multi-byte character.
+        block_size (int): size (bytes) of the blocks of the file tokenized at
+            once.
+        length (int): number of bytes to read from the offset. If None, the
+            file is read until its end. The portion of the file should not end
+            inside a word or a multi-byte character.
+
+    Yields:
+        List[str]: the words of the next block of the file.
+
+    """
+    with open_corpus(file_path, offset) as file:
+        # Beginning of a word that continues in the next block
+        carry = b""
+        while True:
+            if length is None:
+                block = file.read(block_size)
+            else:
+                block = file.read(min(block_size, length))
+                length -= len(block)
+            data = carry + block.translate(TOKENIZER_TABLE)
+            if block:
+                # Split at the last ASCII whitespace, never falling inside a
+                # multi-byte character
+                split = data.rfind(b" ") + 1
+                (data, carry) = (data[:split], data[split:])
+            text = data.decode("utf-8")
+            # The ASCII characters have already been lowercased
+            if not text.isascii():
+                text = text.lower()
+            words = text.split()
+            if words:
+                yield words
+            if not block:
+                break
+
+
+def get_words(file_path: str, offset: int = 0) -> Iterator[str]:
     """Reads a text file and allows to scroll over it word by word. The text is
     formatted so that the words are lowercase and the punctuation is removed.
 
     Args:
-        file_path (str): path of the corpus file.
+        file_path (str): path of the corpus file. The file can be compressed
+            (see :func:`open_corpus`).
+        offset (int): byte offset from which the file is read. The offset
+            should not fall inside a word or a multi-byte character.
 
     Yields:
         str: the next word in the file.
 
     """
-    regex = re.compile('[%s]' % re.escape(string.punctuation))
+    for words in get_word_batches(file_path, offset):
+        yield from words
+
+
+def get_words_offsets(file_path: str,
+                      offset: int = 0,
+                      block_size: int = TOKENIZER_BLOCK_SIZE
+                      ) -> Iterator[Tuple[str, int]]:
+    """Reads a text file and allows to scroll over it word by word, like
+    :func:`get_words`, along with the position of every word in the file.
+
+    The file is read by blocks of fixed size, like :func:`get_word_batches`,
+    so that the memory usage is bounded even for corpora without line breaks.
+
+    Args:
+        file_path (str): path of the corpus file. The file can't be compressed.
+        offset (int): byte offset from which the file is read. The offset
+            should not fall inside a word or a multi-byte character.
+        block_size (int): size (bytes) of the blocks of the file tokenized at
+            once.
+
+    Yields:
+        Tuple[str, int]: the next word in the file and the byte offset of its
+            first character.
+
+    """
+    if is_compressed(file_path):
+        raise ValueError(f"the words position can't be evaluated in the"
+                         f" compressed corpus {file_path}")
+    word_regex = re.compile(r'\S+')
+
+    with open_corpus(file_path, offset) as file:
+        # Beginning of a word that continues in the next block
+        carry = b""
+        # Byte offset of the data to tokenize
+        data_offset = offset
+        while True:
+            block = file.read(block_size)
+            data = carry + block.translate(TOKENIZER_TABLE)
+            if block:
+                # Split at the last ASCII whitespace, never falling inside a
+                # multi-byte character
+                split = data.rfind(b" ") + 1
+                (data, carry) = (data[:split], data[split:])
+            text = data.decode("utf-8")
+            # Characters and bytes are the same for ASCII text, whose
+            # characters have already been lowercased
+            if text.isascii():
+                for match in word_regex.finditer(text):
+                    yield match.group(), data_offset + match.start()
+            else:
+                char_position = 0
+                byte_position = data_offset
+                for match in word_regex.finditer(text):
+                    byte_position += len(
+                        text[char_position:match.start()].encode("utf-8"))
+                    char_position = match.start()
+                    yield match.group().lower(), byte_position
+            data_offset += len(data)
+            if not block:
+                break
+
+
+def file_digest(file_path: str, size: int = None) -> str:
+    """Evaluates the MD5 digest of the first bytes of a file.
+
+    Args:
+        file_path (str): path of the file.
+        size (int): number of bytes to digest. If None, the whole file is
+            digested.
+
+    Returns:
+        str: the hexadecimal digest of the file prefix.
+
+    """
+    chunk_size = 2**24
+    digest = hashlib.md5()
+    with open(file_path, "rb") as file:
+        remaining = size
+        while remaining is None or remaining > 0:
+            chunk = file.read(chunk_size if remaining is None
+                              else min(chunk_size, remaining))
+            if not chunk:
+                break
+            digest.update(chunk)
+            if remaining is not None:
+                remaining -= len(chunk)
+    return digest.hexdigest()
 
-    with open(file_path, encoding="utf-8") as file_path:
-        for line in file_path:
-            line = regex.sub(' ', line)
-            words = line.lower().split()
 
-            for w in words:
-                yield w
+def appended_offset(file_path: str, size: int, digest: str) -> Optional[int]:
+    """Checks if a file has only been extended since a previous processing
+    and returns the offset of the appended text.
 
+    The file is considered extended if its first *size* bytes still match the
+    digest evaluated when the file was processed, and if the appended text does
+    not continue the last processed word. Compressed files are never considered
+    extended.
+
+    Args:
+        file_path (str): path of the file.
+        size (int): size (bytes) of the processed file prefix.
+        digest (str): digest of the processed file prefix (see
+            :func:`file_digest`).
+
+    Returns:
+        Optional[int]: the byte offset from which the appended text starts, or
+            None if the processed prefix has been modified.
+
+    """
+    # The appended text of a compressed file can't be read on its own
+    if is_compressed(file_path):
+        return None
+    if path.getsize(file_path) < size:
+        return None
+    if file_digest(file_path, size) != digest:
+        return None
 
-def generate_dictionary(corpus: str, dictionary: str = "dictTotal.npy",
-                        save_dictionary: bool = True) -> Dict[str, int]:
+    # The last processed word must not continue into the appended text
+    if size > 0:
+        with open(file_path, "rb") as file:
+            file.seek(size - 1)
+            boundary = file.read(2)
+        if len(boundary) == 2 and \
+                not boundary[:1].isspace() and not boundary[1:].isspace():
+            return None
+
+    return size
+
+
+def load_state(state_file: str) -> Optional[Dict]:
+    """Loads the processing state of a resource.
+
+    Args:
+        state_file (str): path of the JSON file containing the state.
+
+    Returns:
+        Optional[Dict]: the state, or None if no state has been saved.
+
+    """
+    if not path.exists(state_file):
+        return None
+    with open(state_file, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def save_state(state_file: str, state: Dict) -> None:
+    """Saves the processing state of a resource.
+
+    Args:
+        state_file (str): path of the JSON file containing the state.
+        state (Dict): the state to be saved.
+
+    Returns:
+        None
+
+    """
+    with open(state_file, "w", encoding="utf-8") as file:
+        json.dump(state, file)
+
+
+def dictionary_state_file(dictionary: str) -> str:
+    """Returns the path of the file storing the processing state of a corpus
+    dictionary.
+
+    Args:
+        dictionary (str): path of the dictionary file.
+
+    Returns:
+        str: the path of the dictionary state file.
+
+    """
+    (dictionary_basename, _) = path.splitext(dictionary)
+    return dictionary_basename + ".json"
+
+
+DICTIONARY_ENTRY_SIZE: int = 128
+"""int: estimated memory (bytes) used by a word while counting the words of
+the corpus."""
+
+
+def _count_words(corpus: str,
+                 offset: int,
+                 length: int,
+                 spill_size: int = None,
+                 spill_dir: str = None) -> Tuple[Counter, List[str]]:
+    """Counts the occurrences of the words in a portion of the corpus.
+
+    Args:
+        corpus (str): path of the corpus file.
+        offset (int): byte offset of the portion of the corpus.
+        length (int): size (bytes) of the portion of the corpus.
+        spill_size (int): maximum number of distinct words counted in memory.
+            When exceeded, the counts are saved in a file in spill_dir and
+            the counting starts again. If None, all the counts are kept in
+            memory.
+        spill_dir (str): path of the directory of the saved counts.
+
+    Returns:
+        Tuple[Counter, List[str]]: the occurrences of the words in the portion
+            of the corpus still in memory, and the paths of the files storing
+            the saved ones.
+
+    """
+    occurrence_dict = Counter()
+    spill_files = []
+    for words in get_word_batches(corpus, offset, length=length):
+        occurrence_dict.update(words)
+        if spill_size is not None and len(occurrence_dict) > spill_size:
+            spill_files.append(_spill_counts(occurrence_dict, spill_dir))
+            occurrence_dict = Counter()
+    return occurrence_dict, spill_files
+
+
+def _spill_counts(occurrence_dict: Dict[str, int], spill_dir: str) -> str:
+    """Saves the occurrences of the words in a file, sorted by word.
+
+    Args:
+        occurrence_dict (Dict[str, int]): dictionary {word: occurrences}.
+        spill_dir (str): path of the directory of the file.
+
+    Returns:
+        str: the path of the file.
+
+    """
+    (handle, spill_file) = tempfile.mkstemp(suffix=".counts", dir=spill_dir)
+    with open(handle, "w", encoding="utf-8") as file:
+        for word in sorted(occurrence_dict):
+            file.write(f"{word} {occurrence_dict[word]}\n")
+    return spill_file
+
+
+def _merge_counts(spill_files: List[str]) -> Iterator[Tuple[str, int]]:
+    """Merges the occurrences of the words saved in some files.
+
+    Args:
+        spill_files (List[str]): paths of the files storing the occurrences of
+            the words, sorted by word.
+
+    Returns:
+        Iterator[Tuple[str, int]]: the words, sorted, along with the sum of
+            their occurrences in all the files.
+
+    """
+    def read_counts(spill_file):
+        with open(spill_file, encoding="utf-8") as file:
+            for line in file:
+                (word, count) = line.split(" ")
+                yield word, int(count)
+
+    merged_counts = heapq.merge(*map(read_counts, spill_files),
+                                key=operator.itemgetter(0))
+    for word, counts in groupby(merged_counts, key=operator.itemgetter(0)):
+        yield word, sum(count for _, count in counts)
+
+
+def _corpus_shards(corpus: str, num_shards: int) -> List[Tuple[int, int]]:
+    """Divides the corpus file in portions of similar size, so that no word is
+    split between two portions.
+
+    Args:
+        corpus (str): path of the corpus file.
+        num_shards (int): maximum number of portions.
+
+    Returns:
+        List[Tuple[int, int]]: the byte offset and size of every portion of the
+            corpus.
+
+    """
+    corpus_size = path.getsize(corpus)
+    boundaries = [0]
+    with open(corpus, "rb") as file:
+        for i in range(1, num_shards):
+            # Move the boundary forward, to the next separator
+            position = max(boundaries[-1], corpus_size * i // num_shards)
+            file.seek(position)
+            while position < corpus_size:
+                block = file.read(2**16).translate(TOKENIZER_TABLE)
+                separator = block.find(b" ")
+                if separator >= 0:
+                    position += separator
+                    break
+                position += len(block)
+            boundaries.append(position)
+    boundaries.append(corpus_size)
+
+    return [(start, end - start)
+            for start, end in zip(boundaries[:-1], boundaries[1:])
+            if end > start]
+
+
+def generate_dictionary(corpus: str, dictionary: str = "dictTotal.dict",
+                        save_dictionary: bool = True,
+                        num_processes: int = 1,
+                        memory_limit: int = None,
+                        min_count: int = 1) -> Dict[str, int]:
     """Creates a dictionary representing the distribution of the words in the
     corpus.
 
     Args:
         corpus (str): path of the corpus file.
-        dictionary (str): path of the file where the dictionary is saved.
+        dictionary (str): path of the file where the dictionary is saved. The
+            columnar format is used, unless the file has the legacy *.npy*
+            extension.
         save_dictionary (bool): True to save the created dictionary in a file,
             False otherwise.
+        num_processes (int): number of processes counting the words. Every
+            process counts the words in a different portion of the corpus.
+            A compressed corpus is always processed by a single process.
+        memory_limit (int): memory (MB) of the partial counts of the words.
+            When exceeded, the partial counts are saved in temporary files
+            and merged at the end, keeping in memory just the words with at
+            least min_count occurrences: the dictionary is then sorted, saved
+            and returned in memory, so it is not bounded by this limit. The
+            words with the same occurrences are sorted alphabetically. If
+            None, the partial counts are not limited.
+        min_count (int): minimum occurrences of a word in the dictionary. The
+            less frequent words are not included, but their occurrences are
+            still part of the dictionary total occurrences. A pruned
+            dictionary can't be saved in the legacy *.npy* format.
 
     Returns:
         Dict[str, int]: the corpus dictionary structured as {word: occurrences}.
 
     """
-    words = get_words(corpus)
+    if not num_processes > 0:
+        raise ValueError(f"num_processes can't be negative or zero")
+    if memory_limit is not None and not memory_limit > 0:
+        raise ValueError(f"memory_limit can't be negative or zero")
+    if not min_count > 0:
+        raise ValueError(f"min_count can't be negative or zero")
+    if save_dictionary is True and min_count > 1 and \
+            is_legacy_dictionary(dictionary):
+        raise ValueError(f"a dictionary pruned with min_count={min_count}"
+                         f" can't be saved in the legacy format")
 
     logger.info(f"Started dictionary generation")
 
-    occurrence_dict = {}
-    for word in words:
-        occurrence_dict[word] = occurrence_dict.get(word, 0) + 1
+    if num_processes == 1 or is_compressed(corpus) or \
+            path.getsize(corpus) < TOKENIZER_BLOCK_SIZE:
+        shards = [(0, None)]
+    else:
+        shards = _corpus_shards(corpus, num_processes)
+        logger.info(f"Counting words in {len(shards)} corpus portions")
+    spill_size = None
+    if memory_limit is not None:
+        spill_size = max(1, memory_limit * 2**20 // DICTIONARY_ENTRY_SIZE //
+                         len(shards))
+
+    with tempfile.TemporaryDirectory() as spill_dir:
+        if len(shards) == 1:
+            (occurrence_dict, spill_files) = \
+                _count_words(corpus, 0, None, spill_size, spill_dir)
+        else:
+            occurrence_dict = Counter()
+            spill_files = []
+            with ProcessPoolExecutor(max_workers=num_processes) as executor:
+                partial_results = executor.map(
+                    _count_words, repeat(corpus), *zip(*shards),
+                    repeat(spill_size), repeat(spill_dir))
+                # Merge the partial counts following the corpus order, so
+                # that the words with the same occurrences keep the same order
+                for partial_dict, partial_spill_files in partial_results:
+                    occurrence_dict.update(partial_dict)
+                    spill_files.extend(partial_spill_files)
+
+        if spill_files:
+            logger.info(f"Merging the counts saved in {len(spill_files)}"
+                        f" temporary files")
+            spill_files.append(_spill_counts(occurrence_dict, spill_dir))
+            occurrence_dict = Counter()
+            total_occurrences = 0
+            for word, count in _merge_counts(spill_files):
+                total_occurrences += count
+                if count >= min_count:
+                    occurrence_dict[word] = count
+        else:
+            total_occurrences = sum(occurrence_dict.values())
 
     sorted_occurrence_dict = \
         {k: v for k, v in
          sorted(occurrence_dict.items(),
                 key=operator.itemgetter(1),
                 reverse=True)
+         if v >= min_count
          }
 
     if save_dictionary is True:
         parent_dir = path.dirname(dictionary)
         if parent_dir:
             makedirs(parent_dir, exist_ok=True)
-        np.save(dictionary, sorted_occurrence_dict)
+        write_dictionary(dictionary, sorted_occurrence_dict,
+                         total_occurrences, min_count)
+        corpus_size = path.getsize(corpus)
+        save_state(dictionary_state_file(dictionary),
+                   {"corpus_size": corpus_size,
+                    "corpus_digest": file_digest(corpus, corpus_size),
+                    "min_count": min_count})
 
     logger.info(f"Dictionary generated")
 
     return sorted_occurrence_dict
 
 
+def update_dictionary(corpus: str,
+                      dictionary: str = "dictTotal.dict") -> bool:
+    """Updates a saved corpus dictionary with the words of the text appended
+    to the corpus since the dictionary generation.
+
+    Args:
+        corpus (str): path of the corpus file.
+        dictionary (str): path of the file where the dictionary is saved.
+
+    Returns:
+        bool: True if the dictionary has been updated, False if it can't be
+            updated because the already processed corpus has been modified.
+
+    """
+    state = load_state(dictionary_state_file(dictionary))
+    if state is None:
+        return False
+    # The occurrences of the pruned words are unknown
+    if state.get("min_count", 1) > 1:
+        logger.info(f"Dictionary pruned with min_count={state['min_count']}"
+                    f" can't be updated")
+        return False
+    offset = appended_offset(corpus, state["corpus_size"],
+                             state["corpus_digest"])
+    if offset is None:
+        return False
+
+    corpus_size = path.getsize(corpus)
+    if offset == corpus_size:
+        logger.info(f"Dictionary already up to date")
+        return True
+
+    logger.info(f"Started dictionary update from byte {offset}")
+
+    occurrence_dict = Counter(CorpusDictionary(dictionary).to_dict())
+    for words in get_word_batches(corpus, offset):
+        occurrence_dict.update(words)
+
+    sorted_occurrence_dict = \
+        {k: v for k, v in
+         sorted(occurrence_dict.items(),
+                key=operator.itemgetter(1),
+                reverse=True)
+         }
+
+    write_dictionary(dictionary, sorted_occurrence_dict)
+    save_state(dictionary_state_file(dictionary),
+               {"corpus_size": corpus_size,
+                "corpus_digest": file_digest(corpus, corpus_size),
+                "min_count": 1})
+
+    logger.info(f"Dictionary updated")
+
+    return True
+
+
 def list_flatten(l: List) -> List:
     """Converts a multidimensional or nested list into a one-dimensional list.
 
@@ -224,6 +929,44 @@ def list_flatten(l: List) -> List:
     return list(chain.from_iterable(l))
 
 
+def top_k(scores: numpy.ndarray, k: int) -> numpy.ndarray:
+    """Selects the highest scores without sorting all of them, in
+    O(n + k log k) time.
+
+    The ties are broken deterministically by position: the equal scores are
+    selected and sorted in order of position, like a stable sort (e.g.
+    *sorted(..., reverse=True)*), so that the selection is equal to the first
+    k positions of the scores sorted in decreasing order.
+
+    Args:
+        scores (numpy.ndarray): the scores (without NaN values).
+        k (int): limit to the number of selected scores.
+
+    Returns:
+        numpy.ndarray: the positions of the highest scores, sorted by
+            decreasing score.
+
+    Example:
+        >>> top_k(numpy.array([1.0, 3.0, 2.0, 3.0, 2.0]), 3)
+        array([1, 3, 2])
+
+    """
+    if k <= 0:
+        return numpy.empty(0, dtype=numpy.int64)
+    if k >= len(scores):
+        top = numpy.arange(len(scores))
+    else:
+        # The k-th highest score: all the higher scores are selected, the
+        # equal scores just in order of position
+        threshold = numpy.partition(scores, len(scores) - k)[len(scores) - k]
+        higher = numpy.flatnonzero(scores > threshold)
+        equal = numpy.flatnonzero(scores == threshold)[:k - len(higher)]
+        top = numpy.concatenate((higher, equal))
+    # Sort by decreasing score, then by increasing position (the last key is
+    # the primary one)
+    return top[numpy.lexsort((top, -scores[top]))]
+
+
 def tuple_combinations(tuple_elements: Tuple[List, ...]) -> List[Tuple]:
     """Given a tuple of lists containing some elements, evaluates all the
     possible combinations of those elements.
@@ -1,15 +1,47 @@
+import bz2
+from concurrent.futures import ThreadPoolExecutor
+import gzip
+import itertools
+import lzma
+import numpy as np
 from numpy import floating, ndarray
+from okgraph.cooccurrence import CooccurrenceMatrix, \
+    generate_cooccurrence_matrix
 from okgraph.core import OKgraph, NotExistingCorpusException, \
     DEFAULT_DICTIONARY_NAME
+from okgraph.dictionary import convert_dictionary, CorpusDictionary, \
+    write_dictionary
 from okgraph.embeddings import WordEmbeddings
-from okgraph.indexing import DEFAULT_INDEX_FOLDER
-from okgraph.utils import logger
+from okgraph.indexing import DEFAULT_INDEX_FOLDER, DocumentReader, \
+    find_cooccurrences, INDEX_POSITIONS, INDEX_STATE_NAME, Indexing, \
+    index_version, process_searcher_pool, searcher_executor, SearcherPool
+from okgraph.label_scoring import LabelScores
+from okgraph.label_table import LabelTable
+from okgraph.manifest import ARTIFACT_INCOMPLETE, ARTIFACT_MISMATCH, \
+    ARTIFACT_STALE, ARTIFACT_UNKNOWN, ARTIFACT_VALID, Manifest
+from okgraph.results_cache import ResultsCache
+from okgraph.sliding_windows import generate_label_table, SlidingWindows, \
+    WindowsStatistics
+from okgraph.task.relation_labeling.cooccurrence import cooccurrence as \
+    relation_labeling_cooccurrence
+from okgraph.task.set_expansion.depth import depth as set_expansion_depth
+from okgraph.task.set_labeling.cooccurrence import cooccurrence as \
+    set_labeling_cooccurrence
+from okgraph.task.set_labeling.intersection import intersection as \
+    set_labeling_intersection
+from okgraph.utils import _corpus_shards, generate_dictionary, \
+    get_word_batches, get_words, get_words_offsets, load_state, logger, \
+    open_corpus, save_state, split_words, update_dictionary
 import os
 from os import path
+import shutil
 import tests.get_test_corpus_and_resources
 from tests.get_test_corpus_and_resources import TEST_DATA_FOLDER, \
     TEST_SMALL_CORPUS, TEST_MEDIUM_CORPUS, TEST_BIG_CORPUS
 import unittest
+import unittest.mock
+from whoosh import index as whoosh_index
+from whoosh.analysis import STOP_WORDS
 
 
 class OKGraphTest(unittest.TestCase):
@@ -271,6 +303,1450 @@ class OKGraphTest(unittest.TestCase):
             msg=f"The dictionary should be a string indicating the name of the"
                 f" dictionary file")
 
+    def test_indexing_incremental_update(self):
+        """Tests the incremental update of the index and dictionary of a
+        corpus extended with new text. The updated resources should be equal to
+        the resources generated from scratch processing the extended corpus.
+
+        """
+        test_corpus = TEST_SMALL_CORPUS
+        corpus_file = self._corpus_default_data[test_corpus]["file"]
+        (corpus_name, _) = path.splitext(test_corpus)
+        folder = path.normpath(
+            path.join(TEST_DATA_FOLDER, corpus_name, "incremental_dir"))
+        if path.exists(folder):
+            shutil.rmtree(folder)
+        os.makedirs(folder)
+        partial_corpus = path.join(folder, test_corpus)
+        updated_index = path.join(folder, "updated_indexdir")
+        updated_dictionary = path.join(folder, "updated_dict.dict")
+        new_index = path.join(folder, "new_indexdir")
+        new_dictionary = path.join(folder, "new_dict.dict")
+        legacy_index = path.join(folder, "legacy_indexdir")
+
+        # Process the first part of the corpus, ending with a space
+        with open(corpus_file, "rb") as file:
+            text = file.read(10 ** 6)
+        prefix_size = text.rindex(b" ", 0, len(text) // 2) + 1
+        with open(partial_corpus, "wb") as file:
+            file.write(text[:prefix_size])
+        Indexing(partial_corpus).indexing(index_path=updated_index)
+        generate_dictionary(partial_corpus, updated_dictionary)
+
+        # Extend the corpus and update the resources
+        with open(partial_corpus, "ab") as file:
+            file.write(text[prefix_size:])
+        self.assertTrue(
+            Indexing(partial_corpus).update(index_path=updated_index),
+            msg=f"The index {updated_index} should be updated")
+        self.assertTrue(
+            update_dictionary(partial_corpus, updated_dictionary),
+            msg=f"The dictionary {updated_dictionary} should be updated")
+
+        # Process the whole extended corpus from scratch
+        Indexing(partial_corpus).indexing(index_path=new_index)
+        generate_dictionary(partial_corpus, new_dictionary)
+
+        def documents(index_dir):
+            with whoosh_index.open_dir(index_dir).searcher() as searcher:
+                return sorted((fields["position"], fields["content"])
+                              for fields in searcher.all_stored_fields())
+
+        self.assertEqual(
+            documents(updated_index), documents(new_index),
+            msg=f"The updated index should contain the same documents of the"
+                f" index generated from scratch")
+        self.assertEqual(
+            CorpusDictionary(updated_dictionary).to_dict(),
+            CorpusDictionary(new_dictionary).to_dict(),
+            msg=f"The updated dictionary should be equal to the dictionary"
+                f" generated from scratch")
+
+        # Modify the processed part of the corpus: no update is possible
+        with open(partial_corpus, "wb") as file:
+            file.write(b"new " + text)
+        self.assertFalse(
+            Indexing(partial_corpus).update(index_path=updated_index),
+            msg=f"The index of a modified corpus should not be updated")
+        self.assertFalse(
+            update_dictionary(partial_corpus, updated_dictionary),
+            msg=f"The dictionary of a modified corpus should not be updated")
+
+        # An index generated with other position semantics is not updated
+        with open(partial_corpus, "wb") as file:
+            file.write(text[:prefix_size])
+        Indexing(partial_corpus).indexing(index_path=legacy_index)
+        state_file = path.join(legacy_index, INDEX_STATE_NAME)
+        state = load_state(state_file)
+        del state["positions"]
+        save_state(state_file, state)
+        with open(partial_corpus, "ab") as file:
+            file.write(text[prefix_size:])
+        self.assertFalse(
+            Indexing(partial_corpus).update(index_path=legacy_index),
+            msg=f"The index generated with other position semantics should"
+                f" not be updated")
+
+        shutil.rmtree(folder)
+
+    def test_indexing_stop_words(self):
+        """Tests the index skipping the stop words: the stop words should not
+        be found, while the documents and the windows of the other words
+        should not change.
+
+        """
+        (folder, partial_corpus, index_dir, dictionary, _) = \
+            self._windowing_resources("stop_words_dir")
+        pruned_index = path.join(folder, "pruned_indexdir")
+        corpus_dictionary = CorpusDictionary(dictionary)
+        stop_words = corpus_dictionary.most_frequent_words(20)
+        Indexing(partial_corpus, stop_words=stop_words).indexing(
+            index_path=pruned_index)
+
+        def documents(index_dir):
+            with whoosh_index.open_dir(index_dir).searcher() as searcher:
+                return sorted((fields["position"], fields["content"])
+                              for fields in searcher.all_stored_fields())
+
+        self.assertEqual(
+            documents(pruned_index), documents(index_dir),
+            msg=f"The index skipping the stop words should contain the same"
+                f" documents")
+
+        # The skipped words are not found
+        with whoosh_index.open_dir(pruned_index).searcher() as searcher:
+            for word in stop_words:
+                self.assertEqual(
+                    find_cooccurrences(searcher, [word], 14), [],
+                    msg=f"The stop word {word} should not be found")
+        stop_windows = SlidingWindows(
+            (stop_words[-1],), corpus_index_path=pruned_index,
+            corpus_dictionary_path=dictionary)
+        self.assertEqual(
+            stop_windows._windows_list, [],
+            msg=f"The stop word {stop_words[-1]} should have no windows")
+        self.assertEqual(
+            dict(stop_windows.get_results_dict()), {},
+            msg=f"The stop word {stop_words[-1]} should have no labels")
+
+        # The windows of the other words, single or multi-word targets, still
+        # contain the stop words, and their labels do not change
+        # (the multi-word targets join every word with its first label)
+        targets = [(word,) for word in
+                   corpus_dictionary.most_frequent_words(60)[40:60:5]]
+        for target in targets:
+            windows = SlidingWindows(
+                target, corpus_index_path=index_dir,
+                corpus_dictionary_path=dictionary)
+            pruned_windows = SlidingWindows(
+                target, corpus_index_path=pruned_index,
+                corpus_dictionary_path=dictionary)
+            self.assertTrue(
+                windows._windows_list,
+                msg=f"The target {target} should have some windows")
+            with whoosh_index.open_dir(index_dir).searcher() as searcher, \
+                    whoosh_index.open_dir(pruned_index).searcher() as \
+                    pruned_searcher:
+                for word in target:
+                    self.assertEqual(
+                        list(pruned_searcher.postings(
+                            "content", word).items_as("positions")),
+                        list(searcher.postings(
+                            "content", word).items_as("positions")),
+                        msg=f"The positions of {word} should not change")
+                self.assertEqual(
+                    find_cooccurrences(pruned_searcher, target, 14),
+                    find_cooccurrences(searcher, target, 14),
+                    msg=f"The documents of {target} should not change")
+            self.assertEqual(
+                pruned_windows._windows_list, windows._windows_list,
+                msg=f"The windows of {target} should not change")
+            self.assertTrue(
+                set(stop_words) & set().union(*pruned_windows._windows_list),
+                msg=f"The windows of {target} should contain the stop words")
+            self.assertEqual(
+                list(pruned_windows.get_results_dict().items()),
+                list(windows.get_results_dict().items()),
+                msg=f"The labels of {target} should not change")
+            if len(target) == 1:
+                targets.append(
+                    target + (next(iter(windows.get_results_dict())),))
+
+        shutil.rmtree(folder)
+
+    def test_indexing_offset_only(self):
+        """Tests the index storing just the offset of the documents in the
+        corpus file. The documents read from the corpus should be equal to the
+        documents stored by the default index.
+
+        """
+        test_corpus = TEST_SMALL_CORPUS
+        corpus_file = self._corpus_default_data[test_corpus]["file"]
+        (corpus_name, _) = path.splitext(test_corpus)
+        folder = path.normpath(
+            path.join(TEST_DATA_FOLDER, corpus_name, "offset_dir"))
+        if path.exists(folder):
+            shutil.rmtree(folder)
+        os.makedirs(folder)
+        partial_corpus = path.join(folder, test_corpus)
+        content_index = path.join(folder, "content_indexdir")
+        offset_index = path.join(folder, "offset_indexdir")
+
+        with open(corpus_file, "rb") as file:
+            text = file.read(10 ** 6)
+        with open(partial_corpus, "wb") as file:
+            file.write(text[:text.rindex(b" ") + 1])
+
+        # The words are read by blocks, regardless of the lines
+        words_offsets = list(get_words_offsets(partial_corpus, block_size=97))
+        self.assertEqual(
+            [word for word, _ in words_offsets],
+            list(get_words(partial_corpus)),
+            msg=f"The words read with their offsets should be the words of the"
+                f" corpus")
+        for word, offset in words_offsets[:1000]:
+            self.assertEqual(
+                text[offset:offset + len(word.encode("utf-8"))].decode(
+                    "utf-8").lower(), word,
+                msg=f"The offset of {word} should be the position of its first"
+                    f" character")
+
+        Indexing(partial_corpus).indexing(index_path=content_index)
+        Indexing(partial_corpus, store_content=False).indexing(
+            index_path=offset_index)
+        self.assertEqual(
+            load_state(path.join(offset_index, INDEX_STATE_NAME))
+            ["first_document_offset"], words_offsets[0][1],
+            msg=f"The indexing state should record the offset of the first"
+                f" document")
+
+        with whoosh_index.open_dir(content_index).searcher() as searcher:
+            contents = sorted((fields["position"], fields["content"])
+                              for fields in searcher.all_stored_fields())
+        with whoosh_index.open_dir(offset_index).searcher() as searcher, \
+                DocumentReader(offset_index) as reader:
+            self.assertEqual(
+                sorted((fields["position"], reader.document(fields["offset"]))
+                       for fields in searcher.all_stored_fields()),
+                contents,
+                msg=f"The documents read from the corpus should be equal to"
+                    f" the stored documents")
+
+        shutil.rmtree(folder)
+
+    def test_manifest(self):
+        """Tests the manifest of the resources generated from a corpus. The
+        resources generated from a previous version of the corpus should be
+        updated, while the resources generated with different parameters should
+        be generated again.
+
+        """
+        test_corpus = TEST_SMALL_CORPUS
+        corpus_file = self._corpus_default_data[test_corpus]["file"]
+        (corpus_name, _) = path.splitext(test_corpus)
+        folder = path.normpath(
+            path.join(TEST_DATA_FOLDER, corpus_name, "manifest_dir"))
+        if path.exists(folder):
+            shutil.rmtree(folder)
+        os.makedirs(folder)
+        partial_corpus = path.join(folder, test_corpus)
+        manifest_file = path.join(folder, "manifest.json")
+        index_dir = path.join(folder, "indexdir")
+        dictionary = path.join(folder, "dict.dict")
+
+        with open(corpus_file, "rb") as file:
+            text = file.read(10 ** 6)
+        prefix_size = text.rindex(b" ", 0, len(text) // 2) + 1
+        with open(partial_corpus, "wb") as file:
+            file.write(text[:prefix_size])
+
+        manifest = Manifest(partial_corpus, manifest_file)
+        self.assertEqual(
+            manifest.status("index", index_dir), ARTIFACT_UNKNOWN,
+            msg=f"A resource not recorded should be unknown")
+        manifest.begin("index", index_dir, {"store_content": True})
+        self.assertEqual(
+            manifest.status("index", index_dir), ARTIFACT_INCOMPLETE,
+            msg=f"A resource whose generation has not ended should be"
+                f" incomplete")
+        manifest.end("index")
+        manifest = Manifest(partial_corpus, manifest_file)
+        self.assertEqual(
+            manifest.status("index", index_dir, {"store_content": None}),
+            ARTIFACT_VALID,
+            msg=f"A complete resource should be valid, for any parameter")
+        self.assertEqual(
+            manifest.status("index", index_dir, {"store_content": False}),
+            ARTIFACT_MISMATCH,
+            msg=f"A resource generated with different parameters should be"
+                f" mismatched")
+        with open(partial_corpus, "ab") as file:
+            file.write(text[prefix_size:])
+        self.assertEqual(
+            manifest.status("index", index_dir), ARTIFACT_STALE,
+            msg=f"A resource generated from a previous version of the corpus"
+                f" should be stale")
+        self.assertEqual(
+            manifest.status("index", index_dir, {"store_content": False}),
+            ARTIFACT_MISMATCH,
+            msg=f"A resource generated with different parameters should be"
+                f" mismatched, even if the corpus changed")
+
+        # Generate the resources, then extend the corpus: the resources
+        # required with different parameters are not updated
+        os.remove(manifest_file)
+        with open(partial_corpus, "wb") as file:
+            file.write(text[:prefix_size])
+        manifest = Manifest(partial_corpus, manifest_file)
+        OKgraph._get_dictionary(partial_corpus, dictionary, False,
+                                manifest=manifest)
+        OKgraph._get_index(partial_corpus, index_dir, False,
+                           manifest=manifest)
+        with open(partial_corpus, "ab") as file:
+            file.write(text[prefix_size:])
+        manifest = Manifest(partial_corpus, manifest_file)
+        OKgraph._get_dictionary(partial_corpus, dictionary, False,
+                                incremental=True, manifest=manifest,
+                                min_count=2)
+        OKgraph._get_index(partial_corpus, index_dir, False,
+                           incremental=True, store_content=False,
+                           manifest=manifest)
+        self.assertEqual(
+            CorpusDictionary(dictionary).min_count, 2,
+            msg=f"The dictionary should be generated again with the required"
+                f" minimum count")
+        self.assertIn(
+            "offset", whoosh_index.open_dir(index_dir).schema,
+            msg=f"The index should be generated again without the documents"
+                f" content")
+        self.assertEqual(
+            manifest.status("index", index_dir, {"store_content": False}),
+            ARTIFACT_VALID,
+            msg=f"The index generated again should be recorded with its"
+                f" parameters")
+
+        # Extend the corpus again: the index is updated, the pruned dictionary
+        # is generated again with the same parameters
+        with whoosh_index.open_dir(index_dir).searcher() as searcher:
+            documents_count = searcher.doc_count()
+        with open(partial_corpus, "ab") as file:
+            file.write(text[:prefix_size])
+        manifest = Manifest(partial_corpus, manifest_file)
+        OKgraph._get_dictionary(partial_corpus, dictionary, False,
+                                incremental=True, manifest=manifest,
+                                min_count=2)
+        OKgraph._get_index(partial_corpus, index_dir, False,
+                           incremental=True, manifest=manifest)
+        with whoosh_index.open_dir(index_dir).searcher() as searcher:
+            self.assertGreater(
+                searcher.doc_count(), documents_count,
+                msg=f"The index should be updated with the appended text")
+        self.assertEqual(
+            manifest.status("dictionary", dictionary, {"min_count": 2}),
+            ARTIFACT_VALID,
+            msg=f"The dictionary should be recorded as valid")
+        self.assertEqual(
+            manifest.status("index", index_dir, {"store_content": False}),
+            ARTIFACT_VALID,
+            msg=f"The updated index should be recorded as valid")
+
+        # An index recorded without the position semantics has been generated
+        # by a previous version: it is generated again
+        state_file = path.join(index_dir, INDEX_STATE_NAME)
+        state = load_state(state_file)
+        del state["positions"]
+        save_state(state_file, state)
+        manifest.begin("index", index_dir,
+                       {"store_content": False, "stop_words": 0})
+        manifest.end("index")
+        manifest = Manifest(partial_corpus, manifest_file)
+        OKgraph._get_index(partial_corpus, index_dir, False,
+                           store_content=False, manifest=manifest)
+        self.assertEqual(
+            load_state(state_file).get("positions"), INDEX_POSITIONS,
+            msg=f"The index without the position semantics should be"
+                f" generated again")
+        self.assertEqual(
+            manifest.status("index", index_dir,
+                            {"positions": INDEX_POSITIONS}),
+            ARTIFACT_VALID,
+            msg=f"The index generated again should be recorded with the"
+                f" position semantics")
+
+        shutil.rmtree(folder)
+
+    def test_compressed_corpus(self):
+        """Tests the compressed corpora, that should be decompressed while they
+        are read. The resources generated from a compressed corpus should be
+        equal to the resources generated from the uncompressed one.
+
+        """
+        test_corpus = TEST_SMALL_CORPUS
+        corpus_file = self._corpus_default_data[test_corpus]["file"]
+        (corpus_name, _) = path.splitext(test_corpus)
+        folder = path.normpath(
+            path.join(TEST_DATA_FOLDER, corpus_name, "compressed_dir"))
+        if path.exists(folder):
+            shutil.rmtree(folder)
+        os.makedirs(folder)
+        partial_corpus = path.join(folder, test_corpus)
+
+        with open(corpus_file, "rb") as file:
+            text = file.read(10 ** 6)
+        with open(partial_corpus, "wb") as file:
+            file.write(text)
+        words = list(get_words(partial_corpus))
+        occurrences = generate_dictionary(
+            partial_corpus, path.join(folder, "dict.dict"))
+        index_dir = path.join(folder, "indexdir")
+        Indexing(partial_corpus).indexing(index_path=index_dir)
+        with whoosh_index.open_dir(index_dir).searcher() as searcher:
+            documents = sorted((fields["position"], fields["content"])
+                               for fields in searcher.all_stored_fields())
+
+        for extension, compressor in [(".gz", gzip), (".bz2", bz2),
+                                      (".xz", lzma)]:
+            compressed_corpus = partial_corpus + extension
+            with compressor.open(compressed_corpus, "wb") as file:
+                file.write(text)
+
+            with open_corpus(compressed_corpus) as file:
+                self.assertEqual(
+                    file.read(), text,
+                    msg=f"The {extension} corpus should be decompressed")
+                file.seek(0)
+                self.assertEqual(
+                    file.read(100), text[:100],
+                    msg=f"The {extension} corpus should be read again from its"
+                        f" beginning")
+            with self.assertRaises(ValueError):
+                open_corpus(compressed_corpus, offset=100)
+            with self.assertRaises(ValueError):
+                Indexing(compressed_corpus, store_content=False)
+
+            self.assertEqual(
+                list(get_words(compressed_corpus)), words,
+                msg=f"The words of the {extension} corpus should be the words"
+                    f" of the uncompressed corpus")
+            self.assertEqual(
+                generate_dictionary(compressed_corpus,
+                                    path.join(folder, "dict" + extension),
+                                    num_processes=2),
+                occurrences,
+                msg=f"The dictionary of the {extension} corpus should be equal"
+                    f" to the dictionary of the uncompressed corpus")
+            compressed_index = path.join(folder, "indexdir" + extension)
+            Indexing(compressed_corpus).indexing(index_path=compressed_index)
+            with whoosh_index.open_dir(compressed_index).searcher() as \
+                    searcher:
+                self.assertEqual(
+                    sorted((fields["position"], fields["content"])
+                           for fields in searcher.all_stored_fields()),
+                    documents,
+                    msg=f"The index of the {extension} corpus should contain"
+                        f" the documents of the uncompressed corpus")
+
+        shutil.rmtree(folder)
+
+    def test_word_batches(self):
+        """Tests the tokenization of the corpus by blocks of fixed size. The
+        words should not depend on the blocks, and the portions of the corpus
+        counted by different processes should contain all its words.
+
+        """
+        test_corpus = TEST_SMALL_CORPUS
+        corpus_file = self._corpus_default_data[test_corpus]["file"]
+        with open(corpus_file, "rb") as file:
+            text = file.read()
+        words = split_words(text.decode("utf-8"))
+
+        for block_size in [1, 7, 4096]:
+            batches = list(get_word_batches(corpus_file,
+                                            block_size=block_size))
+            self.assertEqual(
+                [word for batch in batches for word in batch], words,
+                msg=f"The words read by blocks of {block_size} bytes should be"
+                    f" the words of the corpus")
+            self.assertTrue(
+                all(batches),
+                msg=f"The batches of words should not be empty")
+
+        for num_shards in [1, 3, 8]:
+            shards = _corpus_shards(corpus_file, num_shards)
+            self.assertEqual(
+                sum(length for _, length in shards), len(text),
+                msg=f"The {num_shards} shards should cover the whole corpus")
+            self.assertEqual(
+                [word for offset, length in shards
+                 for batch in get_word_batches(corpus_file, offset,
+                                               length=length)
+                 for word in batch],
+                words,
+                msg=f"The {num_shards} shards should split the corpus between"
+                    f" its words")
+
+    def test_dictionary_parallel_generation(self):
+        """Tests the generation of the dictionary by many processes, that
+        should be equal to the dictionary generated by a single process.
+
+        """
+        test_corpus = TEST_SMALL_CORPUS
+        corpus_file = self._corpus_default_data[test_corpus]["file"]
+        (corpus_name, _) = path.splitext(test_corpus)
+        folder = path.normpath(
+            path.join(TEST_DATA_FOLDER, corpus_name, "parallel_dir"))
+        if path.exists(folder):
+            shutil.rmtree(folder)
+        os.makedirs(folder)
+        dictionary = path.join(folder, "dict.dict")
+        parallel_dictionary = path.join(folder, "parallel_dict.dict")
+
+        occurrences = generate_dictionary(corpus_file, dictionary)
+        parallel_occurrences = generate_dictionary(
+            corpus_file, parallel_dictionary, num_processes=3)
+        self.assertEqual(
+            list(parallel_occurrences.items()), list(occurrences.items()),
+            msg=f"The dictionary generated by many processes should be equal"
+                f" to the dictionary generated by a single process")
+        self.assertEqual(
+            CorpusDictionary(parallel_dictionary).to_dict(),
+            CorpusDictionary(dictionary).to_dict(),
+            msg=f"The saved dictionaries should be equal")
+        with self.assertRaises(ValueError):
+            generate_dictionary(corpus_file, dictionary, num_processes=0)
+
+        shutil.rmtree(folder)
+
+    def test_searcher_pool(self):
+        """Tests the pool of searchers of an index. The searchers should be
+        reused, one thread at a time, and opened again when the index is
+        updated.
+
+        """
+        test_corpus = TEST_SMALL_CORPUS
+        corpus_file = self._corpus_default_data[test_corpus]["file"]
+        (corpus_name, _) = path.splitext(test_corpus)
+        folder = path.normpath(
+            path.join(TEST_DATA_FOLDER, corpus_name, "pool_dir"))
+        if path.exists(folder):
+            shutil.rmtree(folder)
+        os.makedirs(folder)
+        partial_corpus = path.join(folder, test_corpus)
+        index_dir = path.join(folder, "indexdir")
+
+        with open(corpus_file, "rb") as file:
+            text = file.read(10 ** 6)
+        prefix_size = text.rindex(b" ", 0, len(text) // 2) + 1
+        with open(partial_corpus, "wb") as file:
+            file.write(text[:prefix_size])
+        Indexing(partial_corpus).indexing(index_path=index_dir)
+
+        with SearcherPool(index_dir) as pool:
+            with pool.searcher() as searcher:
+                with pool.searcher() as other_searcher:
+                    self.assertIsNot(
+                        other_searcher, searcher,
+                        msg=f"A searcher in use should not be provided again")
+                documents_count = searcher.doc_count()
+            with pool.searcher() as reused_searcher:
+                self.assertIn(
+                    reused_searcher, (searcher, other_searcher),
+                    msg=f"The searchers should be reused")
+
+            # Search concurrently from many threads
+            words = list(get_words(partial_corpus))[:200:10]
+
+            def search(word):
+                with pool.searcher() as thread_searcher:
+                    return find_cooccurrences(thread_searcher, [word], 1)
+
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                results = list(executor.map(search, words * 4))
+            self.assertEqual(
+                results, [search(word) for word in words] * 4,
+                msg=f"The searches of concurrent threads should not interfere")
+
+            with open(partial_corpus, "ab") as file:
+                file.write(text[prefix_size:])
+            Indexing(partial_corpus).update(index_path=index_dir)
+            with pool.searcher() as updated_searcher:
+                self.assertGreater(
+                    updated_searcher.doc_count(), documents_count,
+                    msg=f"The searchers should be opened again when the index"
+                        f" is updated")
+
+        shutil.rmtree(folder)
+
+    def test_find_cooccurrences(self):
+        """Tests the search of the documents containing some words inside a
+        window of text, that should not depend on the order of the words.
+
+        """
+        test_corpus = TEST_SMALL_CORPUS
+        corpus_file = self._corpus_default_data[test_corpus]["file"]
+        (corpus_name, _) = path.splitext(test_corpus)
+        folder = path.normpath(
+            path.join(TEST_DATA_FOLDER, corpus_name, "cooccurrences_dir"))
+        if path.exists(folder):
+            shutil.rmtree(folder)
+        os.makedirs(folder)
+        partial_corpus = path.join(folder, test_corpus)
+        index_dir = path.join(folder, "indexdir")
+
+        with open(corpus_file, "rb") as file:
+            text = file.read(10 ** 6)
+        with open(partial_corpus, "wb") as file:
+            file.write(text[:text.rindex(b" ") + 1])
+        Indexing(partial_corpus).indexing(index_path=index_dir)
+
+        ix = whoosh_index.open_dir(index_dir)
+        analyzer = ix.schema["content"].analyzer
+        with ix.searcher() as searcher:
+            # The positions of the indexed words in every document
+            documents = {}
+            for document, fields in searcher.reader().iter_docs():
+                positions = {}
+                for token in analyzer(fields["content"], positions=True):
+                    positions.setdefault(token.text, []).append(token.pos)
+                documents[document] = positions
+            # Search the words close to each other in some parts of the corpus
+            indexed_words = set().union(*documents.values())
+            corpus_words = [word for word in get_words(partial_corpus)
+                            if word in indexed_words]
+            targets = [corpus_words[i:i + step * size:step]
+                       for i in range(1000, 20000, 2000)
+                       for step, size in [(3, 2), (4, 3)]]
+
+            def shortest_span(positions, words):
+                # The shortest sequence starts with one of the words
+                spans = []
+                for start in set().union(*[positions[word]
+                                           for word in words]):
+                    ends = [min((position for position in positions[word]
+                                 if position >= start), default=None)
+                            for word in words]
+                    if None not in ends:
+                        spans.append(max(ends) - start + 1)
+                return min(spans)
+
+            for words in targets:
+                if len(set(words)) < len(words):
+                    continue
+                for window_size in [2, 5, 20]:
+                    expected = sorted(
+                        document for document, positions in documents.items()
+                        if all(word in positions for word in words) and
+                        shortest_span(positions, words) <= window_size)
+                    self.assertEqual(
+                        sorted(find_cooccurrences(searcher, words,
+                                                  window_size)),
+                        expected,
+                        msg=f"The documents containing {words} inside"
+                            f" {window_size} words should be found")
+                    self.assertEqual(
+                        sorted(find_cooccurrences(searcher, words[::-1],
+                                                  window_size)),
+                        expected,
+                        msg=f"The documents found should not depend on the"
+                            f" order of {words}")
+
+        shutil.rmtree(folder)
+
+    def test_dictionary_format(self):
+        """Tests the columnar dictionary format, comparing it with the legacy
+        format and checking the conversion between them.
+
+        """
+        test_corpus = TEST_SMALL_CORPUS
+        corpus_file = self._corpus_default_data[test_corpus]["file"]
+        (corpus_name, _) = path.splitext(test_corpus)
+        folder = path.normpath(
+            path.join(TEST_DATA_FOLDER, corpus_name, "dictionary_dir"))
+        if path.exists(folder):
+            shutil.rmtree(folder)
+        os.makedirs(folder)
+        dictionary = path.join(folder, "dict.dict")
+        legacy_dictionary = path.join(folder, "dict.npy")
+        converted_dictionary = path.join(folder, "converted_dict.dict")
+
+        occurrences = generate_dictionary(corpus_file, dictionary)
+        generate_dictionary(corpus_file, legacy_dictionary)
+        convert_dictionary(legacy_dictionary, converted_dictionary)
+
+        corpus_dictionary = CorpusDictionary(dictionary)
+        self.assertEqual(
+            list(corpus_dictionary.keys()), list(occurrences.keys()),
+            msg=f"The dictionary should keep the order of the words")
+        for word, count in occurrences.items():
+            self.assertEqual(
+                corpus_dictionary[word], count,
+                msg=f"The occurrences of {word} should be {count}")
+        self.assertNotIn(
+            "not_existing_word", corpus_dictionary,
+            msg=f"The dictionary should not contain words missing from the"
+                f" corpus")
+        self.assertEqual(
+            corpus_dictionary.total_occurrences, sum(occurrences.values()),
+            msg=f"The total occurrences should be the sum of the occurrences"
+                f" of all the words")
+        self.assertEqual(
+            np.load(legacy_dictionary, allow_pickle=True).item(), occurrences,
+            msg=f"The legacy dictionary should contain the same words")
+        self.assertEqual(
+            CorpusDictionary(converted_dictionary).to_dict(), occurrences,
+            msg=f"The converted dictionary should contain the same words")
+
+        # Prune the less frequent words, counting them with limited memory
+        pruned_dictionary = path.join(folder, "pruned_dict.dict")
+        pruned_occurrences = generate_dictionary(
+            corpus_file, pruned_dictionary, memory_limit=1, min_count=5)
+        self.assertEqual(
+            pruned_occurrences,
+            {word: count for word, count in occurrences.items() if count >= 5},
+            msg=f"The pruned dictionary should contain just the words with at"
+                f" least 5 occurrences")
+        self.assertEqual(
+            CorpusDictionary(pruned_dictionary).total_occurrences,
+            corpus_dictionary.total_occurrences,
+            msg=f"The pruned dictionary should keep the total occurrences of"
+                f" the corpus words")
+
+        # Generate the same dictionary concurrently: every writer uses its own
+        # temporary file
+        concurrent_dictionary = path.join(folder, "concurrent_dict.dict")
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(
+                lambda _: write_dictionary(concurrent_dictionary, occurrences),
+                range(8)))
+        self.assertEqual(
+            CorpusDictionary(concurrent_dictionary).to_dict(), occurrences,
+            msg=f"The dictionary written by concurrent writers should be"
+                f" valid")
+        self.assertFalse(
+            [file_name for file_name in os.listdir(folder)
+             if file_name.endswith(".tmp")],
+            msg=f"The temporary files should be removed")
+
+        shutil.rmtree(folder)
+
+    def test_results_cache_versions_and_eviction(self):
+        """Tests the cache of the results, that should read the version of the
+        index just when the index changes and remove the least recently used
+        results when it exceeds its maximum size.
+
+        """
+        test_corpus = TEST_SMALL_CORPUS
+        corpus_file = self._corpus_default_data[test_corpus]["file"]
+        (corpus_name, _) = path.splitext(test_corpus)
+        folder = path.normpath(
+            path.join(TEST_DATA_FOLDER, corpus_name, "cache_eviction_dir"))
+        if path.exists(folder):
+            shutil.rmtree(folder)
+        os.makedirs(folder)
+        partial_corpus = path.join(folder, test_corpus)
+        index_dir = path.join(folder, "indexdir")
+
+        with open(corpus_file, "rb") as file:
+            text = file.read(10 ** 6)
+        prefix_size = text.rindex(b" ", 0, len(text) // 2) + 1
+        with open(partial_corpus, "wb") as file:
+            file.write(text[:prefix_size])
+        Indexing(partial_corpus).indexing(index_path=index_dir)
+
+        # Results of about 0.4 MB, once compressed
+        random = np.random.default_rng(0)
+        results = {name: {random.bytes(16).hex(): float(i)
+                          for i in range(20000)}
+                   for name in ["first", "second", "third"]}
+
+        with ResultsCache(index_dir, max_size=1) as cache, \
+                unittest.mock.patch("okgraph.results_cache.index_version",
+                                    wraps=index_version) as version:
+            cache.put({"name": "first"}, results["first"])
+            cache.put({"name": "second"}, results["second"])
+            for _ in range(3):
+                self.assertEqual(
+                    cache.get({"name": "first"}), results["first"],
+                    msg=f"The cache should provide the saved results")
+            self.assertEqual(
+                version.call_count, 1,
+                msg=f"The version of an unchanged index should be read once")
+
+            # The second results are the least recently used
+            cache.put({"name": "third"}, results["third"])
+            self.assertIsNone(
+                cache.get({"name": "second"}),
+                msg=f"The least recently used results should be removed")
+            self.assertEqual(
+                cache.get({"name": "first"}), results["first"],
+                msg=f"The recently read results should be kept")
+
+            # Update the index: the cached results are removed
+            with open(partial_corpus, "ab") as file:
+                file.write(text[prefix_size:])
+            Indexing(partial_corpus).update(index_path=index_dir)
+            self.assertIsNone(
+                cache.get({"name": "first"}),
+                msg=f"The results of a previous version of the index should"
+                    f" be removed")
+            self.assertEqual(
+                version.call_count, 2,
+                msg=f"The version of the index should be read again once it"
+                    f" changes")
+
+        shutil.rmtree(folder)
+
+    def test_results_cache_reuse(self):
+        """Tests that the cached SlidingWindows results are equal to the
+        results, and that they are reused until the index is generated again.
+
+        """
+        (folder, partial_corpus, index_dir, dictionary, occurrences) = \
+            self._windowing_resources("results_cache_dir")
+        word = self._frequent_words(occurrences, 1)[0]
+
+        def sliding_windows(cache):
+            return SlidingWindows((word,), corpus_index_path=index_dir,
+                                  corpus_dictionary_path=dictionary,
+                                  results_cache=cache)
+
+        with ResultsCache(index_dir) as cache:
+            results = sliding_windows(None).get_results_dict()
+            self.assertEqual(
+                list(sliding_windows(cache).get_results_dict().items()),
+                list(results.items()),
+                msg=f"The results should not depend on the cache")
+            self.assertEqual(
+                cache.get({"not_existing": "key"}), None,
+                msg=f"The cache should not contain unknown results")
+            cached_windows = sliding_windows(cache)
+            self.assertEqual(
+                list(cached_windows.get_results_dict().items()),
+                list(results.items()),
+                msg=f"The cached results should be equal to the results")
+            self.assertEqual(
+                cached_windows._windows_list, [],
+                msg=f"The cached results should not require the windows")
+
+            # Generate the index again: the cached results are removed
+            shutil.rmtree(index_dir)
+            Indexing(partial_corpus).indexing(index_path=index_dir)
+            self.assertNotEqual(
+                sliding_windows(cache)._windows_list, [],
+                msg=f"The results of a previous index should not be reused")
+
+        shutil.rmtree(folder)
+
+    def test_sliding_windows_batch(self):
+        """Tests that the results of many targets windowed at once, by one or
+        many processes, are equal to the results of every target windowed on
+        its own, also when some of them are cached.
+
+        """
+        (folder, _, index_dir, dictionary, occurrences) = \
+            self._windowing_resources("batch_dir")
+        targets = [(word,) for word in self._frequent_words(occurrences, 5)]
+
+        with ResultsCache(index_dir) as cache:
+            # The first target is already cached
+            SlidingWindows(targets[0], corpus_index_path=index_dir,
+                           corpus_dictionary_path=dictionary,
+                           results_cache=cache)
+            batch = SlidingWindows.batch(
+                targets, corpus_index_path=index_dir,
+                corpus_dictionary_path=dictionary, results_cache=cache)
+            parallel_batch = SlidingWindows.batch(
+                targets, corpus_index_path=index_dir,
+                corpus_dictionary_path=dictionary, num_processes=2)
+            for target_words, windows, parallel_windows in \
+                    zip(targets, batch, parallel_batch):
+                single = SlidingWindows(
+                    target_words, corpus_index_path=index_dir,
+                    corpus_dictionary_path=dictionary)
+                self.assertEqual(
+                    list(windows.get_results_dict().items()),
+                    list(single.get_results_dict().items()),
+                    msg=f"The results of {target_words} should not depend on"
+                        f" the batch")
+                self.assertEqual(
+                    list(parallel_windows.get_results_dict().items()),
+                    list(single.get_results_dict().items()),
+                    msg=f"The results of {target_words} should not depend on"
+                        f" the processes")
+
+        shutil.rmtree(folder)
+
+    def test_sliding_windows_multi_size(self):
+        """Tests that the results of the same target windowed with many sizes
+        at once are equal to the results of every size windowed on its own.
+
+        """
+        (folder, _, index_dir, dictionary, occurrences) = \
+            self._windowing_resources("multi_size_dir")
+        word = self._frequent_words(occurrences, 1)[0]
+
+        multi_size = SlidingWindows.multi_size(
+            (word,), [20, 8, 14], corpus_index_path=index_dir,
+            corpus_dictionary_path=dictionary)
+        self.assertEqual(list(multi_size), [8, 14, 20],
+                         msg=f"The windows should be keyed by size")
+        for window_size, windows in multi_size.items():
+            single = SlidingWindows(
+                (word,), corpus_index_path=index_dir,
+                corpus_dictionary_path=dictionary, window_size=window_size)
+            self.assertEqual(
+                list(windows.get_results_dict().items()),
+                list(single.get_results_dict().items()),
+                msg=f"The results of size {window_size} should not depend on"
+                    f" the other sizes")
+
+        shutil.rmtree(folder)
+
+    def test_sliding_windows_streaming(self):
+        """Tests that the streamed windows are the windows extracted from the
+        corpus, and that their statistics count every word and window.
+
+        """
+        (folder, partial_corpus, index_dir, dictionary, occurrences) = \
+            self._windowing_resources("streaming_dir")
+        word = self._frequent_words(occurrences, 1)[0]
+
+        windows = SlidingWindows((word,), corpus_index_path=index_dir,
+                                 corpus_dictionary_path=dictionary)
+        statistics = WindowsStatistics()
+        token_windows = list(SlidingWindows.iter_windows(
+            (word,), statistics, corpus_index_path=index_dir,
+            corpus_dictionary_path=dictionary))
+        words = list(statistics.vocabulary)
+        streamed = [[words[token_id] for token_id in token_ids]
+                    for token_ids in token_windows]
+        self.assertEqual(streamed, windows._windows_list,
+                         msg=f"The streamed windows should not change")
+        # The overlaid documents are joined: the windows are the ones of the
+        # whole corpus (except for the last words, not indexed yet)
+        corpus_windows = list(windows._window_extraction(
+            [list(get_words(partial_corpus))]))
+        self.assertEqual(
+            windows._windows_list,
+            corpus_windows[:len(windows._windows_list)],
+            msg=f"Every window should be extracted once from the corpus")
+
+        self.assertEqual(statistics.windows_count, len(streamed),
+                         msg=f"The statistics should count every window")
+        tokens = np.concatenate(token_windows)
+        self.assertEqual(
+            statistics.occurrences().tolist(),
+            np.bincount(tokens, minlength=len(words)).tolist(),
+            msg=f"The statistics should count every word")
+        self.assertEqual(
+            statistics.presences().tolist(),
+            [sum(token_id in token_ids for token_ids in token_windows)
+             for token_id in range(len(words))],
+            msg=f"The statistics should count the windows of every word")
+
+        shutil.rmtree(folder)
+
+    def test_sliding_windows_corpus(self):
+        """Tests that the windows of many target words, extracted from the
+        positions of the target words in the matched documents, are the
+        windows extracted from the whole corpus.
+
+        """
+        (folder, partial_corpus, index_dir, dictionary, occurrences) = \
+            self._windowing_resources("corpus_dir")
+        words = self._frequent_words(occurrences, 4)
+        dense_word = max((word for word in occurrences
+                          if word not in STOP_WORDS), key=occurrences.get)
+        corpus_words = list(get_words(partial_corpus))
+
+        # The most frequent words are close to each other in many overlaid
+        # documents: the pending matches cross the documents boundaries.
+        # The common English words are not indexed: their positions are
+        # found scanning the documents
+        targets = [(dense_word, word) for word in words] + \
+            list(itertools.combinations(words, 2)) + \
+            [tuple(words[:3]), ("the", words[0])]
+        for target_words in targets:
+            for window_size in [9, 14]:
+                windows = SlidingWindows(
+                    target_words, corpus_index_path=index_dir,
+                    corpus_dictionary_path=dictionary,
+                    window_size=window_size)
+                self.assertGreater(
+                    len(windows._windows_list), 0,
+                    msg=f"{target_words} should have some windows")
+                # The last words of the corpus are not indexed yet
+                corpus_windows = list(windows._window_extraction(
+                    [corpus_words]))
+                self.assertEqual(
+                    windows._windows_list,
+                    corpus_windows[:len(windows._windows_list)],
+                    msg=f"The windows of {target_words} of size "
+                        f"{window_size} should be extracted from the corpus")
+
+        shutil.rmtree(folder)
+
+    def test_sliding_windows_sampling(self):
+        """Tests the sampling of the windows: the sample should be a uniform
+        sample of all the windows, in corpus order, depending just on the
+        sampling seed.
+
+        """
+        (folder, partial_corpus, index_dir, dictionary, occurrences) = \
+            self._windowing_resources("sampling_dir")
+        word = self._frequent_words(occurrences, 1)[0]
+        max_windows = 20
+
+        all_windows = SlidingWindows(
+            (word,), corpus_index_path=index_dir,
+            corpus_dictionary_path=dictionary)._windows_list
+        self.assertGreater(
+            len(all_windows), 4 * max_windows,
+            msg=f"The word {word} should have many windows")
+
+        def sample(sampling_seed):
+            return SlidingWindows(
+                (word,), corpus_index_path=index_dir,
+                corpus_dictionary_path=dictionary, max_windows=max_windows,
+                sampling_seed=sampling_seed)._windows_list
+
+        samples = [sample(sampling_seed) for sampling_seed in range(10)]
+        for sampling_seed, windows in enumerate(samples):
+            self.assertEqual(
+                windows, sample(sampling_seed),
+                msg=f"The sample of seed {sampling_seed} should not change")
+            self.assertEqual(
+                len(windows), max_windows,
+                msg=f"The sample should contain {max_windows} windows")
+            corpus_windows = iter(all_windows)
+            self.assertTrue(
+                all(window in corpus_windows for window in windows),
+                msg=f"The sample should contain windows of the target, in"
+                    f" corpus order")
+        self.assertEqual(
+            len(set(tuple(map(tuple, windows)) for windows in samples)),
+            len(samples),
+            msg=f"The samples of different seeds should be different")
+        # The sampled windows are not just the first ones
+        half = len(all_windows) // 2
+        self.assertTrue(
+            all(any(window in all_windows[half:] for window in windows)
+                for windows in samples),
+            msg=f"Every sample should contain windows of the whole corpus")
+
+        statistics = WindowsStatistics()
+        token_windows = list(SlidingWindows.iter_windows(
+            (word,), statistics, corpus_index_path=index_dir,
+            corpus_dictionary_path=dictionary, max_windows=max_windows,
+            sampling_seed=3))
+        words = list(statistics.vocabulary)
+        self.assertEqual(
+            [[words[token_id] for token_id in token_ids]
+             for token_ids in token_windows],
+            samples[3],
+            msg=f"The streamed windows should be sampled in the same way")
+        self.assertEqual(
+            SlidingWindows((word,), corpus_index_path=index_dir,
+                           corpus_dictionary_path=dictionary,
+                           max_windows=len(all_windows))._windows_list,
+            all_windows,
+            msg=f"All the windows should be kept if they do not exceed the"
+                f" maximum number")
+
+        shutil.rmtree(folder)
+
+    def test_sliding_windows_lean_mode(self):
+        """Tests that the lean mode keeps just the results, equal to the
+        results keeping the windows, and that the best labels are the first
+        sorted labels.
+
+        """
+        (folder, _, index_dir, dictionary, occurrences) = \
+            self._windowing_resources("lean_dir")
+        word = self._frequent_words(occurrences, 1)[0]
+
+        windows = SlidingWindows((word,), corpus_index_path=index_dir,
+                                 corpus_dictionary_path=dictionary)
+        self.assertEqual(
+            windows.get_results_list(15),
+            list(windows.get_results_dict())[:15],
+            msg=f"The best labels should be the first sorted labels")
+        lean_windows = SlidingWindows(
+            (word,), corpus_index_path=index_dir,
+            corpus_dictionary_path=dictionary, lean=True)
+        self.assertEqual(
+            list(lean_windows.get_results_dict().items()),
+            list(windows.get_results_dict().items()),
+            msg=f"The results should not depend on the lean mode")
+        self.assertEqual(
+            lean_windows._windows_list, [],
+            msg=f"The lean mode should not keep the windows")
+
+        shutil.rmtree(folder)
+
+    def test_label_scores(self):
+        """Tests the intersection of the labels of many targets and the
+        selection of the best ones, comparing them with the intersection of
+        the dictionaries of the labels sorted by a stable sort.
+
+        """
+        results = [
+            {"city": 0.5, "river": 0.25, "town": 0.0, "port": 0.75,
+             "lake": 0.5},
+            {"river": 0.75, "city": 0.5, "town": 0.0, "lake": 0.5,
+             "sea": 1.0},
+            {"town": 0.0, "lake": 0.5, "city": 0.5, "river": 0.5,
+             "port": 0.25}]
+        label_scores = LabelScores(results)
+        scores = dict(zip(label_scores.labels,
+                          label_scores.intersection_mean().tolist()))
+        self.assertEqual(
+            scores["town"], 0.0,
+            msg=f"The explicit zero scores should be part of the"
+                f" intersection")
+        for label in ("port", "sea"):
+            self.assertTrue(
+                np.isnan(scores[label]),
+                msg=f"The label {label}, missing from some targets, should"
+                    f" not be part of the intersection")
+
+        def baseline_labels(k, min_score):
+            common_labels = [label for label in results[0]
+                             if all(label in result for result in results)]
+            labels_dict = {}
+            for label in common_labels:
+                score = np.mean([result[label] for result in results])
+                if min_score is None or score >= min_score:
+                    labels_dict[label] = score
+            return sorted(labels_dict, key=labels_dict.get, reverse=True)[:k]
+
+        # The labels "city", "river" and "lake" have the same score
+        for min_score in (None, 0.0, 0.25, 0.6):
+            for k in range(1, 8):
+                self.assertEqual(
+                    label_scores.top_labels(
+                        label_scores.intersection_mean(), k, min_score),
+                    baseline_labels(k, min_score),
+                    msg=f"The best {k} labels with a score of at least"
+                        f" {min_score} should not change")
+
+    def test_sliding_windows_clean_results(self):
+        """Tests the removal of the words whose occurrences are higher than
+        the number of words left, comparing it with the removal of the words
+        one at a time, in order.
+
+        """
+        def baseline_cleaning(occurrences):
+            # Removing a word decreases the number of words left, so that the
+            # following words can be removed as well
+            words_left = len(occurrences)
+            significant = []
+            for i, word_occurrences in enumerate(occurrences):
+                if word_occurrences > words_left:
+                    words_left -= 1
+                else:
+                    significant.append(i)
+            return significant
+
+        def cleaning(occurrences):
+            words = [f"word{i}" for i in range(len(occurrences))]
+            return SlidingWindows._clean_results(
+                ["target"], words, np.array(occurrences, dtype=np.int64),
+                np.ones(len(words), dtype=bool), np.zeros(len(words)),
+                1.0).tolist()
+
+        # Some words are removable just after the removal of the previous
+        # ones, while the first word of the last case is checked before the
+        # removal of the second one
+        for occurrences in ([7, 6, 5, 1, 1, 1], [8, 2, 7, 6, 1, 1, 1],
+                            [5, 7, 1, 1, 1, 1]):
+            self.assertEqual(
+                cleaning(occurrences), baseline_cleaning(occurrences),
+                msg=f"The words with occurrences {occurrences} should be"
+                    f" removed one at a time")
+        self.assertEqual(cleaning([7, 6, 5, 1, 1, 1]), [3, 4, 5],
+                         msg=f"The removals should cascade")
+
+        random_generator = np.random.default_rng(0)
+        for _ in range(200):
+            occurrences = random_generator.integers(
+                1, 40, size=random_generator.integers(0, 40)).tolist()
+            self.assertEqual(
+                cleaning(occurrences), baseline_cleaning(occurrences),
+                msg=f"The words with occurrences {occurrences} should be"
+                    f" removed one at a time")
+
+    def test_sliding_windows_executor(self):
+        """Tests the windowing of many targets in a pool of processes kept
+        alive between the batches, every process searching the index with its
+        own searchers.
+
+        """
+        (folder, _, index_dir, dictionary, occurrences) = \
+            self._windowing_resources("executor_dir")
+        targets = [(word,) for word in self._frequent_words(occurrences, 6)]
+        results = [list(SlidingWindows(
+            target_words, corpus_index_path=index_dir,
+            corpus_dictionary_path=dictionary).get_results_dict().items())
+            for target_words in targets]
+
+        self.assertIsNone(
+            process_searcher_pool(index_dir),
+            msg=f"The main process should not have its own searchers")
+        with searcher_executor(index_dir, 2) as executor:
+            # The same processes window many batches
+            for batch_targets, batch_results in \
+                    ((targets[:3], results[:3]), (targets[3:], results[3:])):
+                batch = SlidingWindows.batch(
+                    batch_targets, corpus_index_path=index_dir,
+                    corpus_dictionary_path=dictionary, executor=executor)
+                self.assertEqual(
+                    [list(windows.get_results_dict().items())
+                     for windows in batch],
+                    batch_results,
+                    msg=f"The results of {batch_targets} should not depend on"
+                        f" the processes")
+            self.assertIsNone(
+                executor.submit(process_searcher_pool, folder).result(),
+                msg=f"The searchers of the processes should be used just for"
+                    f" their index")
+
+        shutil.rmtree(folder)
+
+    def test_label_table(self):
+        """Tests the labels precomputed for the most frequent words, that
+        should be equal to the SlidingWindows results until the index is
+        generated again.
+
+        """
+        test_corpus = TEST_SMALL_CORPUS
+        corpus_file = self._corpus_default_data[test_corpus]["file"]
+        (corpus_name, _) = path.splitext(test_corpus)
+        folder = path.normpath(
+            path.join(TEST_DATA_FOLDER, corpus_name, "label_table_dir"))
+        if path.exists(folder):
+            shutil.rmtree(folder)
+        os.makedirs(folder)
+        partial_corpus = path.join(folder, test_corpus)
+        index_dir = path.join(folder, "indexdir")
+        dictionary = path.join(folder, "dict.dict")
+        table_file = path.join(folder, "table.labels")
+
+        with open(corpus_file, "rb") as file:
+            text = file.read(10 ** 6)
+        with open(partial_corpus, "wb") as file:
+            file.write(text[:text.rindex(b" ") + 1])
+        Indexing(partial_corpus).indexing(index_path=index_dir)
+        occurrences = generate_dictionary(partial_corpus, dictionary)
+        generate_label_table(table_file, index_dir, dictionary, top_words=20,
+                             top_labels=10, num_processes=2)
+
+        label_table = LabelTable(table_file)
+        corpus_dictionary = CorpusDictionary(dictionary)
+        self.assertEqual(
+            len(label_table), 20,
+            msg=f"The label table should contain the most frequent words")
+        self.assertTrue(
+            label_table.matches(index_dir, dictionary),
+            msg=f"The label table should match the index and dictionary")
+        for word in list(occurrences)[:20]:
+            results = SlidingWindows(
+                (word,), corpus_index_path=index_dir,
+                corpus_dictionary_path=dictionary).get_results_dict()
+            labels = label_table.labels(word, corpus_dictionary)
+            self.assertEqual(
+                list(labels), list(results)[:10],
+                msg=f"The labels of {word} should be its best results")
+            for label, score in labels.items():
+                self.assertAlmostEqual(
+                    score, results[label], places=5,
+                    msg=f"The score of the label {label} of {word} should be"
+                        f" equal to its result")
+        self.assertIsNone(
+            label_table.labels(list(occurrences)[-1], corpus_dictionary),
+            msg=f"The label table should not contain the rare words")
+
+        # Label a seed in a table storing all its labels: the labels are the
+        # labels obtained windowing it. Storing just the best labels, some
+        # common labels are lost
+        seed = [word for word in list(occurrences)[:50] if len(word) > 4][:3]
+        labels_count = max(len(SlidingWindows(
+            (word,), corpus_index_path=index_dir,
+            corpus_dictionary_path=dictionary).get_results_dict())
+            for word in seed)
+        complete_table_file = path.join(folder, "complete_table.labels")
+        generate_label_table(complete_table_file, index_dir, dictionary,
+                             top_words=50, top_labels=max(labels_count, 1))
+        truncated_table_file = path.join(folder, "truncated_table.labels")
+        generate_label_table(truncated_table_file, index_dir, dictionary,
+                             top_words=50, top_labels=1)
+        labels = set_labeling_intersection.task(seed, 1000, dictionary,
+                                                index_dir, min_score=0)
+        self.assertEqual(
+            set_labeling_intersection.task(
+                seed, 1000, dictionary, index_dir, min_score=0,
+                label_table=LabelTable(complete_table_file)),
+            labels,
+            msg=f"The labels of {seed} should not change using a table"
+                f" storing all their labels")
+        self.assertLessEqual(
+            set(set_labeling_intersection.task(
+                seed, 1000, dictionary, index_dir, min_score=0,
+                label_table=LabelTable(truncated_table_file))),
+            set(labels),
+            msg=f"The labels of {seed} found in a table storing just their"
+                f" best labels should be some of their labels")
+
+        # A table obtained with other windowing parameters is ignored
+        other_size_table_file = path.join(folder, "other_size_table.labels")
+        generate_label_table(other_size_table_file, index_dir, dictionary,
+                             top_words=50, top_labels=1, window_size=8)
+        other_size_table = LabelTable(other_size_table_file)
+        self.assertFalse(
+            other_size_table.matches(index_dir, dictionary),
+            msg=f"The label table should not match other window sizes")
+        self.assertTrue(
+            other_size_table.matches(index_dir, dictionary, window_size=8),
+            msg=f"The label table should match its window size")
+        self.assertEqual(
+            set_labeling_intersection.task(
+                seed, 1000, dictionary, index_dir, min_score=0,
+                label_table=other_size_table),
+            labels,
+            msg=f"The labels of {seed} should not be read from a table of"
+                f" other window sizes")
+        complete_table = LabelTable(complete_table_file)
+        self.assertFalse(
+            complete_table.matches(index_dir, dictionary, max_windows=5),
+            msg=f"The label table should not match a sampled windowing")
+        self.assertEqual(
+            set_labeling_intersection.task(
+                seed, 1000, dictionary, index_dir, min_score=0, max_windows=5,
+                label_table=complete_table),
+            set_labeling_intersection.task(
+                seed, 1000, dictionary, index_dir, min_score=0,
+                max_windows=5),
+            msg=f"The labels of {seed} should not be read from a table when"
+                f" the windows are sampled")
+
+        # Generate the index again: the label table is not valid anymore
+        shutil.rmtree(index_dir)
+        Indexing(partial_corpus).indexing(index_path=index_dir)
+        self.assertFalse(
+            label_table.matches(index_dir, dictionary),
+            msg=f"The label table should not match a new index")
+
+        shutil.rmtree(folder)
+
+    def test_cooccurrence_matrix(self):
+        """Tests the co-occurrence matrix of a corpus, comparing it with the
+        co-occurrences counted word by word, and the labeling tasks using it.
+
+        """
+        test_corpus = TEST_SMALL_CORPUS
+        corpus_file = self._corpus_default_data[test_corpus]["file"]
+        (corpus_name, _) = path.splitext(test_corpus)
+        folder = path.normpath(
+            path.join(TEST_DATA_FOLDER, corpus_name, "cooccurrence_dir"))
+        if path.exists(folder):
+            shutil.rmtree(folder)
+        os.makedirs(folder)
+        partial_corpus = path.join(folder, test_corpus)
+        dictionary = path.join(folder, "dict.dict")
+        matrix_file = path.join(folder, "matrix.cooc")
+
+        with open(corpus_file, "rb") as file:
+            text = file.read(10 ** 5)
+        with open(partial_corpus, "wb") as file:
+            file.write(text[:text.rindex(b" ") + 1])
+        occurrences = generate_dictionary(partial_corpus, dictionary)
+        generate_cooccurrence_matrix(partial_corpus, dictionary, matrix_file,
+                                     window_size=6)
+
+        # Count the co-occurrences of the most frequent word
+        words = list(get_words(partial_corpus))
+        word = list(occurrences)[0]
+        cooccurrences = {}
+        for position, other_word in enumerate(words):
+            if other_word == word:
+                for neighbour in words[max(0, position - 3):position] + \
+                        words[position + 1:position + 4]:
+                    cooccurrences[neighbour] = \
+                        cooccurrences.get(neighbour, 0) + 1
+
+        matrix = CooccurrenceMatrix(matrix_file)
+        corpus_dictionary = CorpusDictionary(dictionary)
+        self.assertTrue(
+            matrix.matches(dictionary),
+            msg=f"The matrix should match the dictionary")
+        (word_ids, _) = matrix.ppmi(corpus_dictionary.word_id(word))
+        self.assertTrue(
+            set(word_ids) <= {corpus_dictionary.word_id(other_word)
+                              for other_word in cooccurrences},
+            msg=f"The context of {word} should contain just the words"
+                f" co-occurring with it")
+        self.assertEqual(
+            matrix.row_sums[corpus_dictionary.word_id(word)],
+            sum(cooccurrences.values()),
+            msg=f"The co-occurrences of {word} should be counted")
+        self.assertEqual(
+            matrix.total_cooccurrences, sum(matrix.row_sums),
+            msg=f"The total co-occurrences should be the sum of the"
+                f" co-occurrences of all the words")
+
+        # Scale the counts, as in a corpus of billions of words: the PPMI
+        # does not change, even if the products of the counts exceed int64
+        (word_ids, ppmi) = matrix.ppmi(corpus_dictionary.word_id(word))
+        scaled_matrix = CooccurrenceMatrix(matrix_file)
+        scale = 10 ** 9
+        scaled_matrix._data = scaled_matrix._data * scale
+        scaled_matrix.row_sums = scaled_matrix.row_sums * scale
+        scaled_matrix.total_cooccurrences *= scale
+        (scaled_word_ids, scaled_ppmi) = \
+            scaled_matrix.ppmi(corpus_dictionary.word_id(word))
+        self.assertEqual(
+            scaled_word_ids.tolist(), word_ids.tolist(),
+            msg=f"The context of {word} should not depend on the scale of"
+                f" the counts")
+        np.testing.assert_allclose(
+            scaled_ppmi, ppmi,
+            err_msg=f"The PPMI should not overflow on large counts")
+
+        seed = list(occurrences)[1:4]
+        k = 15
+        results = set_labeling_cooccurrence.task(seed, k, matrix, dictionary)
+        self._check_set_labeling_results(results, k)
+        self.assertFalse(
+            set(results) & set(seed),
+            msg=f"The labels should not contain the seed words")
+        for label in results:
+            self.assertTrue(
+                len(label) >= 3 and not label.isnumeric(),
+                msg=f"The label {label} should be cleaned")
+            for word in seed:
+                self.assertIn(
+                    corpus_dictionary.word_id(label),
+                    matrix.significant_words(
+                        corpus_dictionary.word_id(word), corpus_dictionary,
+                        0.10),
+                    msg=f"The label {label} should be significant for {word}")
+        # Without any cleaning, more words are labels
+        self.assertLessEqual(
+            set(results),
+            set(set_labeling_cooccurrence.task(
+                seed, len(occurrences), matrix, dictionary,
+                noise_threshold=None)),
+            msg=f"The cleaning should just remove some labels")
+        seed = [tuple(seed[:2])]
+        results = relation_labeling_cooccurrence.task(seed, k, matrix,
+                                                      dictionary)
+        self._check_relation_labeling_results(results, k)
+        self.assertFalse(
+            set(results) & set(seed[0]),
+            msg=f"The labels should not contain the seed words")
+
+        shutil.rmtree(folder)
+
     def test_task_relation_expansion_intersection(self):
         """Tests the relation expansion task using the intersection algorithm.
         Uses an OKgraph object with default values, using pre-existent data.
@@ -407,6 +1883,40 @@ class OKGraphTest(unittest.TestCase):
         logger.info(f"Expansion of {seed_1} is {results_1}")
         logger.info(f"Expansion of {seed_2} is {results_2}")
 
+    def test_task_set_expansion_depth_ties(self):
+        """Tests that the set expansion task using the depth algorithm breaks
+        the ties between the words with the same score like a stable sort,
+        keeping their order of insertion.
+
+        """
+        similar_words = {
+            "milan": ["rome", "turin", "naples", "venice", "genoa"],
+            "venice": ["milan", "genoa", "padua", "verona", "trieste"],
+            "rome": ["naples", "florence", "bari", "turin", "milan"]}
+        embeddings = unittest.mock.Mock()
+        embeddings.w2w.side_effect = lambda word, width: \
+            similar_words.get(word, [f"{word}_{i}" for i in range(width)])
+        seed = ["milan", "venice"]
+
+        # The scores of the words, evaluated like the task
+        scores = {}
+        words_in_level = list(seed)
+        for _ in range(2):
+            words_in_level = [similar for word in words_in_level
+                              for similar in embeddings.w2w(word, 5)]
+            for word in words_in_level:
+                scores[word] = scores.get(word, 0) + 1
+        sorted_words = [word for word in sorted(scores, key=scores.get,
+                                                reverse=True)
+                        if word not in seed]
+        for k in range(1, len(sorted_words) + 2):
+            self.assertEqual(
+                set_expansion_depth.task(seed, k, embeddings, width=5,
+                                         depth=2),
+                sorted_words[:k],
+                msg=f"The best {k} words should be sorted like a stable"
+                    f" sort")
+
     def test_task_set_expansion_fill_mask(self):
         """Tests the set expansion task using the fill mask algorithm.
         Uses an OKgraph object with default values, using pre-existent data.
@@ -447,6 +1957,16 @@ class OKGraphTest(unittest.TestCase):
 
         logger.info(f"Labels of {seed} are {results}")
 
+        # Sample the windows: the same seed gives the same labels
+        options["max_windows"] = 500
+        sampled_results = okg.set_labeling(seed, k, "intersection", options)
+        self._check_set_labeling_results(sampled_results, k)
+        self.assertEqual(sampled_results,
+                         okg.set_labeling(seed, k, "intersection", options))
+
+        logger.info(f"Labels of {seed} from sampled windows are "
+                    f"{sampled_results}")
+
     def test_embeddings(self):
         """Tests the operations available through a 'WordEmbeddings' class.
 
@@ -545,6 +2065,43 @@ class OKGraphTest(unittest.TestCase):
             cosine > 0.99,
             msg=f"Cosine between {w1} and {w1} must be almost 1")
 
+    def _windowing_resources(self, folder_name):
+        """Creates the index and the dictionary of the first part of the small
+        test corpus, in a new folder.
+
+        Returns:
+            Tuple[str, str, str, str, Dict[str, int]]: the paths of the folder,
+                of the partial corpus, of the index and of the dictionary, and
+                the occurrences of the words of the partial corpus.
+
+        """
+        test_corpus = TEST_SMALL_CORPUS
+        corpus_file = self._corpus_default_data[test_corpus]["file"]
+        (corpus_name, _) = path.splitext(test_corpus)
+        folder = path.normpath(
+            path.join(TEST_DATA_FOLDER, corpus_name, folder_name))
+        if path.exists(folder):
+            shutil.rmtree(folder)
+        os.makedirs(folder)
+        partial_corpus = path.join(folder, test_corpus)
+        index_dir = path.join(folder, "indexdir")
+        dictionary = path.join(folder, "dict.dict")
+
+        with open(corpus_file, "rb") as file:
+            text = file.read(10 ** 6)
+        with open(partial_corpus, "wb") as file:
+            file.write(text[:text.rindex(b" ") + 1])
+        Indexing(partial_corpus).indexing(index_path=index_dir)
+        occurrences = generate_dictionary(partial_corpus, dictionary)
+        return folder, partial_corpus, index_dir, dictionary, occurrences
+
+    @staticmethod
+    def _frequent_words(occurrences, count):
+        """Selects the most frequent words, excluding the short stop words."""
+        return [word for word in sorted(occurrences, key=occurrences.get,
+                                        reverse=True)
+                if len(word) > 4][:count]
+
     def _check_relation_expansion_results(self, results, k):
         """Checks the results of a 'relation expansion' algorithm."""
         self.assertIsInstance(